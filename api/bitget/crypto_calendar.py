@@ -2,6 +2,7 @@ import requests
 import json
 from datetime import datetime, timezone
 from utils import crypto_event_utils as ceu
+from utils import timezones as tzu
 import time
 import random
 import pandas as pd
@@ -25,31 +26,25 @@ def bitget_calendar_to_df(payload: dict) -> pd.DataFrame:
 
     남기는 열:
       id, title, categories, coin_name, coin_symbol,
-      start_time_kst, link, source
-    """
-    def ms_to_kst(ms):
-        if ms is None:
-            return None
-        # ms → datetime (UTC → KST)
-        dt = datetime.fromtimestamp(int(ms) / 1000, tz=timezone.utc)
-        return dt.astimezone(timezone(timedelta(hours=9)))
+      start_time_kst, start_time_utc_ms, link, source
 
+    startTime(UTC ms)은 그대로 start_time_utc_ms 로 두고,
+    start_time_kst 는 열 전체를 한 번에 KST 로 변환한다.
+    """
     items = payload.get("data", {}).get("items", [])
-    rows = []
-    for ev in items:
-        coin = ev.get("coin") or {}
-        rows.append({
-            "id": ev.get("id"),
-            "title": ev.get("title"),
-            "categories": ", ".join(ev.get("categories", [])),
-            "coin_name": coin.get("name"),
-            "coin_symbol": coin.get("symbol"),
-            "start_time_kst": ms_to_kst(ev.get("startTime")),
-            "link": ev.get("link"),
-            "source": ev.get("source"),
-        })
-
-    return pd.DataFrame(rows)
+    df = pd.DataFrame({
+        "id": [ev.get("id") for ev in items],
+        "title": [ev.get("title") for ev in items],
+        "categories": [", ".join(ev.get("categories", [])) for ev in items],
+        "coin_name": [(ev.get("coin") or {}).get("name") for ev in items],
+        "coin_symbol": [(ev.get("coin") or {}).get("symbol") for ev in items],
+        "start_time_utc_ms": pd.to_numeric(pd.Series([ev.get("startTime") for ev in items], dtype=object),
+                                           errors="coerce").astype("Int64"),
+        "link": [ev.get("link") for ev in items],
+        "source": [ev.get("source") for ev in items],
+    })
+    df.insert(5, "start_time_kst", tzu.from_utc_ms(df["start_time_utc_ms"], tzu.CANONICAL_TZ))
+    return df
 
 
 def fetch_bitget_calendar_daily(
@@ -146,35 +141,75 @@ def fetch_crypto_calendar_daily(
     return result
 
 
-def fetch_crypto_calendar_range(start_date: str, end_date: str, page_size: int = 100) -> pd.DataFrame:
+def polite_pause():
+    """일자별 요청 사이 지연 (봇 차단 완화)."""
+    time.sleep(0.5 + random.random() * 0.7)
+
+
+def fetch_bitget_calendar_day_pages(day_str: str, page_size: int = 100, max_pages: int = 20) -> dict:
     """
-    Bitget crypto calendar를 날짜 범위로 수집해 하나의 DataFrame으로 반환.
+    하루치를 마지막 페이지(items < page_size)까지 받아 items 를 합친 payload 하나로 반환.
+    max_pages 를 넘으면 받은 만큼만 돌려주고 경고를 남긴다. 페이지 요청 사이에는 polite_pause.
+    """
+    date_ms = date_to_ms_utc(day_str)
+    payload, items = None, []
+    for page in range(1, max_pages + 1):
+        if page > 1:
+            polite_pause()
+        data = fetch_bitget_calendar_daily(date_ms, page_num=page, page_size=page_size)
+        page_items = (data.get("data") or {}).get("items") or []
+        payload = payload or data
+        items.extend(page_items)
+        if len(page_items) < page_size:
+            break
+    else:
+        print(f"[crypto][{day_str}] {max_pages} 페이지를 넘어 일부만 수집")
+    payload.setdefault("data", {})["items"] = items
+    return payload
+
+
+def fetch_crypto_calendar_payloads(start_date: str, end_date: str, page_size: int = 100,
+                                   max_pages: int = 20) -> dict:
+    """
+    fetch_crypto_calendar_range 의 수집 절반: 날짜별 원본 JSON 응답만 받아 둔다.
     - start_date, end_date: 'YYYY-MM-DD' (둘 다 포함, inclusive)
-    - 일자별 요청 사이에 짧은 지연 추가(봇 필터 완화)
+    - 날짜마다 마지막 페이지까지 받아 items 를 합친다 (fetch_bitget_calendar_day_pages)
+    - 실패한 날짜는 로그만 남기고 건너뜀
+    반환: {'YYYY-MM-DD': payload}
     """
     start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
     end_dt   = datetime.strptime(end_date,   "%Y-%m-%d").date()
     if end_dt < start_dt:
         raise ValueError("end_date가 start_date보다 앞일 수 없습니다.")
 
-    frames = []
+    payloads = {}
     cur = start_dt
     while cur <= end_dt:
         day_str = cur.strftime("%Y-%m-%d")
         try:
-            day_data = fetch_crypto_calendar_daily(day_str, page_size=page_size)
-            if isinstance(day_data, list):
-                day_df = pd.DataFrame(day_data)
-            else:
-                day_df = day_data if isinstance(day_data, pd.DataFrame) else pd.DataFrame()
-            if not day_df.empty:
-                frames.append(day_df)
+            payloads[day_str] = fetch_bitget_calendar_day_pages(day_str, page_size=page_size, max_pages=max_pages)
         except Exception as e:
             print(f"[crypto][{day_str}] fetch error: {e}")
         finally:
-            # 봇 차단 완화용 지연
-            time.sleep(0.5 + random.random() * 0.7)
+            polite_pause()
         cur += timedelta(days=1)
+    return payloads
+
+
+def crypto_payloads_to_df(payloads: dict) -> pd.DataFrame:
+    """
+    fetch_crypto_calendar_range 의 파싱 절반: {날짜: payload} → 하나의 DataFrame (id 중복 제거).
+    형식이 깨진 날짜는 로그만 남기고 건너뜀
+    """
+    frames = []
+    for day_str, payload in payloads.items():
+        try:
+            day_df = bitget_calendar_to_df(payload)
+        except Exception as e:
+            print(f"[crypto][{day_str}] parse error: {e}")
+            continue
+        if not day_df.empty:
+            frames.append(day_df)
 
     if not frames:
         return pd.DataFrame()
@@ -184,4 +219,13 @@ def fetch_crypto_calendar_range(start_date: str, end_date: str, page_size: int =
         out = out.drop_duplicates(subset=["id"])
     else:
         out = out.drop_duplicates()
-    return out
\ No newline at end of file
+    return out
+
+
+def fetch_crypto_calendar_range(start_date: str, end_date: str, page_size: int = 100) -> pd.DataFrame:
+    """
+    Bitget crypto calendar를 날짜 범위로 수집해 하나의 DataFrame으로 반환.
+    - start_date, end_date: 'YYYY-MM-DD' (둘 다 포함, inclusive)
+    - 일자별 요청 사이에 짧은 지연 추가(봇 필터 완화)
+    """
+    return crypto_payloads_to_df(fetch_crypto_calendar_payloads(start_date, end_date, page_size=page_size))
@@ -1,11 +1,15 @@
 import json
 import time
+import pandas as pd
+from datetime import datetime, timezone, timedelta
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import undetected_chromedriver as uc
 
+from utils import timezones as tzu
+
 EVENTS_URL = "https://coinmarketcap.com/events/"
 POST_URL   = "https://api.coinmarketcap.com/data-api/v3/calendar/query"
 
@@ -70,6 +74,65 @@ def crawl_cmc_events(start_date="2025-09-10", end_date="2025-09-24", page=1, siz
         driver.quit()
 
 
+def _cmc_items(payload: dict) -> list[dict]:
+    """CMC calendar 응답에서 이벤트 리스트 추출 (data / data.data / data.list 모두 허용)."""
+    data = payload.get("data", payload) if isinstance(payload, dict) else payload
+    if isinstance(data, dict):
+        for k in ("data", "list", "events", "items"):
+            if isinstance(data.get(k), list):
+                return data[k]
+        return []
+    return data if isinstance(data, list) else []
+
+
+def cmc_calendar_to_df(payload: dict) -> pd.DataFrame:
+    """
+    crawl_cmc_events() 응답을 Bitget DataFrame(bitget_calendar_to_df)과 같은 열로 변환.
+
+    남기는 열:
+      id, title, categories, coin_name, coin_symbol,
+      start_time_kst, start_time_utc_ms, link, source
+    """
+    kst = timezone(timedelta(hours=9))
+
+    def to_kst(v):
+        if v in (None, ""):
+            return None
+        if isinstance(v, (int, float)) or str(v).isdigit():
+            ms = int(v)
+            # 초 단위 epoch 방어
+            if ms < 10**12:
+                ms *= 1000
+            return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).astimezone(kst)
+        ts = pd.to_datetime(v, utc=True)
+        return ts.tz_convert(kst).to_pydatetime()
+
+    rows = []
+    for ev in _cmc_items(payload):
+        coins = ev.get("coins") or ([ev["coin"]] if ev.get("coin") else [])
+        coin = coins[0] if coins else {}
+        categories = ev.get("categories") or ev.get("category") or []
+        if isinstance(categories, str):
+            categories = [categories]
+        rows.append({
+            "id": ev.get("id"),
+            "title": ev.get("title") or ev.get("name"),
+            "categories": ", ".join(
+                c.get("name", "") if isinstance(c, dict) else str(c) for c in categories
+            ),
+            "coin_name": coin.get("name"),
+            "coin_symbol": coin.get("symbol"),
+            "start_time_kst": to_kst(ev.get("eventTime") or ev.get("date") or ev.get("startTime")),
+            "link": ev.get("sourceUrl") or ev.get("link") or ev.get("url"),
+            "source": ev.get("source") or "CoinMarketCap",
+        })
+
+    df = pd.DataFrame(rows)
+    if not df.empty:
+        df.insert(6, "start_time_utc_ms", tzu.to_utc_ms(df["start_time_kst"]))
+    return df
+
+
 if __name__ == "__main__":
     result = crawl_cmc_events()
     print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -0,0 +1,290 @@
+import os
+import re
+import gzip
+import json
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qs
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pandas as pd
+
+import utils.db as db
+import utils.change_diff as cd
+import utils.query_api as qa
+import utils.timezones as tzu
+
+FEED_HOST = os.getenv("FEED_HOST", "0.0.0.0")
+FEED_PORT = int(os.getenv("FEED_PORT", "8080"))
+# 같은 창(window)의 피드는 이 간격 동안 미리 만든 바이트를 그대로 재사용
+FEED_REFRESH_SEC = int(os.getenv("FEED_REFRESH_SEC", "60"))
+MAX_DAYS = 90
+
+# (source, fmt, days, currencies, min_impact, tz, bucket) → {"etag", "raw", "gz", "ctype"}
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def _clear_feeds(table=None, changed=None):
+    with _feeds_lock:
+        _feeds.clear()
+
+
+# 같은 프로세스 안의 쓰기는 바로 반영. 수집(main.py)은 별도 프로세스이므로
+# get_feed 가 버킷마다 max_age=FEED_REFRESH_SEC 로 DB 를 다시 읽어 반영한다
+db.register_write_listener(_clear_feeds)
+db.register_delete_listener(_clear_feeds)
+
+
+# -------------------- 렌더링 --------------------
+
+def _rows(source: str, df: pd.DataFrame) -> list[dict]:
+    if df.empty:
+        return []
+    table, ts_col = qa.SOURCES[source][:2]
+    utc_col = tzu.UTC_MS_COLUMNS[table][0]
+    # 저장된 UTC ms 기준 (없는 행만 KST 원본에서 계산)
+    start_ms = tzu.utc_ms_of(df, table)
+    start = tzu.from_utc_ms(start_ms, "UTC")
+    out = []
+    for (_, r), s, ms in zip(df.iterrows(), start, start_ms):
+        if pd.isna(s):
+            continue
+        # GCal event id 와 같은 키 (cd.event_key_hash)
+        uid = f"{source}-{cd.event_key_hash(source, r)}"
+        if source == "crypto":
+            summary = f"{r.get('title') or ''}".strip()
+            desc = (f"{r.get('link') or ''}\n\n"
+                    f"Source: {r.get('source') or ''}\n"
+                    f"Coin: {r.get('coin_name') or ''} ({r.get('coin_symbol') or ''})")
+            url = r.get("link")
+        else:
+            summary = f"{(r.get('currency') or '').strip()} - {(r.get('title') or '').strip()}".strip()
+            desc = (f"{r.get('event_url') or ''}\n\n"
+                    f"Impact (bulls): {r.get('impact_bulls') if pd.notna(r.get('impact_bulls')) else ''}\n"
+                    f"Forecast: {r.get('forecast') or ''}\n"
+                    f"Actual: {r.get('actual') or ''}\n"
+                    f"Previous: {r.get('previous') or ''}")
+            url = r.get("event_url")
+        fields = {k: (None if pd.isna(v) else v) for k, v in r.items() if k not in (ts_col, utc_col)}
+        out.append({"uid": uid, "start_utc": s, "start_ms": int(ms), "summary": summary, "description": desc,
+                    "url": url if isinstance(url, str) else None, "fields": fields})
+    return out
+
+
+def render_json(source: str, df: pd.DataFrame, tz: str = "UTC") -> bytes:
+    """start 는 요청한 tz 의 RFC3339 (전체 행을 한 번에 변환)."""
+    rows = _rows(source, df)
+    starts = tzu.rfc3339([e["start_ms"] for e in rows], tz)
+    items = [
+        {"uid": e["uid"], "start": start, **e["fields"]}
+        for e, start in zip(rows, starts)
+    ]
+    return json.dumps({"source": source, "count": len(items), "events": items},
+                      ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _ics_escape(v: str) -> str:
+    return (v.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+             .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+
+def _ics_fold(line: str) -> str:
+    """RFC 5545: 75 octet 넘는 줄은 CRLF + 공백으로 접기."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, cur = [], b""
+    for ch in line:
+        b = ch.encode("utf-8")
+        if len(cur) + len(b) > (75 if not parts else 74):
+            parts.append(cur.decode("utf-8"))
+            cur = b""
+        cur += b
+    parts.append(cur.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+
+def render_ics(source: str, df: pd.DataFrame) -> bytes:
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//economic-calendar//feed//EN",
+        f"X-WR-CALNAME:{source} calendar",
+        "CALSCALE:GREGORIAN",
+    ]
+    for e in _rows(source, df):
+        start = e["start_utc"]
+        end = start + pd.Timedelta(hours=1)
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{e['uid']}@economic-calendar",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{start.strftime('%Y%m%dT%H%M%SZ')}",
+            f"DTEND:{end.strftime('%Y%m%dT%H%M%SZ')}",
+            f"SUMMARY:{_ics_escape(e['summary'][:300])}",
+            f"DESCRIPTION:{_ics_escape(e['description'][:8000])}",
+        ]
+        if e["url"]:
+            lines.append(f"URL:{e['url']}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_ics_fold(l) for l in lines) + "\r\n").encode("utf-8")
+
+
+# -------------------- 피드 캐시 --------------------
+
+def _parse_feed_path(path: str, query: dict):
+    """'/economic.json?currency=USD,EUR&min_impact=2&days=14&tz=America/New_York' → 피드 키."""
+    name = path.strip("/")
+    if "." not in name:
+        return None
+    source, fmt = name.rsplit(".", 1)
+    if source not in qa.SOURCES or fmt not in ("json", "ics"):
+        return None
+    days = max(1, min(MAX_DAYS, int(query.get("days", ["7"])[0])))
+    filt = query.get("currency") or query.get("coin") or []
+    currencies = tuple(sorted({c.strip().upper() for v in filt for c in v.split(",") if c.strip()}))
+    min_impact = int(query["min_impact"][0]) if query.get("min_impact") else None
+    # JSON 의 start 표시 시간대 (ICS 는 항상 UTC 'Z')
+    tz = query.get("tz", ["UTC"])[0] if fmt == "json" else "UTC"
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"알 수 없는 tz: {tz}")
+    return source, fmt, days, currencies or None, min_impact, tz
+
+
+def get_feed(source: str, fmt: str, days: int, currencies, min_impact, tz: str = "UTC") -> dict:
+    """
+    창(window) 단위로 미리 만든 피드 (raw + gzip + ETag).
+    같은 FEED_REFRESH_SEC 구간 안의 요청은 모두 같은 바이트를 공유한다.
+    새 구간에서는 FEED_REFRESH_SEC 보다 오래된 메모리 인덱스를 쓰지 않으므로
+    다른 프로세스의 수집/수정도 최대 두 구간 안에 피드와 ETag 에 반영된다.
+    """
+    now = pd.Timestamp.now(tz="Asia/Seoul").tz_localize(None)
+    bucket = int(now.timestamp()) // FEED_REFRESH_SEC
+    key = (source, fmt, days, currencies, min_impact, tz, bucket)
+    with _feeds_lock:
+        feed = _feeds.get(key)
+    if feed:
+        return feed
+
+    start = now.floor("min")
+    df = qa.get_events(source, start, start + pd.Timedelta(days=days),
+                       currencies=list(currencies) if currencies else None, min_impact=min_impact,
+                       max_age=FEED_REFRESH_SEC)
+    if source == "crypto" and not df.empty:
+        # GCal 과 같이 소스 간 중복 클러스터의 대표만 내보낸다
+        df = df[~df["id"].astype(str).isin(db.non_primary_crypto_ids(df["id"]))]
+    raw = render_json(source, df, tz) if fmt == "json" else render_ics(source, df)
+    feed = {
+        # 내용 기반 ETag: 창이 바뀌어도 데이터가 같으면 304 유지 (렌더 시각 DTSTAMP는 제외)
+        "etag": '"' + hashlib.sha1(re.sub(rb"DTSTAMP:[0-9TZ]+", b"", raw)).hexdigest() + '"',
+        "raw": raw,
+        "gz": gzip.compress(raw, compresslevel=6),
+        "ctype": "application/json; charset=utf-8" if fmt == "json" else "text/calendar; charset=utf-8",
+    }
+    with _feeds_lock:
+        # 이전 버킷은 버림
+        for k in [k for k in _feeds if k[:6] == key[:6]]:
+            del _feeds[k]
+        _feeds[key] = feed
+    return feed
+
+
+# -------------------- HTTP --------------------
+
+def _response(status: str, headers: dict, body: bytes = b"") -> bytes:
+    head = [f"HTTP/1.1 {status}"] + [f"{k}: {v}" for k, v in headers.items()]
+    head.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode("latin-1").split(" ", 2)
+            version = version.strip().upper()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                k, _, v = line.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+
+            # HTTP/1.1 은 기본 keep-alive, HTTP/1.0 은 Connection: keep-alive 일 때만
+            conn_opts = {t.strip().lower() for t in headers.get("connection", "").split(",")}
+            if version == "HTTP/1.1":
+                keep_alive = "close" not in conn_opts
+            else:
+                keep_alive = version == "HTTP/1.0" and "keep-alive" in conn_opts
+            conn_hdr = {"Connection": "keep-alive" if keep_alive else "close"}
+            url = urlsplit(target)
+            try:
+                key = _parse_feed_path(url.path, parse_qs(url.query)) if method in ("GET", "HEAD") else None
+            except ValueError:
+                key = None
+
+            feed = None
+            if key is not None:
+                try:
+                    feed = await asyncio.to_thread(get_feed, *key)
+                except Exception as e:
+                    # DB 오류 등: 소켓을 그냥 닫지 않고 500 으로 응답
+                    print(f"[feed] 피드 생성 실패 {key}: {e!r}")
+            if key is None:
+                writer.write(_response("404 Not Found", {"Content-Type": "text/plain", **conn_hdr}, b"not found\n"))
+            elif feed is None:
+                writer.write(_response("500 Internal Server Error", {"Content-Type": "text/plain", **conn_hdr},
+                                       b"internal server error\n"))
+            else:
+                common = {
+                    **conn_hdr,
+                    "ETag": feed["etag"],
+                    "Cache-Control": f"public, max-age={FEED_REFRESH_SEC}",
+                    "Vary": "Accept-Encoding",
+                }
+                if feed["etag"] in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+                    writer.write(_response("304 Not Modified", common))
+                else:
+                    use_gz = "gzip" in headers.get("accept-encoding", "")
+                    body = feed["gz"] if use_gz else feed["raw"]
+                    hdrs = {**common, "Content-Type": feed["ctype"]}
+                    if use_gz:
+                        hdrs["Content-Encoding"] = "gzip"
+                    resp = _response("200 OK", hdrs, body)
+                    if method == "HEAD":
+                        resp = resp[: len(resp) - len(body)]
+                    writer.write(resp)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError) as e:
+        print(f"[feed] 요청 처리 실패: {e}")
+    finally:
+        writer.close()
+
+
+async def serve(host: str = FEED_HOST, port: int = FEED_PORT):
+    """
+    JSON / ICS 피드 서버.
+      GET /crypto.json|ics?coin=BTC,ETH&days=7
+      GET /economic.json|ics?currency=USD&min_impact=2&days=14
+      GET /economic.json?tz=Europe/London   (JSON start 표시 시간대, 기본 UTC)
+    """
+    server = await asyncio.start_server(_handle, host, port)
+    print(f"[feed] http://{host}:{port} 에서 서비스 시작")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
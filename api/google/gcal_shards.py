@@ -0,0 +1,363 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from google.oauth2 import service_account
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from api.google import google_calendar as gc
+
+# 서비스계정 키 풀: 쉼표로 구분된 JSON 경로 목록 (없으면 기본 키 1개)
+# 예: GOOGLE_SERVICE_ACCOUNT_FILES=/keys/sa1.json,/keys/sa2.json,/keys/sa3.json
+SERVICE_ACCOUNT_FILES = [
+    f.strip() for f in os.getenv("GOOGLE_SERVICE_ACCOUNT_FILES", gc.SERVICE_ACCOUNT_FILE).split(",") if f.strip()
+]
+
+# 캘린더 라우팅 규칙 (JSON). 위에서부터 처음 맞는 규칙의 calendar_id 로 보낸다.
+# 예: GOOGLE_CALENDAR_ROUTES='{
+#   "crypto":   [{"match": {"coin_symbol": ["BTC", "ETH"]}, "calendar_id": "majors@group.calendar.google.com"}],
+#   "economic": [{"match": {"currency": ["USD"], "min_impact": 3}, "calendar_id": "usd-high@group.calendar.google.com"},
+#                {"match": {"min_impact": 2}, "calendar_id": "mid@group.calendar.google.com"}]
+# }'
+# 맞는 규칙이 없으면 GOOGLE_CALENDAR_CRYPTO_ID / GOOGLE_CALENDAR_ECONOMIC_ID 로 보낸다.
+ROUTES = json.loads(os.getenv("GOOGLE_CALENDAR_ROUTES", "{}") or "{}")
+
+# 쿼터 (Calendar API 쓰기 한도 근사치; 환경에 맞게 조정)
+CALENDAR_QPS = float(os.getenv("GCAL_CALENDAR_QPS", "5"))
+ACCOUNT_QPS = float(os.getenv("GCAL_ACCOUNT_QPS", "10"))
+MAX_RETRIES = int(os.getenv("GCAL_MAX_RETRIES", "5"))
+# batch 요청 1회에 묶을 최대 하위 요청 수 (Calendar API 권장 50)
+BATCH_LIMIT = 50
+
+# gc.gcal_event_id 로 만든 id. 이 외의 id 는 결정적 id 도입 전 인라인 push 가 만든 이벤트이거나
+# 사람이 직접 만든 이벤트다.
+OWN_EVENT_ID = re.compile(r"^[0-9a-f]{32}$")
+# 예전 push_*_events_to_gcal 가 붙이던 제목 접두어 (range / patch 버전은 접두어 없음)
+LEGACY_SUMMARY_PREFIXES = ("", "[Crypto] ", "[Economic] ")
+
+
+def legacy_keys(summary: str, start: pd.Timestamp) -> list[tuple]:
+    """결정적 id 이벤트 (제목, 시작) → 예전 인라인 push 가 같은 행으로 만들었을 (제목, 시작 ms) 목록."""
+    return [(p + summary, start.value // 10**6) for p in LEGACY_SUMMARY_PREFIXES]
+
+
+def legacy_key(ev: dict) -> tuple | None:
+    """GCal 이벤트가 결정적 id 가 아니면 (제목, 시작 ms), 맞으면 None."""
+    ev_start = (ev.get("start") or {}).get("dateTime")
+    if OWN_EVENT_ID.match(ev.get("id", "")) or not ev_start:
+        return None
+    return ev.get("summary"), pd.Timestamp(ev_start).value // 10**6
+
+
+class QuotaTracker:
+    """
+    토큰 버킷. acquire()는 토큰이 생길 때까지 대기.
+    429/403(rateLimitExceeded)을 받으면 penalize()로 잠시 버킷을 비운다.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.blocked_until or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            self.used += 1
+            return True
+
+    def refund(self):
+        """try_acquire 로 잡았지만 쓰지 않은 토큰을 돌려준다."""
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+            self.used -= 1
+
+    def penalize(self, seconds: float):
+        with self.lock:
+            self.tokens = 0
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ShardedPublisher:
+    """
+    (캘린더 × 서비스계정) 샤드로 GCal 쓰기를 분산.
+    - 캘린더마다, 계정마다 QuotaTracker 를 두고
+    - 쓰기 1건마다 해당 캘린더 토큰 + 가장 여유 있는 계정 토큰을 잡아 실행
+    - googleapiclient 객체는 스레드 안전하지 않아서 스레드별로 service 를 만든다
+    """
+
+    def __init__(self, key_files: list[str] | None = None, routes: dict | None = None):
+        self.key_files = key_files or SERVICE_ACCOUNT_FILES
+        self.routes = ROUTES if routes is None else routes
+        self.credentials = [
+            service_account.Credentials.from_service_account_file(f, scopes=gc.SCOPES)
+            for f in self.key_files
+        ]
+        self.account_quota = [QuotaTracker(ACCOUNT_QPS) for _ in self.credentials]
+        self.calendar_quota = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # ---------- 라우팅 ----------
+    def route(self, source: str, row) -> str:
+        for rule in self.routes.get(source, []):
+            match = rule.get("match", {})
+            ok = True
+            for col, allowed in match.items():
+                if col == "min_impact":
+                    v = row.get("impact_bulls")
+                    ok = pd.notna(v) and int(v) >= int(allowed)
+                elif col == "categories":
+                    cats = {c.strip().lower() for c in str(row.get("categories") or "").split(",")}
+                    ok = bool(cats & {a.lower() for a in allowed})
+                else:
+                    ok = str(row.get(col) or "").upper() in {str(a).upper() for a in allowed}
+                if not ok:
+                    break
+            if ok:
+                return rule["calendar_id"]
+        return gc.CRYPTO_CALENDAR_ID if source == "crypto" else gc.ECONOMIC_CALENDAR_ID
+
+    # ---------- 쿼터 ----------
+    def _calendar_bucket(self, calendar_id: str) -> QuotaTracker:
+        with self._lock:
+            if calendar_id not in self.calendar_quota:
+                self.calendar_quota[calendar_id] = QuotaTracker(CALENDAR_QPS)
+            return self.calendar_quota[calendar_id]
+
+    def _acquire(self, calendar_id: str, account: int | None = None) -> int:
+        """
+        캘린더 토큰 → 계정 토큰 순서로 확보하고 계정 index 반환 (account 를 주면 그 계정 토큰만).
+        계정 토큰을 못 잡으면 캘린더 토큰을 돌려주고 다시 대기 (요청 없이 쿼터를 태우지 않도록).
+        """
+        cal_q = self._calendar_bucket(calendar_id)
+        while True:
+            if not cal_q.try_acquire():
+                time.sleep(max(0.01, cal_q.wait_time()))
+                continue
+            # 대기 시간이 가장 짧은 계정부터 시도
+            order = [account] if account is not None else \
+                sorted(range(len(self.account_quota)), key=lambda i: self.account_quota[i].wait_time())
+            for i in order:
+                if self.account_quota[i].try_acquire():
+                    return i
+            cal_q.refund()
+            time.sleep(max(0.01, self.account_quota[order[0]].wait_time()))
+
+    def _service(self, account: int):
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        if account not in services:
+            services[account] = build("calendar", "v3", credentials=self.credentials[account],
+                                      cache_discovery=False)
+        return services[account]
+
+    # ---------- 쓰기 ----------
+    def upsert(self, calendar_id: str, event_id: str, body: dict) -> str:
+        """
+        결정적 id 로 insert, 이미 있으면(409) update.
+        (결정적 id 도입 전 인라인 push 가 무작위 id 로 만든 사본은 reconcile 의 --legacy-only 로 한 번 정리)
+        반환: "created" | "updated"
+        """
+        body = {**body, "id": event_id}
+        for attempt in range(MAX_RETRIES):
+            account = self._acquire(calendar_id)
+            events = self._service(account).events()
+            try:
+                try:
+                    events.insert(calendarId=calendar_id, body=body).execute()
+                    return "created"
+                except HttpError as e:
+                    if e.resp.status != 409:
+                        raise
+                account = self._acquire(calendar_id)
+                self._service(account).events().update(
+                    calendarId=calendar_id, eventId=event_id, body=body
+                ).execute()
+                return "updated"
+            except HttpError as e:
+                status = e.resp.status
+                if status in (403, 429) or status >= 500:
+                    backoff = min(60, (2 ** attempt) + random.random())
+                    # 어느 쪽 한도인지 응답만으로는 알 수 없으므로 둘 다 잠시 쉼
+                    self._calendar_bucket(calendar_id).penalize(backoff)
+                    self.account_quota[account].penalize(backoff)
+                    continue
+                raise
+        raise RuntimeError(f"재시도 초과: {calendar_id} / {event_id}")
+
+    def delete(self, calendar_id: str, event_id: str) -> bool:
+        """결정적 id 이벤트 삭제. 이미 없으면(404/410) False."""
+        for attempt in range(MAX_RETRIES):
+            account = self._acquire(calendar_id)
+            try:
+                self._service(account).events().delete(calendarId=calendar_id, eventId=event_id).execute()
+                return True
+            except HttpError as e:
+                status = e.resp.status
+                if status in (404, 410):
+                    return False
+                if status in (403, 429) or status >= 500:
+                    backoff = min(60, (2 ** attempt) + random.random())
+                    self._calendar_bucket(calendar_id).penalize(backoff)
+                    self.account_quota[account].penalize(backoff)
+                    continue
+                raise
+        raise RuntimeError(f"재시도 초과: {calendar_id} / {event_id}")
+
+    def drop_elsewhere(self, source: str, calendar_id: str, event_id: str) -> int:
+        """
+        라우팅이 바뀐 이벤트: calendar_id 외의 라우팅 가능한 캘린더에 남은 같은 id 를 지운다.
+        반환: 삭제된 수
+        """
+        return sum(self.delete(c, event_id) for c in self.calendars(source) if c != calendar_id)
+
+    def calendars(self, source: str) -> list[str]:
+        """source 가 라우팅될 수 있는 모든 calendar_id (기본 캘린더 포함)."""
+        default = gc.CRYPTO_CALENDAR_ID if source == "crypto" else gc.ECONOMIC_CALENDAR_ID
+        ids = [rule["calendar_id"] for rule in self.routes.get(source, [])] + [default]
+        return [c for c in dict.fromkeys(ids) if c]
+
+    def list_events(self, calendar_id: str, time_min: str, time_max: str) -> list[dict]:
+        """[time_min, time_max) 와 겹치는 이벤트의 id/summary/start 목록 (페이지당 2500건)."""
+        items, page_token = [], None
+        while True:
+            account = self._acquire(calendar_id)
+            resp = self._service(account).events().list(
+                calendarId=calendar_id, timeMin=time_min, timeMax=time_max,
+                singleEvents=True, showDeleted=False, maxResults=2500,
+                fields="items(id,summary,start),nextPageToken", pageToken=page_token,
+            ).execute()
+            items.extend(resp.get("items", []))
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                return items
+
+    def batch_delete(self, calendar_id: str, event_ids: list[str]) -> int:
+        """
+        BATCH_LIMIT 개씩 batch 요청으로 삭제 (HTTP 왕복 ≈ n / 50).
+        쿼터는 하위 요청 수만큼 잡고, 한도 초과로 실패한 건은 delete() 로 개별 재시도.
+        반환: 삭제된 수 (이미 없던 이벤트 제외)
+        """
+        deleted = 0
+        for i in range(0, len(event_ids), BATCH_LIMIT):
+            chunk = event_ids[i:i + BATCH_LIMIT]
+            # batch 는 보내는 계정 하나에 하위 요청 수만큼 과금되므로 토큰도 그 계정에서만 잡는다
+            account = self._acquire(calendar_id)
+            for _ in chunk[1:]:
+                self._acquire(calendar_id, account)
+            service = self._service(account)
+            retry = []
+
+            def callback(request_id, response, exception):
+                nonlocal deleted
+                if exception is None:
+                    deleted += 1
+                elif isinstance(exception, HttpError) and exception.resp.status in (404, 410):
+                    pass
+                elif isinstance(exception, HttpError) and (exception.resp.status in (403, 429)
+                                                           or exception.resp.status >= 500):
+                    retry.append(request_id)
+                else:
+                    print(f"[gcal] 삭제 실패: {calendar_id} / {request_id} -> {exception}")
+
+            batch = service.new_batch_http_request(callback=callback)
+            for event_id in chunk:
+                batch.add(service.events().delete(calendarId=calendar_id, eventId=event_id), request_id=event_id)
+            batch.execute()
+            deleted += sum(self.delete(calendar_id, event_id) for event_id in retry)
+        return deleted
+
+    def _upsert_routed(self, source: str, calendar_id: str, event_id: str, body: dict, relocate: bool) -> str:
+        result = self.upsert(calendar_id, event_id, body)
+        # 이미 있던 이벤트가 새 캘린더에 created 됐다면 라우팅이 바뀐 것 → 예전 캘린더의 사본 삭제
+        if relocate and result == "created":
+            self.drop_elsewhere(source, calendar_id, event_id)
+        return result
+
+    def publish(self, source: str, df: pd.DataFrame, max_workers: int | None = None,
+                relocate: bool = False) -> dict:
+        """
+        DataFrame 행들을 라우팅 → 샤드별 동시 쓰기.
+        - relocate=True: 이미 발행된 행을 다시 올릴 때 (라우팅 규칙/행 값 변경 후),
+          새 캘린더에 만들어진 이벤트는 다른 캘린더의 같은 id 를 지운다
+        반환: {"created": n, "updated": n, "failed": n, "by_calendar": {calendar_id: n}}
+        """
+        builder = gc.build_crypto_event_body if source == "crypto" else gc.build_economic_event_body
+        df = gc.with_time_fields(df, source)
+        jobs = []
+        for _, row in df.iterrows():
+            body, start_iso = builder(row)
+            if not start_iso:
+                continue
+            jobs.append((self.route(source, row), gc.gcal_event_id(source, row), body))
+
+        stats = {"created": 0, "updated": 0, "failed": 0, "by_calendar": {}}
+        if not jobs:
+            return stats
+        n_calendars = len({j[0] for j in jobs})
+        max_workers = max_workers or min(32, 2 * n_calendars * len(self.credentials))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futs = {pool.submit(self._upsert_routed, source, *job, relocate): job for job in jobs}
+            for fut in as_completed(futs):
+                calendar_id, event_id, body = futs[fut]
+                try:
+                    stats[fut.result()] += 1
+                    stats["by_calendar"][calendar_id] = stats["by_calendar"].get(calendar_id, 0) + 1
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[{source}] 생성 실패: {body.get('summary')} -> {e}")
+
+        print(f"[{source}] 샤드 발행 완료: {stats}")
+        return stats
+
+
+def publish_range(source: str, start, end, publisher: ShardedPublisher | None = None,
+                  relocate: bool = False) -> dict:
+    """
+    [start, end) 구간을 샤드 발행 (결정적 id upsert 라 다시 돌려도 중복이 생기지 않음).
+    - start/end: 'YYYY-MM-DD' 또는 datetime (KST 기준)
+    - relocate: ShardedPublisher.publish 참고 (라우팅 규칙을 바꾼 뒤 재발행할 때)
+    """
+    start_ts, end_ts = gc._to_ts(start), gc._to_ts(end)
+    if not start_ts or not end_ts:
+        raise ValueError("start/end를 확인하세요.")
+    df = gc.read_crypto_range(start_ts, end_ts) if source == "crypto" else gc.read_economic_range(start_ts, end_ts)
+    if df.empty:
+        print(f"[{source}] 기간 내 데이터 없음: {start_ts} ~ {end_ts}")
+        return {"created": 0, "updated": 0, "failed": 0, "by_calendar": {}}
+    return (publisher or ShardedPublisher()).publish(source, df, relocate=relocate)
+
+
+if __name__ == "__main__":
+    pub = ShardedPublisher()
+    publish_range("crypto", "2025-01-01", "2026-01-01", pub)
+    publish_range("economic", "2025-01-01", "2026-01-01", pub)
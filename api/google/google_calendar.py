@@ -1,18 +1,20 @@
 # pip install google-api-python-client google-auth google-auth-httplib2 google-auth-oauthlib
-# pip install sqlalchemy pymysql pandas python-dotenv pytz
+# pip install sqlalchemy pymysql pandas python-dotenv
 
 import os, json
 import pandas as pd
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
 from dotenv import load_dotenv
 from pathlib import Path
 from datetime import timedelta
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-import pytz
 from datetime import datetime, timedelta
 from sqlalchemy import text
 
+import utils.timezones as tzu
+import utils.change_diff as cd
+
 
 # -------------------- .env & DB --------------------
 load_dotenv()
@@ -65,46 +67,78 @@ credentials = service_account.Credentials.from_service_account_file(
 # -----------UTILS-----------------
 service = build("calendar", "v3", credentials=credentials)
 
-KST = pytz.timezone("Asia/Seoul")
+# GCal 이벤트 표시 시간대 (DB 의 UTC ms 에서 한 번에 변환)
+GCAL_TIMEZONE = os.getenv("GOOGLE_CALENDAR_TIMEZONE", tzu.CANONICAL_TZ)
+
+# source → (테이블, 시작 컬럼, 종료 컬럼)
+_TIME_COLS = {
+    "crypto": ("crypto_calendar", "start_time_kst", "end_time_kst"),
+    "economic": ("economic_calendar", "datetime", "end_datetime"),
+}
 
 def _to_kst_aware(dt_like) -> str:
     """
     DB 'start_time_kst'가 문자열/naive인 경우 KST로 tz-aware 변환 후 RFC3339 문자열 반환.
     """
-    if pd.isna(dt_like):
-        return None
-    dt = pd.to_datetime(dt_like)
-    # 만약 이미 tz-aware면 그대로, 아니면 KST로 로컬라이즈
-    if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
-        dt = KST.localize(dt)
-    return dt.isoformat()
+    ts = _to_ts(dt_like)
+    return ts.isoformat() if ts is not None else None
 
 
-KST = pytz.timezone("Asia/Seoul")
-
 def _to_ts(v):  # str/datetime → pandas.Timestamp (tz-aware KST)
-    if v is None or v == "":
+    if v is None or v == "" or (not isinstance(v, str) and pd.isna(v)):
         return None
-    ts = pd.to_datetime(v)
-    if ts.tzinfo is None or ts.tzinfo.utcoffset(ts) is None:
-        ts = KST.localize(ts)
+    ts = pd.Timestamp(v)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize(tzu.CANONICAL_TZ)
     return ts
 
-def _build_time_fields(row, start_key, end_key=None, tz="Asia/Seoul", fallback_hours=1):
+
+def _is_date_only(s):
+    return isinstance(s, str) and len(s) == 10  # 'YYYY-MM-DD'
+
+
+def with_time_fields(df: pd.DataFrame, source: str, tz: str = GCAL_TIMEZONE, fallback_hours=1) -> pd.DataFrame:
+    """
+    GCal 시작/종료 RFC3339 문자열(_start_rfc3339/_end_rfc3339)을 열 단위로 한 번에 계산해 붙인다.
+    UTC ms 컬럼이 있으면 그대로 쓰고, 없는 행만 원본 컬럼(KST)에서 계산.
+    날짜만 있는 행은 비워 두고 _build_time_fields 가 종일 이벤트로 처리한다.
+    """
+    if df.empty:
+        return df
+    table, start_key, end_key = _TIME_COLS[source]
+    start_ms = tzu.utc_ms_of(df, table)
+    end_ms = start_ms + fallback_hours * 3_600_000
+    if end_key in df.columns:
+        end_ms = tzu.to_utc_ms(df[end_key]).fillna(end_ms)
+    date_only = (df[start_key].map(_is_date_only).astype(bool) if start_key in df.columns
+                 else pd.Series(False, index=df.index))
+    return df.assign(
+        _start_rfc3339=tzu.rfc3339(start_ms, tz).mask(date_only, None),
+        _end_rfc3339=tzu.rfc3339(end_ms, tz).mask(date_only, None),
+        _tz=tz,
+    )
+
+
+def _build_time_fields(row, start_key, end_key=None, tz=GCAL_TIMEZONE, fallback_hours=1):
     """row에서 시작/종료 시각을 읽어 GCal payload(start/end dict)와 iso 시각(중복체크용) 생성."""
+    # with_time_fields 로 미리 변환된 행은 문자열만 꺼내 쓴다
+    pre_start, pre_end = row.get("_start_rfc3339"), row.get("_end_rfc3339")
+    if isinstance(pre_start, str) and isinstance(pre_end, str):
+        tz = row.get("_tz") or tz
+        return {"dateTime": pre_start, "timeZone": tz}, {"dateTime": pre_end, "timeZone": tz}, pre_start, pre_end
+
     def _parse(v):
-        if pd.isna(v) or v is None or v == "":
+        if v is None or v == "" or (not isinstance(v, str) and pd.isna(v)):
             return None
         return pd.to_datetime(v)
 
     start_dt = _parse(row.get(start_key))
     end_dt   = _parse(row.get(end_key)) if end_key else None
 
-    tzinfo = pytz.timezone(tz)
     def _ensure_tz(dt):
-        if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
-            return tzinfo.localize(dt)
-        return dt
+        if dt.tzinfo is None:
+            dt = dt.tz_localize(tzu.CANONICAL_TZ)
+        return dt.tz_convert(tz)
 
     if start_dt is None:
         return None, None, None, None
@@ -113,14 +147,11 @@ def _build_time_fields(row, start_key, end_key=None, tz="Asia/Seoul", fallback_h
         end_dt = start_dt + timedelta(hours=fallback_hours)
 
     # 날짜만 들어온 케이스는 date 이벤트로 처리
-    def _is_date_only(s):
-        return isinstance(s, str) and len(s) == 10  # 'YYYY-MM-DD'
-
     if _is_date_only(str(row.get(start_key))) and (end_key and _is_date_only(str(row.get(end_key)))):
         start_date = pd.to_datetime(row.get(start_key)).date()
         end_date   = (pd.to_datetime(row.get(end_key)) + pd.Timedelta(days=1)).date()
-        start_iso_dt = tzinfo.localize(pd.Timestamp(start_date).to_pydatetime()).isoformat()
-        end_iso_dt   = tzinfo.localize(pd.Timestamp(end_date).to_pydatetime()).isoformat()
+        start_iso_dt = pd.Timestamp(start_date).tz_localize(tz).isoformat()
+        end_iso_dt   = pd.Timestamp(end_date).tz_localize(tz).isoformat()
         return {"date": start_date.isoformat()}, {"date": end_date.isoformat()}, start_iso_dt, end_iso_dt
 
     start_dt = _ensure_tz(start_dt)
@@ -132,262 +163,102 @@ def _build_time_fields(row, start_key, end_key=None, tz="Asia/Seoul", fallback_h
         end_dt.isoformat()
     )
 
-# ------------------ Push to GCal -------------------
+def _economic_description(row) -> str:
+    """economic 이벤트 GCal description 본문."""
+    return (
+        f"{row.get('event_url') or ''}\n\n"
+        f"Impact (bulls): {row.get('impact_bulls') if pd.notna(row.get('impact_bulls')) else ''}\n"
+        f"Forecast: {row.get('forecast') or ''}\n"
+        f"Actual: {row.get('actual') or ''}\n"
+        f"Previous: {row.get('previous') or ''}"
+    )
 
-def push_crypto_events_to_gcal():
-    """
-    crypto_calendar 테이블의 이벤트를 Google Calendar로 생성.
-    - 중복 방지: 같은 제목 & 같은 시작 시각을 1분 창으로 조회해 있으면 skip
-    """
-    # 캘린더 ID 미설정 방지
-    if CRYPTO_CALENDAR_ID.startswith("REPLACE_ME"):
-        raise RuntimeError("환경변수 GOOGLE_CALENDAR_ID를 공유 캘린더 ID로 설정하세요.")
+def build_crypto_event_body(row):
+    """crypto_calendar 행 → (GCal event body, 시작 iso). 시각이 없으면 (None, None)."""
+    start_dict, end_dict, start_iso, _ = _build_time_fields(
+        row, start_key="start_time_kst", end_key="end_time_kst", tz=GCAL_TIMEZONE, fallback_hours=1
+    )
+    if not start_iso:
+        return None, None
 
-    with engine.begin() as conn:
-        df = pd.read_sql("SELECT * FROM crypto_calendar", conn)
+    summary = f"{row.get('title') or ''}".strip()
+    description = f"{row.get('link') or ''}\n\n" \
+                  f"Source: {row.get('source') or ''}\n" \
+                  f"Coin: {row.get('coin_name') or ''} ({row.get('coin_symbol') or ''})"
 
-    if df.empty:
-        print("[crypto] DB에 데이터가 없습니다.")
-        return
-
-    for _, row in df.iterrows():
-        start_iso = _to_kst_aware(row.get("start_time_kst"))
-        if not start_iso:
-            continue
-
-        # 기본 1시간 이벤트
-        # iso → pandas → timedelta → 다시 iso (tz 유지)
-        start_dt = pd.to_datetime(start_iso)
-        end_dt = start_dt + timedelta(hours=1)
-        end_iso = end_dt.isoformat()
-
-        summary = f"[Crypto] {row.get('title') or ''}".strip()
-        description = f"{row.get('link') or ''}\n\n" \
-                      f"Source: {row.get('source') or ''}\n" \
-                      f"Coin: {row.get('coin_name') or ''} ({row.get('coin_symbol') or ''})"
-
-        event_body = {
-            "summary": summary[:300],  # 너무 길면 잘라주기
-            "description": description[:8000],
-            "start": {"dateTime": start_iso, "timeZone": "Asia/Seoul"},
-            "end":   {"dateTime": end_iso,   "timeZone": "Asia/Seoul"},
-        }
-
-        # 중복 체크(1분 창)
-        try:
-            dup = service.events().list(
-                calendarId=CRYPTO_CALENDAR_ID,
-                timeMin=start_iso,
-                timeMax=(start_dt + timedelta(minutes=1)).isoformat(),
-                q=row.get("title") or ""
-            ).execute()
-            if dup.get("items"):
-                print(f"[crypto] 이미 존재: {summary} @ {start_iso}")
-                continue
-        except Exception as e:
-            print(f"[crypto] 중복 조회 실패: {e}. 계속 진행합니다.")
-
-        # 생성
-        try:
-            created = service.events().insert(calendarId=CRYPTO_CALENDAR_ID, body=event_body).execute()
-            print(f"[crypto] 등록됨: {created.get('htmlLink')}")
-        except Exception as e:
-            print(f"[crypto] 생성 실패: {summary} @ {start_iso}\n  -> {e}")
-
-
-def push_economic_events_to_gcal():
-    """
-    economic_calendar 테이블의 이벤트를 Google Calendar로 생성.
-    - 중복 방지: 같은 제목 & 같은 시작 시각을 1분 창으로 조회해 있으면 skip
-    """
-    if ECONOMIC_CALENDAR_ID.startswith("REPLACE_ME") or not ECONOMIC_CALENDAR_ID:
-        raise RuntimeError("환경변수 GOOGLE_CALENDAR_ID를 공유 캘린더 ID로 설정하세요.")
+    body = {"summary": summary[:300], "description": description[:8000], "start": start_dict, "end": end_dict}
+    if pd.notna(row.get("cluster_id")):
+        body["extendedProperties"] = {"private": {"cluster_id": row.get("cluster_id")}}
+    return body, start_iso
 
-    with engine.begin() as conn:
-        df = pd.read_sql("SELECT * FROM economic_calendar", conn)
 
-    if df.empty:
-        print("[economic] DB에 데이터가 없습니다.")
-        return
-
-    for _, row in df.iterrows():
-        # economic_calendar에는 'datetime' 컬럼을 사용
-        # _to_kst_aware가 프로젝트에 이미 있다면 그대로 사용합니다.
-        # 없으면 pd.to_datetime(row['datetime'])로 대체하세요.
-        start_iso = _to_kst_aware(row.get("datetime"))
-        if not start_iso:
-            continue
-
-        start_dt = pd.to_datetime(start_iso)
-        end_dt = start_dt + timedelta(hours=1)  # 기본 1시간
-        end_iso = end_dt.isoformat()
-
-        currency = (row.get("currency") or "").strip()
-        title    = (row.get("title") or "").strip()
-
-        summary = f"[Economic] {currency} - {title}".strip()
-        description = (
-            f"{row.get('event_url') or ''}\n\n"
-            f"Impact (bulls): {row.get('impact_bulls') if pd.notna(row.get('impact_bulls')) else ''}\n"
-            f"Forecast: {row.get('forecast') or ''}\n"
-            f"Actual: {row.get('actual') or ''}\n"
-            f"Previous: {row.get('previous') or ''}"
-        )
-
-        event_body = {
-            "summary": summary[:300],
-            "description": description[:8000],
-            "start": {"dateTime": start_iso, "timeZone": "Asia/Seoul"},
-            "end":   {"dateTime": end_iso,   "timeZone": "Asia/Seoul"},
-        }
-
-        # 중복 체크(1분 창)
-        try:
-            dup = service.events().list(
-                calendarId=ECONOMIC_CALENDAR_ID,
-                timeMin=start_iso,
-                timeMax=(start_dt + timedelta(minutes=1)).isoformat(),
-                q=title or ""
-            ).execute()
-            if dup.get("items"):
-                print(f"[economic] 이미 존재: {summary} @ {start_iso}")
-                continue
-        except Exception as e:
-            print(f"[economic] 중복 조회 실패: {e}. 계속 진행합니다.")
-
-        # 생성
-        try:
-            created = service.events().insert(calendarId=ECONOMIC_CALENDAR_ID, body=event_body).execute()
-            print(f"[economic] 등록됨: {created.get('htmlLink')}")
-        except Exception as e:
-            print(f"[economic] 생성 실패: {summary} @ {start_iso}\n  -> {e}")
-
-
-def push_crypto_events_to_gcal_range(start, end):
-    """
-    [start, end) 구간의 crypto_calendar 만 Google Calendar로 생성
-    - start/end: 'YYYY-MM-DD' 또는 datetime 가능 (KST 기준)
-    """
-    if CRYPTO_CALENDAR_ID.startswith("REPLACE_ME"):
-        raise RuntimeError("GOOGLE_CALENDAR_CRYPTO_ID를 제대로 설정하세요.")
+def build_economic_event_body(row):
+    """economic_calendar 행 → (GCal event body, 시작 iso). 시각이 없으면 (None, None)."""
+    start_dict, end_dict, start_iso, _ = _build_time_fields(
+        row, start_key="datetime", end_key="end_datetime", tz=GCAL_TIMEZONE, fallback_hours=1
+    )
+    if not start_iso:
+        return None, None
 
-    start_ts = _to_ts(start)
-    end_ts   = _to_ts(end)
-    if not start_ts or not end_ts:
-        raise ValueError("start/end를 확인하세요.")
+    currency = (row.get("currency") or "").strip()
+    title    = (row.get("title") or "").strip()
+    summary = f"{currency} - {title}".strip()
+    description = _economic_description(row)
 
-    # DB에서 범위로 바로 필터 (성능 ↑)
-    sql = text("""
-        SELECT * FROM crypto_calendar
-        WHERE start_time_kst >= :s AND start_time_kst < :e
-        ORDER BY start_time_kst
-    """)
-    with engine.begin() as conn:
-        df = pd.read_sql(sql, conn, params={"s": start_ts.tz_convert(None), "e": end_ts.tz_convert(None)})
+    body = {"summary": summary[:300], "description": description[:8000], "start": start_dict, "end": end_dict}
+    return body, start_iso
 
-    if df.empty:
-        print(f"[crypto] 기간 내 데이터 없음: {start_ts} ~ {end_ts}")
-        return
-
-    for _, row in df.iterrows():
-        start_dict, end_dict, start_iso, _ = _build_time_fields(
-            row, start_key="start_time_kst", end_key="end_time_kst", tz="Asia/Seoul", fallback_hours=1
-        )
-        if not start_iso:
-            continue
-
-        summary = f"{row.get('title') or ''}".strip()
-        description = f"{row.get('link') or ''}\n\n" \
-                      f"Source: {row.get('source') or ''}\n" \
-                      f"Coin: {row.get('coin_name') or ''} ({row.get('coin_symbol') or ''})"
-
-        body = {"summary": summary[:300], "description": description[:8000], "start": start_dict, "end": end_dict}
-
-        # 중복 체크(1분 창)
-        try:
-            dup = service.events().list(
-                calendarId=CRYPTO_CALENDAR_ID,
-                timeMin=start_iso,
-                timeMax=(pd.to_datetime(start_iso) + timedelta(minutes=1)).isoformat(),
-                q=row.get("title") or ""
-            ).execute()
-            if dup.get("items"):
-                print(f"[crypto] 이미 존재: {summary} @ {start_iso}")
-                continue
-        except Exception as e:
-            print(f"[crypto] 중복 조회 실패(무시): {e}")
-
-        try:
-            created = service.events().insert(calendarId=CRYPTO_CALENDAR_ID, body=body).execute()
-            print(f"[crypto] 등록됨: {created.get('htmlLink')}")
-        except Exception as e:
-            print(f"[crypto] 생성 실패: {summary} @ {start_iso}\n  -> {e}")
-
-def push_economic_events_to_gcal_range(start, end):
+
+def gcal_event_id(source: str, row) -> str:
     """
-    [start, end) 구간의 economic_calendar 만 Google Calendar로 생성
-    - start/end: 'YYYY-MM-DD' 또는 datetime 가능 (KST 기준)
+    DB 행 → 결정적 GCal event id (md5 hex 는 GCal id 허용 문자 a-v0-9 안에 있음).
+    같은 행은 항상 같은 id 이므로 insert 재시도가 중복을 만들지 않는다(409 → 이미 존재).
     """
-    if not ECONOMIC_CALENDAR_ID or ECONOMIC_CALENDAR_ID.startswith("REPLACE_ME"):
-        raise RuntimeError("GOOGLE_CALENDAR_ECONOMIC_ID를 제대로 설정하세요.")
+    return cd.event_key_hash(source, row)
+
+
+def _kst_naive(ts):
+    """tz-aware Timestamp → DB 저장 형식(KST naive). tz_convert(None) 은 UTC 로 바꿔 버리므로 쓰지 않는다."""
+    return ts.tz_convert(tzu.CANONICAL_TZ).tz_localize(None)
+
+
+def read_crypto_range(start_ts, end_ts) -> pd.DataFrame:
+    """[start_ts, end_ts) crypto_calendar 조회 (클러스터 테이블이 있으면 대표 행만)."""
+    # crypto_event_cluster 가 있으면 소스 간 근사 중복은 대표(is_primary) 행만 등록
+    if inspect(engine).has_table("crypto_event_cluster"):
+        sql = text("""
+            SELECT c.*, k.cluster_id FROM crypto_calendar c
+            LEFT JOIN crypto_event_cluster k
+              ON k.event_id = CAST(c.id AS CHAR)
+            WHERE c.start_time_kst >= :s AND c.start_time_kst < :e
+              AND (k.is_primary IS NULL OR k.is_primary = 1)
+            ORDER BY c.start_time_kst
+        """)
+    else:
+        sql = text("""
+            SELECT * FROM crypto_calendar
+            WHERE start_time_kst >= :s AND start_time_kst < :e
+            ORDER BY start_time_kst
+        """)
+    with engine.begin() as conn:
+        return pd.read_sql(sql, conn, params={"s": _kst_naive(start_ts), "e": _kst_naive(end_ts)})
 
-    start_ts = _to_ts(start)
-    end_ts   = _to_ts(end)
-    if not start_ts or not end_ts:
-        raise ValueError("start/end를 확인하세요.")
 
+def read_economic_range(start_ts, end_ts) -> pd.DataFrame:
+    """[start_ts, end_ts) economic_calendar 조회."""
     sql = text("""
         SELECT * FROM economic_calendar
         WHERE `datetime` >= :s AND `datetime` < :e
         ORDER BY `datetime`
     """)
     with engine.begin() as conn:
-        df = pd.read_sql(sql, conn, params={"s": start_ts.tz_convert(None), "e": end_ts.tz_convert(None)})
-
-    if df.empty:
-        print(f"[economic] 기간 내 데이터 없음: {start_ts} ~ {end_ts}")
-        return
-
-    for _, row in df.iterrows():
-        start_dict, end_dict, start_iso, _ = _build_time_fields(
-            row, start_key="datetime", end_key="end_datetime", tz="Asia/Seoul", fallback_hours=1
-        )
-        if not start_iso:
-            continue
-
-        currency = (row.get("currency") or "").strip()
-        title    = (row.get("title") or "").strip()
-        summary = f"{currency} - {title}".strip()
-        description = (
-            f"{row.get('event_url') or ''}\n\n"
-            f"Impact (bulls): {row.get('impact_bulls') if pd.notna(row.get('impact_bulls')) else ''}\n"
-            f"Forecast: {row.get('forecast') or ''}\n"
-            f"Actual: {row.get('actual') or ''}\n"
-            f"Previous: {row.get('previous') or ''}"
-        )
-
-        body = {"summary": summary[:300], "description": description[:8000], "start": start_dict, "end": end_dict}
-
-        try:
-            dup = service.events().list(
-                calendarId=ECONOMIC_CALENDAR_ID,
-                timeMin=start_iso,
-                timeMax=(pd.to_datetime(start_iso) + timedelta(minutes=1)).isoformat(),
-                q=title or ""
-            ).execute()
-            if dup.get("items"):
-                print(f"[economic] 이미 존재: {summary} @ {start_iso}")
-                continue
-        except Exception as e:
-            print(f"[economic] 중복 조회 실패(무시): {e}")
-
-        try:
-            created = service.events().insert(calendarId=ECONOMIC_CALENDAR_ID, body=body).execute()
-            print(f"[economic] 등록됨: {created.get('htmlLink')}")
-        except Exception as e:
-            print(f"[economic] 생성 실패: {summary} @ {start_iso}\n  -> {e}")
+        return pd.read_sql(sql, conn, params={"s": _kst_naive(start_ts), "e": _kst_naive(end_ts)})
 
 
 if __name__ == "__main__":
-    push_crypto_events_to_gcal_range('2025-09-18', '2025-09-22')
-    push_economic_events_to_gcal_range('2025-09-18', '2025-09-22')
\ No newline at end of file
+    # 발행은 결정적 id 로 upsert 하는 gcal_shards 한 경로만 쓴다 (모듈 import 순환 때문에 여기서 import)
+    from api.google.gcal_shards import ShardedPublisher, publish_range
+
+    pub = ShardedPublisher()
+    publish_range("crypto", "2025-09-18", "2025-09-22", pub)
+    publish_range("economic", "2025-09-18", "2025-09-22", pub)
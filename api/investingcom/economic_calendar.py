@@ -8,6 +8,8 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 from dateutil.parser import parse as parse_dt
 
+import utils.timezones as tzu
+
 AJAX_URL = "https://www.investing.com/economic-calendar/Service/getCalendarFilteredData"
 
 HEADERS = {
@@ -59,17 +61,50 @@ def _parse_table(html_snippet: str) -> list[dict]:
         })
     return out
 
-def fetch_investing_range(start_date: str, end_date: str,
-                          tz_offset: int = 0,
-                          countries: list[int] | None = None,
-                          importances: list[int] | None = None,
-                          pause_sec: float = 0.8) -> pd.DataFrame:
+def fetch_investing_day_html(session: requests.Session, day: str,
+                             tz_offset: int = 0,
+                             countries: list[int] | None = None,
+                             importances: list[int] | None = None) -> str:
     """
-    날짜 범위를 움직이며 데이터 수집.
-    - start_date, end_date: 'YYYY-MM-DD'
-    - tz_offset: 사이트 파라미터 timeZone (예: 한국=+9 → 9)
-    - countries: 국가 ID 리스트 (없으면 전체)
-    - importances: 중요도(1~3) 리스트 (없으면 전체)
+    하루치 AJAX 응답의 HTML 조각(파싱 전 원본) 반환.
+    - day: 'YYYY-MM-DD'
+    """
+    payload = {
+        "dateFrom": day,
+        "dateTo": day,
+        "timeZone": tz_offset,
+        "limit_from": 0,
+    }
+    # 배열 파라미터는 키 뒤에 [] 필요
+    if countries:
+        for idx, c in enumerate(countries):
+            payload[f"country[{idx}]"] = c
+    if importances:
+        for idx, imp in enumerate(importances):
+            payload[f"importance[{idx}]"] = imp
+
+    r = session.post(AJAX_URL, data=payload, timeout=20)
+    r.raise_for_status()
+    return r.json().get("data", "")
+
+def _with_utc_ms(df: pd.DataFrame, tz_offset: int) -> pd.DataFrame:
+    """datetime(사이트 tz_offset 현지 시각) → datetime_utc_ms 컬럼 추가 (벡터화)."""
+    if df.empty:
+        return df
+    return df.assign(datetime_utc_ms=tzu.to_utc_ms(df["datetime"], tzu.fixed_offset(tz_offset)))
+
+def parse_investing_html(html_snippet: str, tz_offset: int = tzu.CANONICAL_TZ_OFFSET) -> pd.DataFrame:
+    """HTML 조각 → DataFrame (프로세스 풀에서 호출할 수 있도록 모듈 레벨 함수)."""
+    return _with_utc_ms(pd.DataFrame(_parse_table(html_snippet)), tz_offset)
+
+def fetch_investing_range_html(start_date: str, end_date: str,
+                               tz_offset: int = 0,
+                               countries: list[int] | None = None,
+                               importances: list[int] | None = None,
+                               pause_sec: float = 0.8) -> dict:
+    """
+    fetch_investing_range 의 수집 절반: 날짜별 AJAX HTML 조각만 받아 둔다.
+    반환: {'YYYY-MM-DD': html}
     """
     s = requests.Session()
     s.headers.update(HEADERS)
@@ -78,40 +113,54 @@ def fetch_investing_range(start_date: str, end_date: str,
     d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
     d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
 
-    all_rows: list[dict] = []
+    htmls = {}
     total_days = (d1 - d0).days + 1
     for i in range(total_days):
-        d = d0 + timedelta(days=i)
-        payload = {
-            "dateFrom": d.strftime("%Y-%m-%d"),
-            "dateTo": d.strftime("%Y-%m-%d"),
-            "timeZone": tz_offset,
-            "limit_from": 0,
-        }
-        # 배열 파라미터는 키 뒤에 [] 필요
-        if countries:
-            for idx, c in enumerate(countries):
-                payload[f"country[{idx}]"] = c
-        if importances:
-            for idx, imp in enumerate(importances):
-                payload[f"importance[{idx}]"] = imp
-
-        r = s.post(AJAX_URL, data=payload, timeout=20)
-        r.raise_for_status()
-        j = r.json()
-        html = j.get("data", "")
-        if html:
-            rows = _parse_table(html)
-            all_rows.extend(rows)
-
-        time.sleep(pause_sec)  # 부하/차단 방지
-
-    df = pd.DataFrame(all_rows)
+        day = (d0 + timedelta(days=i)).strftime("%Y-%m-%d")
+        htmls[day] = fetch_investing_day_html(s, day, tz_offset, countries, importances)
+        if i < total_days - 1:
+            time.sleep(pause_sec)  # 부하/차단 방지
+    return htmls
+
+def investing_html_to_df(htmls: dict, tz_offset: int = 0) -> pd.DataFrame:
+    """
+    fetch_investing_range 의 파싱 절반: {날짜: html} → 하나의 DataFrame.
+    형식이 깨진 날짜는 로그만 남기고 건너뜀, (datetime, currency, title) 중복 제거 후 정렬
+    """
+    all_rows: list[dict] = []
+    for day, html in htmls.items():
+        if not html:
+            continue
+        try:
+            all_rows.extend(_parse_table(html))
+        except Exception as e:
+            print(f"[economic][{day}] parse error: {e}")
+
+    df = _with_utc_ms(pd.DataFrame(all_rows), tz_offset)
     # 보기 좋은 정렬
     if not df.empty:
-        df = df.sort_values(["datetime", "impact_bulls"], ascending=[True, False]).reset_index(drop=True)
+        df = (
+            df.drop_duplicates(subset=["datetime", "currency", "title"])
+            .sort_values(["datetime", "impact_bulls"], ascending=[True, False])
+            .reset_index(drop=True)
+        )
     return df
 
+def fetch_investing_range(start_date: str, end_date: str,
+                          tz_offset: int = 0,
+                          countries: list[int] | None = None,
+                          importances: list[int] | None = None,
+                          pause_sec: float = 0.8) -> pd.DataFrame:
+    """
+    날짜 범위를 움직이며 데이터 수집.
+    - start_date, end_date: 'YYYY-MM-DD'
+    - tz_offset: 사이트 파라미터 timeZone (예: 한국=+9 → 9)
+    - countries: 국가 ID 리스트 (없으면 전체)
+    - importances: 중요도(1~3) 리스트 (없으면 전체)
+    """
+    htmls = fetch_investing_range_html(start_date, end_date, tz_offset, countries, importances, pause_sec)
+    return investing_html_to_df(htmls, tz_offset)
+
 # 사용 예시
 if __name__ == "__main__":
     # 오늘 하루
@@ -1,4 +1,5 @@
-import time
+import os
+import argparse
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -6,65 +7,125 @@ import pandas as pd
 import api.bitget.crypto_calendar as bec
 import api.investingcom.economic_calendar as ec
 import utils.db as db
+import utils.event_dedup as ed
+import utils.outbox_worker as outbox
+import utils.profiling as profiling
+import utils.schema as schema
 
-from api.google import google_calendar
-from api.google.google_calendar import (
-    push_crypto_events_to_gcal_range,
-    push_economic_events_to_gcal_range,
-)
+# CoinMarketCap 수집 (Chrome/undetected_chromedriver 필요 → 기본 꺼짐)
+#   CMC_INGEST=1 python main.py    또는    python main.py --with-cmc
+CMC_ENV = "CMC_INGEST"
+CMC_PAGE_SIZE = 100
+CMC_MAX_PAGES = 5
 
 
-def main():
+def _cmc_enabled_by_env() -> bool:
+    return os.getenv(CMC_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def _fetch_cmc_raw(start_date: str, end_date: str) -> list:
+    """CMC calendar 응답 페이지 목록 (실패하면 있는 만큼만, Bitget 만으로 계속 진행)."""
+    # selenium / Chrome 의존성이 있으므로 켰을 때만 import
+    import api.coinmarketcap.crypto_calendar as cmc
+
+    pages = []
+    try:
+        for page in range(1, CMC_MAX_PAGES + 1):
+            payload = cmc.crawl_cmc_events(start_date, end_date, page=page, size=CMC_PAGE_SIZE)
+            pages.append(payload)
+            if len(cmc._cmc_items(payload)) < CMC_PAGE_SIZE:
+                break
+    except Exception as e:
+        print(f"[cmc] fetch error: {e}")
+    return pages
+
+
+def _parse_cmc(pages: list) -> pd.DataFrame:
+    import api.coinmarketcap.crypto_calendar as cmc
+
+    frames = [df for df in (cmc.cmc_calendar_to_df(p) for p in pages) if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True).dropna(subset=["id"]).drop_duplicates(subset=["id"])
+    # Bitget 과 같은 형식(tz-aware KST)으로 맞추고 id 는 provider 접두어로 구분
+    df["start_time_kst"] = pd.to_datetime(df["start_time_kst"], utc=True).dt.tz_convert("Asia/Seoul")
+    return ed.with_provider_ids(df, "coinmarketcap")
+
+
+def main(profile: bool | None = None, with_cmc: bool | None = None):
     """
     오늘 기준으로 정확히 7일 후의 날짜(하루치)에 대한
     crypto / economic 이벤트를 DB에 저장하고
     Google Calendar에 동기화한다.
+    - profile=True (또는 ECON_CAL_PROFILE=1): 단계별 프로파일을 profiles/ 아래에 기록
+    - with_cmc=True (또는 CMC_INGEST=1): CoinMarketCap 이벤트도 받아 Bitget 과 중복 클러스터링
     """
+    if profile or (profile is None and profiling.enabled_by_env()):
+        profiling.enable()
+    if with_cmc is None:
+        with_cmc = _cmc_enabled_by_env()
+    try:
+        _run(with_cmc)
+    finally:
+        profiling.disable()
+
+
+def _run(with_cmc: bool = False):
+    # 오늘+7일 날짜를 YYYY-MM-DD 문자열로 생성
+    target_date = (datetime.now() + timedelta(days=6)).strftime("%Y-%m-%d")
     try:
-        # 오늘+7일 날짜를 YYYY-MM-DD 문자열로 생성
-        target_date = (datetime.now() + timedelta(days=6)).strftime("%Y-%m-%d")
-        # 1️. Bitget Crypto Calendar 하루치 수집
-        # crypto_df = bec.fetch_crypto_calendar_daily(target_date, page_size=100)
-        crypto_df = bec.fetch_crypto_calendar_range(datetime.now().strftime("%Y-%m-%d"), target_date, page_size=100)
-        if isinstance(crypto_df, list):
-            crypto_df = pd.DataFrame(crypto_df)
-        if not crypto_df.empty and "id" in crypto_df.columns:
-            crypto_df = crypto_df.drop_duplicates(subset=["id"])
-
-        # 오늘+7일 날짜를 YYYY-MM-DD 문자열로 생성
-        target_date = (datetime.now() + timedelta(days=6)).strftime("%Y-%m-%d")
-        # 2️. Investing Economic Calendar 하루치 수집
-        econ_df = ec.fetch_investing_range(target_date, target_date, tz_offset=9)
-        if isinstance(econ_df, list):
-            econ_df = pd.DataFrame(econ_df)
-        if not econ_df.empty:
-            econ_df = econ_df.drop_duplicates(subset=["datetime", "currency", "title"])
-
-        # 3️. DB 저장
-        if not crypto_df.empty:
-            db.insert_crypto_calendar(crypto_df)
-        if not econ_df.empty:
-            db.insert_economic_calendar(econ_df)
+        # 1️. 수집: Bitget(오늘 ~ 오늘+7일) / Investing(오늘+7일 하루치) 원본 응답
+        with profiling.stage("fetch"):
+            today = datetime.now().date()
+            crypto_days = [(today + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(7)]
+            payloads = bec.fetch_crypto_calendar_payloads(crypto_days[0], crypto_days[-1], page_size=100)
+            htmls = ec.fetch_investing_range_html(target_date, target_date, tz_offset=9)
+            cmc_pages = _fetch_cmc_raw(crypto_days[0], crypto_days[-1]) if with_cmc else []
+
+        # 2️. 파싱
+        with profiling.stage("parse"):
+            crypto_df = bec.crypto_payloads_to_df(payloads)
+            econ_df = ec.investing_html_to_df(htmls, tz_offset=9)
+            cmc_df = _parse_cmc(cmc_pages)
+
+        # 3️. 중복 묶기 + DB 저장 (GCal 발행 작업은 같은 트랜잭션에서 gcal_outbox 에 기록됨)
+        with profiling.stage("dedup_insert"):
+            # Bitget / CMC 가 같은 이벤트를 다른 id/제목으로 올린 경우 클러스터로 묶고
+            # 대표 행은 다른 멤버 값으로 빈 열을 채워 저장 (GCal 은 대표만 발행)
+            db.ingest_crypto({"bitget": crypto_df, "coinmarketcap": cmc_df})
+            if not econ_df.empty:
+                db.insert_economic_calendar(econ_df)
 
         print(
             f"[DB] {target_date} 저장 완료: "
-            f"{len(crypto_df)} crypto 이벤트, {len(econ_df)} economic 이벤트."
+            f"{len(crypto_df)} crypto 이벤트 (CMC {len(cmc_df)}), {len(econ_df)} economic 이벤트."
         )
 
-        # 4. Google Calendar 동기화
-        # end는 하루 뒤 날짜 문자열
-        end_date = (datetime.strptime(target_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
-
-        if not crypto_df.empty:
-            push_crypto_events_to_gcal_range(target_date, end_date)
-        if not econ_df.empty:
-            push_economic_events_to_gcal_range(target_date, end_date)
+    except Exception as e:
+        print(f"[ERROR] {target_date} 처리 중 에러: {e}")
+        return
 
+    # 4. Google Calendar 동기화 (outbox 비우기)
+    # 실패/중단돼도 outbox 에 남아 다음 실행이나 outbox_worker 상주 프로세스가 재시도한다.
+    try:
+        with profiling.stage("gcal_sync"):
+            outbox.drain()
         print(f"[Google Calendar] {target_date} 등록 완료.")
+    except Exception as e:
+        print(f"[Google Calendar] outbox 처리 중 에러(다음 실행에서 재시도): {e}")
 
+    # 5. 파티션 관리 (다음 달 파티션 미리 생성. 삭제는 PARTITION_KEEP_MONTHS 설정 시에만)
+    try:
+        schema.maintain()
     except Exception as e:
-        print(f"[ERROR] {target_date} 처리 중 에러: {e}")
+        print(f"[schema] 파티션 관리 중 에러(다음 실행에서 재시도): {e}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="crypto / economic calendar 수집 + GCal 동기화")
+    parser.add_argument("--profile", action="store_true",
+                        help="단계별 샘플링 프로파일/할당 리포트 기록 (환경변수 ECON_CAL_PROFILE=1 과 동일)")
+    parser.add_argument("--with-cmc", action="store_true",
+                        help="CoinMarketCap 이벤트도 수집해 Bitget 과 중복 클러스터링 (환경변수 CMC_INGEST=1 과 동일)")
+    args = parser.parse_args()
+    main(profile=True if args.profile else None, with_cmc=True if args.with_cmc else None)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# python -m pytest / pytest 어느 쪽으로 실행해도 저장소 루트의 utils, api 패키지를 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# utils.db 는 import 시 엔진을 만든다 (접속은 하지 않음). .env 없이도 URL 이 만들어지도록 기본값만 채움
+for _k, _v in {"DB_USER": "test", "DB_PASSWORD": "test", "DB_HOST": "127.0.0.1",
+               "DB_PORT": "3306", "DB_NAME": "test"}.items():
+    os.environ.setdefault(_k, _v)
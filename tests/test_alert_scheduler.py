@@ -0,0 +1,57 @@
+from utils.alert_scheduler import TimingWheel
+
+
+def _run(wheel, until_tick, tick_ms=1000):
+    """0 ~ until_tick 까지 한 tick 씩 진행하며 item → 만기 tick."""
+    fired = {}
+    for now in range(until_tick + 1):
+        for item in wheel.advance(now * tick_ms):
+            assert item not in fired
+            fired[item] = now
+    return fired
+
+
+def test_items_fire_on_their_tick_across_cascades():
+    # 4칸 × 3단계: level 1 은 4 tick, level 2 는 16 tick 단위 → 64 tick 이후는 최상위 칸에 머묾
+    wheel = TimingWheel(tick_sec=1, wheel_size=4, levels=3, now_ms=0)
+    targets = [1, 3, 4, 5, 15, 16, 17, 30, 63, 64, 100]
+    for t in targets:
+        wheel.schedule(t * 1000, t)
+    assert len(wheel) == len(targets)
+
+    fired = _run(wheel, 120)
+    assert fired == {t: t for t in targets}
+    assert len(wheel) == 0
+
+
+def test_advance_in_one_jump_returns_everything_due():
+    wheel = TimingWheel(tick_sec=1, wheel_size=4, levels=3, now_ms=0)
+    for t in (2, 9, 40):
+        wheel.schedule(t * 1000, t)
+    assert sorted(wheel.advance(40_000)) == [2, 9, 40]
+    assert wheel.advance(41_000) == []
+
+
+def test_cancel_removes_scheduled_item():
+    wheel = TimingWheel(tick_sec=1, wheel_size=4, levels=3, now_ms=0)
+    keep = wheel.schedule(20_000, "keep")
+    drop = wheel.schedule(20_000, "drop")
+    assert wheel.cancel(drop)
+    assert not wheel.cancel(drop)
+    fired = _run(wheel, 25)
+    assert fired == {"keep": 20}
+    assert not wheel.cancel(keep)
+
+
+def test_past_items_fire_on_next_advance():
+    wheel = TimingWheel(tick_sec=1, wheel_size=4, levels=3, now_ms=10_000)
+    wheel.schedule(5_000, "late")
+    wheel.schedule(10_000, "now")
+    assert sorted(wheel.advance(10_000)) == ["late", "now"]
+
+
+def test_sub_tick_times_round_down_to_their_tick():
+    wheel = TimingWheel(tick_sec=0.1, wheel_size=64, levels=6, now_ms=0)
+    wheel.schedule(250, "a")
+    assert wheel.advance(199) == []
+    assert wheel.advance(200) == ["a"]
@@ -0,0 +1,130 @@
+import pandas as pd
+
+import utils.change_diff as cd
+
+
+def _econ(**overrides):
+    row = {
+        "datetime": "2025-09-18 21:30:00",
+        "currency": "USD",
+        "title": "Initial Jobless Claims",
+        "impact_bulls": 3,
+        "event_url": "https://example.com/claims",
+        "actual": None,
+        "forecast": "240K",
+        "previous": "263K",
+        "type": "event",
+    }
+    row.update(overrides)
+    return row
+
+
+def test_economic_key_hash_treats_empty_and_null_currency_alike():
+    df = pd.DataFrame([_econ(currency=None), _econ(currency=""), _econ(currency=" ")])
+    assert cd.economic_key_hash(df).nunique() == 1
+
+
+def test_economic_key_hash_matches_string_and_timestamp_datetimes():
+    a = pd.DataFrame([_econ()])
+    b = pd.DataFrame([_econ(datetime=pd.Timestamp("2025-09-18 21:30:00"))])
+    assert cd.economic_key_hash(a).iloc[0] == cd.economic_key_hash(b).iloc[0]
+
+
+def test_economic_row_hash_ignores_int_float_representation():
+    df = pd.DataFrame([_econ(impact_bulls=3), _econ(impact_bulls=3.0), _econ(impact_bulls="3")])
+    assert cd.economic_row_hash(df).nunique() == 1
+
+
+def test_economic_row_hash_changes_with_actual():
+    df = pd.DataFrame([_econ(), _econ(actual="231K")])
+    assert cd.economic_row_hash(df).nunique() == 2
+
+
+def test_diff_economic_rows_without_stored_rows_is_all_new():
+    incoming = pd.DataFrame([_econ(), _econ(title="CPI")])
+    new_df, changed_df, revisions_df = cd.diff_economic_rows(incoming, pd.DataFrame())
+    assert len(new_df) == 2
+    assert changed_df.empty and revisions_df.empty
+    assert "_key" not in new_df.columns and "_hash" not in new_df.columns
+
+
+def test_diff_economic_rows_splits_new_changed_and_unchanged():
+    stored = pd.DataFrame([
+        _econ(),
+        _econ(title="CPI", forecast="0.3%"),
+    ])
+    incoming = pd.DataFrame([
+        _econ(actual="231K"),                 # 수정 (actual 채워짐)
+        _econ(title="CPI", forecast="0.3%"),  # 그대로
+        _econ(title="GDP"),                   # 신규
+    ])
+    new_df, changed_df, revisions_df = cd.diff_economic_rows(incoming, stored)
+
+    assert new_df["title"].tolist() == ["GDP"]
+    assert changed_df["title"].tolist() == ["Initial Jobless Claims"]
+    assert changed_df["actual"].tolist() == ["231K"]
+    assert revisions_df[["field", "old_value", "new_value"]].values.tolist() == [["actual", "", "231K"]]
+    assert revisions_df["key_hash"].iloc[0] == cd.economic_key_hash(changed_df).iloc[0]
+
+
+def test_diff_economic_rows_records_each_changed_field():
+    stored = pd.DataFrame([_econ()])
+    incoming = pd.DataFrame([_econ(actual="231K", forecast="245K", impact_bulls=2)])
+    _, changed_df, revisions_df = cd.diff_economic_rows(incoming, stored)
+    assert len(changed_df) == 1
+    assert sorted(revisions_df["field"]) == ["actual", "forecast", "impact_bulls"]
+
+
+def test_diff_economic_rows_matches_db_float_impact_and_null_currency():
+    # DB 에서 NULL 이 섞이면 impact_bulls 는 float64, currency 는 None 으로 읽힌다
+    stored = pd.DataFrame([_econ(currency=None, impact_bulls=3.0)])
+    incoming = pd.DataFrame([_econ(currency="", impact_bulls=3)])
+    new_df, changed_df, revisions_df = cd.diff_economic_rows(incoming, stored)
+    assert new_df.empty and changed_df.empty and revisions_df.empty
+
+
+def test_diff_economic_rows_keeps_last_duplicate_incoming_row():
+    stored = pd.DataFrame([_econ()])
+    incoming = pd.DataFrame([_econ(actual="200K"), _econ(actual="231K")])
+    _, changed_df, _ = cd.diff_economic_rows(incoming, stored)
+    assert changed_df["actual"].tolist() == ["231K"]
+
+
+def test_event_key_normalizes_economic_rows():
+    a = cd.event_key("economic", _econ(currency=None, title=" CPI "))
+    b = cd.event_key("economic", _econ(currency="", title="CPI", datetime=pd.Timestamp("2025-09-18 21:30")))
+    assert a == b == "economic|2025-09-18 21:30:00||CPI"
+    assert cd.event_key("crypto", {"id": "123"}) == "crypto|123"
+    assert cd.event_key_hash("economic", _econ()) == cd.event_key_hash("economic", _econ(actual="1"))
+
+
+def test_sorted_diff_returns_both_sides():
+    assert cd.sorted_diff(["a", "c", "d", "f"], ["b", "c", "f", "g"]) == (["a", "d"], ["b", "g"])
+    assert cd.sorted_diff([], ["a"]) == ([], ["a"])
+    assert cd.sorted_diff(["a"], []) == (["a"], [])
+    assert cd.sorted_diff(["a", "b"], ["a", "b"]) == ([], [])
+
+
+def test_sorted_diff_matches_set_difference():
+    a = sorted({f"k{i:03d}" for i in range(0, 300, 3)})
+    b = sorted({f"k{i:03d}" for i in range(0, 300, 5)})
+    only_a, only_b = cd.sorted_diff(a, b)
+    assert only_a == sorted(set(a) - set(b))
+    assert only_b == sorted(set(b) - set(a))
+
+
+def test_delete_guard_blocks_empty_source():
+    assert cd.delete_guard(0, 0, 0, min_rows=3, max_ratio=0.5)
+    assert cd.delete_guard(0, 10, 10, min_rows=3, max_ratio=0.5)
+
+
+def test_delete_guard_allows_small_deletions_even_above_ratio():
+    # 2행짜리 창에서 1행이 옮겨진 경우 등: 건수가 min_rows 이하면 비율을 보지 않음
+    assert not cd.delete_guard(1, 1, 2, min_rows=3, max_ratio=0.5)
+    assert not cd.delete_guard(5, 3, 4, min_rows=3, max_ratio=0.5)
+
+
+def test_delete_guard_blocks_mass_deletion():
+    assert cd.delete_guard(2, 8, 10, min_rows=3, max_ratio=0.5)
+    assert not cd.delete_guard(8, 4, 10, min_rows=3, max_ratio=0.5)
+    assert not cd.delete_guard(5, 5, 10, min_rows=3, max_ratio=0.5)
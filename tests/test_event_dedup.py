@@ -0,0 +1,90 @@
+import pandas as pd
+
+import utils.event_dedup as ed
+
+COLS = ["id", "title", "categories", "coin_name", "coin_symbol", "start_time_kst", "link", "source"]
+
+
+def _frame(*rows):
+    return pd.DataFrame([dict(zip(COLS, r)) for r in rows], columns=COLS)
+
+
+BITGET = _frame(
+    ("b1", "Bitcoin Mainnet Upgrade", "upgrade", "Bitcoin", "BTC", "2025-09-18 10:00:00", None, "bitget"),
+    ("b2", "Ethereum Staking Launch", "staking", "Ethereum", "ETH", "2025-09-18 12:00:00", None, "bitget"),
+)
+CMC = _frame(
+    ("cmc-1", "BTC Mainnet Upgrade", None, "Bitcoin", "BTC", "2025-09-18 11:00:00", "https://cmc/1", "cmc"),
+    ("cmc-2", "Solana Hackathon", None, "Solana", "SOL", "2025-09-18 12:00:00", "https://cmc/2", "cmc"),
+)
+
+
+def _cluster_of(clustered, event_id):
+    return clustered.loc[clustered["id"] == event_id, "cluster_id"].iloc[0]
+
+
+def test_normalize_title_tokens_drops_stopwords_and_coin_names():
+    assert ed.normalize_title_tokens("The Bitcoin (BTC) Mainnet Upgrade!", "BTC", "Bitcoin") == ["mainnet", "upgrade"]
+    assert ed.normalize_title_tokens(None) == []
+
+
+def test_provider_ids_round_trip():
+    prefixed = ed.with_provider_ids(pd.DataFrame({"id": [1, 2]}), "coinmarketcap")
+    assert prefixed["id"].tolist() == ["cmc-1", "cmc-2"]
+    assert ed.provider_of(pd.Series(["123", "cmc-1"])).tolist() == ["bitget", "coinmarketcap"]
+
+
+def test_cluster_events_groups_same_event_across_sources():
+    clustered = ed.cluster_events({"bitget": BITGET, "coinmarketcap": CMC})
+    assert len(clustered) == 4
+    assert _cluster_of(clustered, "b1") == _cluster_of(clustered, "cmc-1")
+    assert clustered["cluster_id"].nunique() == 3
+    assert clustered.groupby("cluster_id")["is_primary"].sum().eq(1).all()
+
+
+def test_cluster_events_respects_time_window_and_coin():
+    far = CMC.assign(start_time_kst=["2025-09-21 11:00:00", "2025-09-18 12:00:00"])
+    clustered = ed.cluster_events({"bitget": BITGET, "coinmarketcap": far})
+    assert _cluster_of(clustered, "b1") != _cluster_of(clustered, "cmc-1")
+
+    other_coin = CMC.assign(coin_symbol=["ETH", "SOL"], coin_name=["Ethereum", "Solana"])
+    clustered = ed.cluster_events({"bitget": BITGET, "coinmarketcap": other_coin})
+    assert _cluster_of(clustered, "b1") != _cluster_of(clustered, "cmc-1")
+
+
+def test_cluster_ids_do_not_depend_on_input_order():
+    a = ed.cluster_events({"bitget": BITGET, "coinmarketcap": CMC})
+    b = ed.cluster_events({"coinmarketcap": CMC.iloc[::-1], "bitget": BITGET.iloc[::-1]})
+    assert dict(zip(a["id"], a["cluster_id"])) == dict(zip(b["id"], b["cluster_id"]))
+
+
+def test_titles_without_tokens_only_group_on_exact_title():
+    bitget = _frame(("b1", "Bitcoin", None, "Bitcoin", "BTC", "2025-09-18 10:00:00", None, "bitget"))
+    cmc = _frame(
+        ("cmc-1", "bitcoin", None, "Bitcoin", "BTC", "2025-09-18 10:30:00", None, "cmc"),
+        ("cmc-2", "BTC", None, "Bitcoin", "BTC", "2025-09-18 10:30:00", None, "cmc"),
+    )
+    clustered = ed.cluster_events({"bitget": bitget, "coinmarketcap": cmc})
+    assert _cluster_of(clustered, "b1") == _cluster_of(clustered, "cmc-1")
+    assert _cluster_of(clustered, "b1") != _cluster_of(clustered, "cmc-2")
+
+
+def test_cluster_events_with_no_rows():
+    clustered = ed.cluster_events({"bitget": BITGET.iloc[0:0], "coinmarketcap": None})
+    assert clustered.empty
+    assert {"provider", "cluster_id", "is_primary"} <= set(clustered.columns)
+
+
+def test_rows_to_store_fills_primary_and_keeps_members():
+    clustered = ed.cluster_events({"bitget": BITGET, "coinmarketcap": CMC})
+    stored = ed.rows_to_store(clustered)
+
+    assert sorted(stored["id"]) == sorted(clustered["id"])
+    assert not {"provider", "cluster_id", "is_primary"} & set(stored.columns)
+    # 대표(b1, 제목이 더 김)는 비어 있던 link 를 CMC 멤버 값으로 채움, 멤버 행은 원본 그대로
+    primary = stored[stored["id"] == "b1"].iloc[0]
+    assert primary["link"] == "https://cmc/1"
+    assert primary["categories"] == "upgrade"
+    member = stored[stored["id"] == "cmc-1"].iloc[0]
+    assert member["title"] == "BTC Mainnet Upgrade"
+    assert pd.isna(member["categories"])
@@ -0,0 +1,343 @@
+import os
+import json
+import time
+import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import requests
+from sqlalchemy import text
+
+import utils.db as db
+import utils.change_diff as cd
+
+TICK_SEC = float(os.getenv("ALERT_TICK_SEC", "0.1"))
+HORIZON_DAYS = int(os.getenv("ALERT_HORIZON_DAYS", "180"))
+# 스케줄러는 수집(main.py)과 다른 프로세스이므로 db listener 만으로는 변경을 못 받는다.
+#   POLL_SEC 마다 gcal_outbox 의 새 행(수집/수정/삭제 기록)을 id 순으로 읽어 반영하고
+#   RESYNC_SEC 마다 horizon 전체를 다시 적재 (outbox 를 거치지 않는 reconcile 삭제 등 보정)
+POLL_SEC = float(os.getenv("ALERT_POLL_SEC", "60"))
+RESYNC_SEC = float(os.getenv("ALERT_RESYNC_SEC", "3600"))
+OUTBOX_POLL_LIMIT = 5000
+
+
+def _event_ms(v) -> int | None:
+    """DB 시각(KST naive 또는 tz-aware) → epoch ms."""
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    ts = pd.Timestamp(v)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("Asia/Seoul")
+    return ts.value // 1_000_000
+
+
+class TimingWheel:
+    """
+    계층형 타이밍 휠.
+    - level 0: tick 단위 wheel_size 칸, level L: tick * wheel_size^L 단위 wheel_size 칸
+    - schedule/cancel O(1), 상위 칸은 해당 구간이 시작될 때 하위 level 로 내려온다(cascade)
+    - 기본값(0.1s × 64칸 × 6단계) 으로 약 2,000년 앞까지 수용
+    """
+
+    def __init__(self, tick_sec: float = TICK_SEC, wheel_size: int = 64, levels: int = 6, now_ms: int | None = None):
+        self.tick_ms = max(1, int(tick_sec * 1000))
+        self.size = wheel_size
+        self.levels = levels
+        self.spans = [wheel_size ** l for l in range(levels)]
+        self.current = (now_ms if now_ms is not None else int(time.time() * 1000)) // self.tick_ms
+        self.slots = [[{} for _ in range(wheel_size)] for _ in range(levels)]
+        self.where = {}   # handle → (level, slot)
+        self._ready = []  # 이미 지난 시각으로 들어온 항목
+        self._ids = itertools.count()
+
+    def __len__(self):
+        return len(self.where) + len(self._ready)
+
+    def _place(self, handle: int, ticks: int, item):
+        delta = ticks - self.current
+        if delta <= 0:
+            self._ready.append((handle, item))
+            return
+        level = 0
+        while level < self.levels - 1 and delta >= self.spans[level] * self.size:
+            level += 1
+        slot = (ticks // self.spans[level]) % self.size
+        self.slots[level][slot][handle] = (ticks, item)
+        self.where[handle] = (level, slot)
+
+    def schedule(self, fire_at_ms: int, item) -> int:
+        handle = next(self._ids)
+        self._place(handle, fire_at_ms // self.tick_ms, item)
+        return handle
+
+    def cancel(self, handle: int) -> bool:
+        loc = self.where.pop(handle, None)
+        if loc is None:
+            self._ready = [(h, it) for h, it in self._ready if h != handle]
+            return False
+        level, slot = loc
+        self.slots[level][slot].pop(handle, None)
+        return True
+
+    def advance(self, now_ms: int) -> list:
+        """now_ms 까지 tick 을 진행하고 만기된 항목 목록 반환."""
+        due = [it for _, it in self._ready]
+        self._ready = []
+        target = now_ms // self.tick_ms
+        while self.current < target:
+            self.current += 1
+            # 상위 level 부터 새 구간이 시작된 칸을 하위로 내림
+            for level in range(self.levels - 1, 0, -1):
+                if self.current % self.spans[level] == 0:
+                    slot = (self.current // self.spans[level]) % self.size
+                    entries = self.slots[level][slot]
+                    self.slots[level][slot] = {}
+                    for handle, (ticks, item) in entries.items():
+                        del self.where[handle]
+                        self._place(handle, ticks, item)
+            bucket = self.slots[0][self.current % self.size]
+            self.slots[0][self.current % self.size] = {}
+            for handle, (_, item) in bucket.items():
+                del self.where[handle]
+                due.append(item)
+            if self._ready:
+                due.extend(it for _, it in self._ready)
+                self._ready = []
+        return due
+
+
+class RuleIndex:
+    """
+    구독 규칙 인덱스: (source, coin_symbol/currency 또는 '*') → 규칙 목록.
+    규칙 예:
+      {"id": "btc-30m", "source": "crypto", "coin_symbols": ["BTC"], "minutes_before": 30,
+       "webhook": "https://hooks.example/btc"}
+      {"id": "usd-high", "source": "economic", "currencies": ["USD"], "min_impact": 2,
+       "minutes_before": 15}
+    webhook 이 없으면 콘솔 출력으로 대체한다.
+    """
+
+    def __init__(self, rules: list[dict]):
+        self.by_key = {}
+        self.lead_minutes = set()
+        for rule in rules:
+            keys = rule.get("coin_symbols") if rule["source"] == "crypto" else rule.get("currencies")
+            for k in ([str(x).upper() for x in keys] if keys else ["*"]):
+                self.by_key.setdefault((rule["source"], k), []).append(rule)
+            self.lead_minutes.add(int(rule.get("minutes_before", 0)))
+
+    def match(self, source: str, row, minutes_before: int | None = None) -> list[dict]:
+        key_col = "coin_symbol" if source == "crypto" else "currency"
+        key = str(row.get(key_col) or "").upper()
+        impact = row.get("impact_bulls")
+        out = []
+        for rule in self.by_key.get((source, key), []) + self.by_key.get((source, "*"), []):
+            if minutes_before is not None and int(rule.get("minutes_before", 0)) != minutes_before:
+                continue
+            if rule.get("min_impact") is not None and (impact is None or pd.isna(impact) or impact < rule["min_impact"]):
+                continue
+            out.append(rule)
+        return out
+
+
+class AlertScheduler:
+    """
+    저장된 calendar 를 타이밍 휠에 올려 이벤트 N분 전 알림을 발송.
+    - start(): DB 에서 [지금, 지금+HORIZON_DAYS] 구간 적재 후 tick 스레드 + 동기화 스레드 시작
+    - 다른 프로세스의 쓰기는 gcal_outbox 를 POLL_SEC 마다 tail 해서 해당 이벤트만 재스케줄 (O(1) per event),
+      RESYNC_SEC 마다 전체 재적재
+    - 같은 프로세스의 쓰기는 write/delete listener 로 바로 반영
+    """
+
+    def __init__(self, rules: list[dict], tick_sec: float = TICK_SEC, dispatch_workers: int = 4):
+        self.rules = RuleIndex(rules)
+        self.wheel = TimingWheel(tick_sec)
+        self.handles = {}  # event_key → {minutes_before: handle}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=dispatch_workers)
+        self._stop = threading.Event()
+        self._thread = None
+        self._sync_thread = None
+        self._outbox_pos = 0
+        self.horizon_days = HORIZON_DAYS
+
+    # ---------- 스케줄 ----------
+    def upsert_event(self, source: str, row):
+        key = cd.event_key(source, row)
+        ts_col, utc_col = ("start_time_kst", "start_time_utc_ms") if source == "crypto" else ("datetime", "datetime_utc_ms")
+        stored_ms = row.get(utc_col)
+        event_ms = int(stored_ms) if stored_ms is not None and pd.notna(stored_ms) else _event_ms(row.get(ts_col))
+        now_ms = int(time.time() * 1000)
+        row = dict(row)
+        with self.lock:
+            for h in self.handles.pop(key, {}).values():
+                self.wheel.cancel(h)
+            # horizon 밖은 resync 때 구간에 들어오면 올린다
+            if event_ms is None or event_ms < now_ms or event_ms > now_ms + self.horizon_days * 86_400_000:
+                return
+            handles = {}
+            for lead in self.rules.lead_minutes:
+                fire_at = event_ms - lead * 60_000
+                if fire_at < now_ms or not self.rules.match(source, row, lead):
+                    continue
+                handles[lead] = self.wheel.schedule(fire_at, (source, key, lead, row))
+            if handles:
+                self.handles[key] = handles
+
+    def upsert_frame(self, source: str, df: pd.DataFrame):
+        for _, row in df.iterrows():
+            self.upsert_event(source, row)
+
+    def _on_write(self, table: str, changed: pd.DataFrame):
+        if table == "crypto_calendar":
+            self.upsert_frame("crypto", changed)
+        elif table == "economic_calendar":
+            self.upsert_frame("economic", changed)
+
+    def cancel_event(self, source: str, row):
+        with self.lock:
+            for h in self.handles.pop(cd.event_key(source, row), {}).values():
+                self.wheel.cancel(h)
+
+    def _on_delete(self, table: str, deleted: pd.DataFrame):
+        source = "crypto" if table == "crypto_calendar" else "economic"
+        for _, row in deleted.iterrows():
+            self.cancel_event(source, row)
+
+    def load(self, horizon_days: int | None = None):
+        """
+        [지금, 지금+horizon) 구간 전체를 (재)적재. 이미 올라간 이벤트 중 DB 에 없어진 것은 취소한다.
+        """
+        if horizon_days is not None:
+            self.horizon_days = horizon_days
+        now = pd.Timestamp.now(tz="Asia/Seoul").tz_localize(None)
+        end = now + pd.Timedelta(days=self.horizon_days)
+        seen = set()
+        for source, table, col in (("crypto", "crypto_calendar", "start_time_kst"),
+                                   ("economic", "economic_calendar", "datetime")):
+            with db.engine.begin() as conn:
+                df = pd.read_sql(
+                    text(f"SELECT * FROM {table} WHERE `{col}` >= :s AND `{col}` < :e"),
+                    conn, params={"s": now.to_pydatetime(), "e": end.to_pydatetime()},
+                )
+            self.upsert_frame(source, df)
+            seen.update(cd.event_key(source, row) for _, row in df.iterrows())
+        with self.lock:
+            for key in [k for k in self.handles if k not in seen]:
+                for h in self.handles.pop(key).values():
+                    self.wheel.cancel(h)
+        print(f"[alert] 스케줄 적재 완료: {len(self.wheel)}건")
+
+    def _outbox_head(self) -> int:
+        db._ensure_table(db.GCAL_OUTBOX_DDL)
+        with db.engine.begin() as conn:
+            return conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM gcal_outbox")).scalar()
+
+    def poll_outbox(self) -> int:
+        """
+        마지막으로 읽은 위치 이후의 gcal_outbox 행(다른 프로세스의 insert/수정/삭제)을 반영.
+        outbox 는 처리 후에도 행을 남기므로 status 와 무관하게 id 순으로 읽는다.
+        (동시 트랜잭션이 id 순서와 다르게 커밋돼 건너뛴 행은 다음 resync 가 보정)
+        반환: 반영한 행 수
+        """
+        applied = 0
+        while True:
+            with db.engine.begin() as conn:
+                rows = conn.execute(
+                    text("SELECT id, source, op, payload FROM gcal_outbox WHERE id > :pos ORDER BY id LIMIT :n"),
+                    {"pos": self._outbox_pos, "n": OUTBOX_POLL_LIMIT},
+                ).all()
+            for job_id, source, op, payload in rows:
+                row = json.loads(payload)
+                if op == "delete":
+                    self.cancel_event(source, row)
+                else:
+                    self.upsert_event(source, row)
+                self._outbox_pos = job_id
+            applied += len(rows)
+            if len(rows) < OUTBOX_POLL_LIMIT:
+                return applied
+
+    # ---------- 발송 ----------
+    def _dispatch(self, source: str, key: str, lead: int, row: dict):
+        for rule in self.rules.match(source, row, lead):
+            payload = {
+                "rule_id": rule.get("id"),
+                "source": source,
+                "event_key": key,
+                "minutes_before": lead,
+                "event": {k: (None if not isinstance(v, str) and pd.isna(v) else str(v)) for k, v in row.items()},
+            }
+            url = rule.get("webhook")
+            try:
+                if url:
+                    requests.post(url, json=payload, timeout=10).raise_for_status()
+                else:
+                    print(f"[alert] {rule.get('id')}: {lead}분 전 - {row.get('title')}")
+            except Exception as e:
+                print(f"[alert] 발송 실패 {rule.get('id')} / {key}: {e}")
+
+    def _run(self):
+        tick = self.wheel.tick_ms / 1000
+        while not self._stop.is_set():
+            now_ms = int(time.time() * 1000)
+            with self.lock:
+                due = self.wheel.advance(now_ms)
+                for _, key, lead, _ in due:
+                    fired = self.handles.get(key)
+                    if fired is not None:
+                        fired.pop(lead, None)
+                        if not fired:
+                            del self.handles[key]
+            for item in due:
+                self.pool.submit(self._dispatch, *item)
+            # 다음 tick 경계까지 대기 (jitter ≈ tick)
+            self._stop.wait(tick - (time.time() % tick))
+
+    def _sync(self):
+        last_resync = time.monotonic()
+        while not self._stop.wait(POLL_SEC):
+            try:
+                if time.monotonic() - last_resync >= RESYNC_SEC:
+                    head = self._outbox_head()
+                    self.load()
+                    self._outbox_pos = max(self._outbox_pos, head)
+                    last_resync = time.monotonic()
+                else:
+                    n = self.poll_outbox()
+                    if n:
+                        print(f"[alert] outbox 변경 {n}건 반영")
+            except Exception as e:
+                print(f"[alert] 동기화 실패(다음 주기에 재시도): {e}")
+
+    def start(self):
+        db.register_write_listener(self._on_write)
+        db.register_delete_listener(self._on_delete)
+        # 적재 전 outbox 위치를 잡아 두면 적재 중 들어온 변경도 다음 poll 에서 (멱등하게) 다시 반영된다
+        self._outbox_pos = self._outbox_head()
+        self.load()
+        self._thread = threading.Thread(target=self._run, name="alert-wheel", daemon=True)
+        self._thread.start()
+        self._sync_thread = threading.Thread(target=self._sync, name="alert-sync", daemon=True)
+        self._sync_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        for t in (self._thread, self._sync_thread):
+            if t:
+                t.join()
+        self.pool.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    scheduler = AlertScheduler([
+        {"id": "high-impact", "source": "economic", "min_impact": 2, "minutes_before": 15},
+        {"id": "btc", "source": "crypto", "coin_symbols": ["BTC"], "minutes_before": 30},
+    ])
+    scheduler.start()
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        scheduler.stop()
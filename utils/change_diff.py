@@ -0,0 +1,163 @@
+import hashlib
+import pandas as pd
+
+# economic_calendar 고유키 / 사후에 채워지거나 수정되는 컬럼
+ECON_KEY_COLS = ["datetime", "currency", "title"]
+ECON_MUTABLE_COLS = ["impact_bulls", "event_url", "actual", "forecast", "previous", "type"]
+# 정수 컬럼: DB 에서 NULL 이 섞여 float64 로 읽히면 '3.0' 이 되므로 Int64 로 맞춘 뒤 비교
+ECON_INT_COLS = ["impact_bulls"]
+
+
+def _norm_str(series: pd.Series) -> pd.Series:
+    """NaN/None → '' 로 바꾸고 문자열 정규화 (해시 입력용)."""
+    return series.where(series.notna(), "").astype(str).str.strip()
+
+
+def _norm_col(df: pd.DataFrame, col: str) -> pd.Series:
+    """수정 가능 컬럼 하나를 해시/비교용 문자열로 (정수 컬럼은 3 / 3.0 / '3' 을 같게)."""
+    if col not in df.columns:
+        return pd.Series("", index=df.index)
+    s = df[col]
+    if col in ECON_INT_COLS:
+        s = pd.to_numeric(s, errors="coerce").round().astype("Int64")
+    return _norm_str(s.astype(object))
+
+
+def _norm_datetime(series: pd.Series) -> pd.Series:
+    """datetime/문자열 → 'YYYY-MM-DD HH:MM:SS' (DB에서 읽은 값과 비교 가능하게)."""
+    return pd.to_datetime(series).dt.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _md5_join(df: pd.DataFrame) -> pd.Series:
+    joined = df.agg("|".join, axis=1)
+    return joined.map(lambda s: hashlib.md5(s.encode("utf-8")).hexdigest())
+
+
+def _norm_scalar(v) -> str:
+    """_norm_str 의 값 하나 버전."""
+    return "" if v is None or (not isinstance(v, str) and pd.isna(v)) else str(v).strip()
+
+
+def event_key(source: str, row) -> str:
+    """
+    행 하나의 이벤트 키: 'crypto|<id>' / 'economic|YYYY-MM-DD HH:MM:SS|<currency>|<title>'.
+    GCal event id, 알림 스케줄, 피드 uid 가 모두 이 키를 쓴다 (economic 부분은 economic_key_hash 와 같은 정규화).
+    """
+    if source == "crypto":
+        return f"crypto|{row.get('id')}"
+    dt = pd.Timestamp(row.get("datetime")).strftime("%Y-%m-%d %H:%M:%S")
+    return f"economic|{dt}|{_norm_scalar(row.get('currency'))}|{_norm_scalar(row.get('title'))}"
+
+
+def event_key_hash(source: str, row) -> str:
+    """event_key → md5 hex."""
+    return hashlib.md5(event_key(source, row).encode("utf-8")).hexdigest()
+
+
+def economic_key_hash(df: pd.DataFrame) -> pd.Series:
+    """(datetime, currency, title) → md5 hex (열 단위, event_key 와 같은 정규화)."""
+    parts = pd.DataFrame({
+        "datetime": _norm_datetime(df["datetime"]),
+        "currency": _norm_str(df["currency"]),
+        "title": _norm_str(df["title"]),
+    }, index=df.index)
+    return _md5_join(parts)
+
+
+def economic_row_hash(df: pd.DataFrame) -> pd.Series:
+    """수정 가능한 컬럼(actual/forecast/previous 등)만으로 만든 md5 hex."""
+    parts = pd.DataFrame(
+        {c: _norm_col(df, c) for c in ECON_MUTABLE_COLS},
+        index=df.index,
+    )
+    return _md5_join(parts)
+
+
+def diff_economic_rows(incoming: pd.DataFrame, stored: pd.DataFrame):
+    """
+    새로 수집한 행과 DB에 저장된 행을 해시로 비교.
+    반환: (new_df, changed_df, revisions_df)
+      - new_df: DB에 없는 키
+      - changed_df: 키는 같지만 수정 가능 컬럼이 바뀐 행 (incoming 값)
+      - revisions_df: 바뀐 필드별 1행 (key_hash, datetime, currency, title, field, old_value, new_value)
+    """
+    incoming = incoming.copy()
+    incoming["_key"] = economic_key_hash(incoming)
+    incoming["_hash"] = economic_row_hash(incoming)
+    incoming = incoming.drop_duplicates(subset=["_key"], keep="last")
+
+    if stored is None or stored.empty:
+        new_df = incoming.drop(columns=["_key", "_hash"])
+        return new_df, new_df.iloc[0:0], pd.DataFrame(
+            columns=["key_hash", "datetime", "currency", "title", "field", "old_value", "new_value"]
+        )
+
+    stored = stored.copy()
+    stored["_key"] = economic_key_hash(stored)
+    stored["_hash"] = economic_row_hash(stored)
+    stored = stored.drop_duplicates(subset=["_key"], keep="last").set_index("_key")
+
+    is_new = ~incoming["_key"].isin(stored.index)
+    new_df = incoming[is_new]
+
+    known = incoming[~is_new]
+    changed = known[known["_hash"].values != stored.loc[known["_key"], "_hash"].values]
+
+    revisions = []
+    cols = [c for c in ECON_MUTABLE_COLS if c in changed.columns]
+    old_rows = stored.loc[changed["_key"]]
+    new_vals = {c: _norm_col(changed, c).to_numpy() for c in cols}
+    old_vals = {c: _norm_col(old_rows, c).to_numpy() for c in cols}
+    for i, (_, row) in enumerate(changed.iterrows()):
+        for col in cols:
+            old_v, new_v = old_vals[col][i], new_vals[col][i]
+            if old_v != new_v:
+                revisions.append({
+                    "key_hash": row["_key"],
+                    "datetime": row["datetime"],
+                    "currency": row["currency"],
+                    "title": row["title"],
+                    "field": col,
+                    "old_value": old_v,
+                    "new_value": new_v,
+                })
+
+    revisions_df = pd.DataFrame(
+        revisions,
+        columns=["key_hash", "datetime", "currency", "title", "field", "old_value", "new_value"],
+    )
+    return (
+        new_df.drop(columns=["_key", "_hash"]),
+        changed.drop(columns=["_key", "_hash"]),
+        revisions_df,
+    )
+
+
+def sorted_diff(a: list, b: list) -> tuple[list, list]:
+    """
+    정렬된 두 목록을 한 번 훑어 (a - b, b - a) 반환. O(len(a) + len(b)).
+    입력은 오름차순 + 중복 없음이어야 한다.
+    """
+    only_a, only_b = [], []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] == b[j]:
+            i += 1
+            j += 1
+        elif a[i] < b[j]:
+            only_a.append(a[i])
+            i += 1
+        else:
+            only_b.append(b[j])
+            j += 1
+    only_a.extend(a[i:])
+    only_b.extend(b[j:])
+    return only_a, only_b
+
+
+def delete_guard(n_source: int, n_stale: int, n_db: int, min_rows: int, max_ratio: float) -> bool:
+    """
+    reconcile 삭제 보류 여부. 소스가 비었거나(수집 실패로 봄), 삭제 후보가 min_rows 를 넘으면서
+    DB 행의 max_ratio 를 넘게 사라졌으면 True.
+    """
+    return n_source == 0 or (n_stale > min_rows and n_stale > max_ratio * n_db)
@@ -1,8 +1,13 @@
 import os
+import json
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import bindparam, create_engine, inspect, text
 from dotenv import load_dotenv
 
+import utils.change_diff as cd
+import utils.event_dedup as ed
+import utils.timezones as tzu
+
 # .env 불러오기
 load_dotenv()
 
@@ -16,6 +21,124 @@ DB_NAME = os.getenv("DB_NAME")
 DB_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 engine = create_engine(DB_URL, pool_pre_ping=True, future=True)
 
+# 쓰기 후 호출되는 콜백 목록 (query_api 캐시 무효화 등)
+# 콜백 시그니처: fn(table: str, changed: pd.DataFrame)
+_write_listeners = []
+
+
+def register_write_listener(fn):
+    """insert/update 커밋 직후 호출될 콜백 등록."""
+    if fn not in _write_listeners:
+        _write_listeners.append(fn)
+
+
+def _notify_write(table: str, changed: pd.DataFrame):
+    for fn in list(_write_listeners):
+        try:
+            fn(table, changed)
+        except Exception as e:
+            print(f"[db] write listener 실패({table}): {e}")
+
+
+# 삭제 후 호출되는 콜백 목록 (시그니처는 write listener 와 동일, deleted 는 삭제된 행)
+_delete_listeners = []
+
+
+def register_delete_listener(fn):
+    """delete 커밋 직후 호출될 콜백 등록."""
+    if fn not in _delete_listeners:
+        _delete_listeners.append(fn)
+
+
+def _notify_delete(table: str, deleted: pd.DataFrame):
+    for fn in list(_delete_listeners):
+        try:
+            fn(table, deleted)
+        except Exception as e:
+            print(f"[db] delete listener 실패({table}): {e}")
+
+
+_ensured_tables = set()
+
+
+def _ensure_table(ddl: str):
+    """
+    CREATE TABLE IF NOT EXISTS 를 프로세스당 한 번, 별도 커넥션에서 실행.
+    (MySQL DDL은 암묵적 커밋을 일으키므로 데이터 트랜잭션 안에서 실행하면 안 된다)
+    """
+    if ddl in _ensured_tables:
+        return
+    with engine.begin() as conn:
+        conn.execute(text(ddl))
+    _ensured_tables.add(ddl)
+
+
+_ensured_utc_columns = set()
+
+
+def _ensure_utc_column(table: str):
+    """
+    UTC epoch ms 컬럼(tzu.UTC_MS_COLUMNS)이 없으면 추가하고 기존 행을 채운다 (프로세스당 한 번).
+    기존 행의 원본 컬럼은 KST naive 로 저장돼 있으므로 KST 기준 epoch 과의 차로 계산
+    (세션 time_zone / tz 테이블과 무관).
+    """
+    if table in _ensured_utc_columns:
+        return
+    col, _ = tzu.UTC_MS_COLUMNS[table]
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        if insp.has_table(table) and col not in {c["name"] for c in insp.get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {col} BIGINT NULL, ADD KEY idx_{col} ({col})"))
+            filled = _backfill_utc_ms(conn, table)
+            print(f"[{table}] {col} 컬럼 추가, 기존 {filled}행 채움")
+    _ensured_utc_columns.add(table)
+
+
+def _backfill_utc_ms(conn, table: str) -> int:
+    """UTC ms 컬럼이 비어 있는 행을 KST naive 원본 컬럼에서 채운다."""
+    col, src = tzu.UTC_MS_COLUMNS[table]
+    return conn.execute(text(f"""
+        UPDATE {table}
+        SET {col} = TIMESTAMPDIFF(SECOND, '1970-01-01 09:00:00', `{src}`) * 1000
+        WHERE {col} IS NULL AND `{src}` IS NOT NULL
+    """)).rowcount
+
+
+GCAL_OUTBOX_DDL = """
+CREATE TABLE IF NOT EXISTS gcal_outbox (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    source VARCHAR(16) NOT NULL,
+    op VARCHAR(16) NOT NULL,
+    payload LONGTEXT NOT NULL,
+    status VARCHAR(16) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(64),
+    locked_until DATETIME,
+    last_error TEXT,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_status_next (status, next_attempt_at)
+)
+"""
+
+
+def _enqueue_outbox(conn, source: str, op: str, df: pd.DataFrame):
+    """
+    GCal 발행 작업을 gcal_outbox 에 추가. 호출한 쪽의 트랜잭션(conn) 안에서 실행되므로
+    DB insert 와 outbox 기록은 함께 커밋/롤백된다. (source: "crypto" | "economic", op: "upsert" | "update" | "delete")
+    """
+    if df is None or df.empty:
+        return
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    conn.execute(
+        text("INSERT INTO gcal_outbox (source, op, payload) VALUES (:source, :op, :payload)"),
+        [
+            {"source": source, "op": op, "payload": json.dumps(r, ensure_ascii=False, default=str)}
+            for r in records
+        ],
+    )
+
 def insert_crypto_calendar(df: pd.DataFrame):
     """
     crypto_calendar DataFrame → MySQL 테이블 저장 후 연결 자동 종료
@@ -63,51 +186,110 @@ def insert_economic_calendar(df: pd.DataFrame):
 
 
 
+# schema.py 에서 NOT NULL 인 키 컬럼. 파서가 None/NaT 를 낼 수 있어(startTime 누락, 이벤트 셀 없음)
+# strict mode 에서 한 행 때문에 insert + outbox 트랜잭션 전체가 실패하지 않도록 저장 전에 뺀다
+REQUIRED_COLS = {
+    "crypto_calendar": ["id", "start_time_kst"],
+    "economic_calendar": ["datetime", "title"],
+}
+
+
+def _drop_null_keys(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    cols = [c for c in REQUIRED_COLS[table] if c in df.columns]
+    ok = df[cols].notna().all(axis=1)
+    if not ok.all():
+        print(f"[{table}] 키 컬럼({', '.join(cols)})이 비어 있는 {int((~ok).sum())}행 제외")
+    return df[ok]
+
+
 def insert_crypto_calendar(df: pd.DataFrame):
     """
     crypto_calendar DataFrame → MySQL 테이블에 저장
     DB에 이미 있는 id는 제외하고 나머지만 insert.
     """
+    df = _drop_null_keys(df, "crypto_calendar") if not df.empty else df
     if df.empty:
         return
 
+    # 시각은 저장 시점에 한 번 UTC epoch ms 로 정규화 (렌더링은 tzu 로 벡터 변환)
+    df = tzu.add_utc_ms(df, "crypto_calendar")
+    _ensure_utc_column("crypto_calendar")
+    _ensure_table(GCAL_OUTBOX_DDL)
     with engine.begin() as conn:
-        # DB에 이미 저장된 id 조회
-        existing_ids = pd.read_sql(text("SELECT id FROM crypto_calendar"), conn)["id"].tolist()
-        # 새로운 id만 필터
-        new_df = df[~df["id"].isin(existing_ids)].copy()
+        new_df = _insert_crypto_rows(conn, df)
 
-        if not new_df.empty:
-            new_df.to_sql(
-                name="crypto_calendar",
-                con=conn,
-                if_exists="append",
-                index=False,
-                chunksize=500,
-            )
-            print(f"[crypto_calendar] 새로 추가된 행: {len(new_df)}")
-        else:
-            print("[crypto_calendar] 새로 추가할 행 없음.")
+    if not new_df.empty:
+        _notify_write("crypto_calendar", new_df)
 
 
-def insert_economic_calendar(df: pd.DataFrame):
+def _insert_crypto_rows(conn, df: pd.DataFrame) -> pd.DataFrame:
+    """conn 트랜잭션 안에서 새 id 행만 insert + outbox upsert 기록. 반환: 새로 들어간 행."""
+    # DB에 이미 저장된 id 조회
+    existing_ids = pd.read_sql(text("SELECT id FROM crypto_calendar"), conn)["id"].astype(str)
+    # 새로운 id만 필터 (schema.py 에서 id 는 VARCHAR → 문자열로 비교)
+    new_df = df[~df["id"].astype(str).isin(existing_ids)].copy()
+
+    if not new_df.empty:
+        new_df.to_sql(
+            name="crypto_calendar",
+            con=conn,
+            if_exists="append",
+            index=False,
+            chunksize=500,
+        )
+        _enqueue_outbox(conn, "crypto", "upsert", new_df)
+        print(f"[crypto_calendar] 새로 추가된 행: {len(new_df)}")
+    else:
+        print("[crypto_calendar] 새로 추가할 행 없음.")
+    return new_df
+
+
+ECONOMIC_REVISION_DDL = """
+CREATE TABLE IF NOT EXISTS economic_calendar_revision (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    key_hash CHAR(32) NOT NULL,
+    `datetime` DATETIME NOT NULL,
+    currency VARCHAR(16),
+    title VARCHAR(255),
+    field VARCHAR(32) NOT NULL,
+    old_value VARCHAR(255),
+    new_value VARCHAR(255),
+    revised_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_key_hash (key_hash),
+    KEY idx_revised_at (revised_at)
+)
+"""
+
+
+def insert_economic_calendar(df: pd.DataFrame) -> dict:
     """
     economic_calendar DataFrame → MySQL 테이블에 저장
-    DB에 이미 있는 (datetime,currency,title) 조합은 제외하고 나머지만 insert.
+    - 새 (datetime,currency,title) 조합은 insert
+    - 이미 있는 조합은 actual/forecast/previous 등 해시를 비교해 바뀐 행만 update
+      + economic_calendar_revision 에 필드별 변경 이력 기록
+    반환: {"inserted": DataFrame, "updated": DataFrame} (GCal 동기화용 변경분)
     """
+    df = _drop_null_keys(df, "economic_calendar") if not df.empty else df
     if df.empty:
-        return
+        return {"inserted": df, "updated": df}
 
+    dts = pd.to_datetime(df["datetime"])
+    df = tzu.add_utc_ms(df, "economic_calendar")
+    _ensure_utc_column("economic_calendar")
+    _ensure_table(GCAL_OUTBOX_DDL)
+    _ensure_table(ECONOMIC_REVISION_DDL)
     with engine.begin() as conn:
-        existing = pd.read_sql(
-            text("SELECT datetime, currency, title FROM economic_calendar"), conn
+        # 수집 구간만 한 번에 조회 (테이블 전체 스캔 X)
+        stored = pd.read_sql(
+            text(f"""
+                SELECT `datetime`, currency, title, {", ".join(f"`{c}`" for c in cd.ECON_MUTABLE_COLS)}
+                FROM economic_calendar
+                WHERE `datetime` BETWEEN :s AND :e
+            """),
+            conn,
+            params={"s": dts.min().to_pydatetime(), "e": dts.max().to_pydatetime()},
         )
-        # 중복 키 조합 생성
-        key_cols = ["datetime", "currency", "title"]
-        df["_key"] = df[key_cols].astype(str).agg("|".join, axis=1)
-        existing["_key"] = existing[key_cols].astype(str).agg("|".join, axis=1)
-
-        new_df = df[~df["_key"].isin(existing["_key"])].drop(columns=["_key"])
+        new_df, changed_df, revisions_df = cd.diff_economic_rows(df, stored)
 
         if not new_df.empty:
             new_df.to_sql(
@@ -117,6 +299,189 @@ def insert_economic_calendar(df: pd.DataFrame):
                 index=False,
                 chunksize=500,
             )
+            _enqueue_outbox(conn, "economic", "upsert", new_df)
             print(f"[economic_calendar] 새로 추가된 행: {len(new_df)}")
         else:
-            print("[economic_calendar] 새로 추가할 행 없음.")
\ No newline at end of file
+            print("[economic_calendar] 새로 추가할 행 없음.")
+
+        if not changed_df.empty:
+            cols = [c for c in cd.ECON_MUTABLE_COLS if c in changed_df.columns]
+            set_clause = ", ".join(f"`{c}` = :{c}" for c in cols)
+            upd = changed_df[cd.ECON_KEY_COLS + cols].astype(object)
+            params = upd.where(upd.notna(), None).to_dict("records")
+            # 해시 키는 currency 의 ''/NULL 을 같게 보므로 UPDATE 도 같은 기준으로 매칭
+            stmt = text(f"""
+                UPDATE economic_calendar SET {set_clause}
+                WHERE `datetime` = :datetime AND NULLIF(currency, '') <=> NULLIF(:currency, '') AND title = :title
+            """)
+            matched = [conn.execute(stmt, p).rowcount > 0 for p in params]
+            if not all(matched):
+                print(f"[economic_calendar] DB 에서 키를 찾지 못해 수정하지 않은 행: {matched.count(False)}")
+            changed_df = changed_df[matched]
+            revisions_df = revisions_df[revisions_df["key_hash"].isin(cd.economic_key_hash(changed_df))]
+
+        if not changed_df.empty:
+            revisions_df.to_sql(
+                name="economic_calendar_revision",
+                con=conn,
+                if_exists="append",
+                index=False,
+                chunksize=500,
+            )
+            # 라우팅 기준 열(impact_bulls 등)이 바뀌면 다른 캘린더로 옮겨질 수 있어 신규(upsert)와 구분
+            _enqueue_outbox(conn, "economic", "update", changed_df)
+            print(f"[economic_calendar] 수정된 행: {len(changed_df)} (변경 필드 {len(revisions_df)}개)")
+
+    if not new_df.empty or not changed_df.empty:
+        _notify_write("economic_calendar", pd.concat([new_df, changed_df], ignore_index=True))
+    return {"inserted": new_df, "updated": changed_df}
+
+
+CRYPTO_CLUSTER_DDL = """
+CREATE TABLE IF NOT EXISTS crypto_event_cluster (
+    provider VARCHAR(32) NOT NULL,
+    event_id VARCHAR(64) NOT NULL,
+    cluster_id CHAR(16) NOT NULL,
+    is_primary TINYINT(1) NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (provider, event_id),
+    KEY idx_event (event_id),
+    KEY idx_cluster (cluster_id)
+)
+"""
+
+
+def non_primary_crypto_ids(ids) -> set[str]:
+    """crypto_calendar.id 중 소스 간 중복 클러스터의 대표가 아닌 것 (GCal / 피드에 내보내지 않는 행)."""
+    ids = sorted({str(i) for i in ids})
+    if not ids or not inspect(engine).has_table("crypto_event_cluster"):
+        return set()
+    sql = text("""
+        SELECT event_id FROM crypto_event_cluster
+        WHERE is_primary = 0 AND event_id IN :ids
+    """).bindparams(bindparam("ids", expanding=True))
+    with engine.begin() as conn:
+        return {r[0] for r in conn.execute(sql, {"ids": ids})}
+
+
+def insert_event_clusters(clustered: pd.DataFrame):
+    """
+    event_dedup.cluster_events() 결과의 (provider, id) → cluster_id 매핑을
+    crypto_event_cluster 테이블에 upsert. GCal 동기화는 is_primary=1 만 등록한다.
+    """
+    if clustered.empty:
+        return
+
+    _ensure_table(CRYPTO_CLUSTER_DDL)
+    with engine.begin() as conn:
+        _upsert_clusters(conn, clustered)
+
+
+def _upsert_clusters(conn, clustered: pd.DataFrame):
+    rows = (
+        clustered[["provider", "id", "cluster_id", "is_primary"]]
+        .rename(columns={"id": "event_id"})
+        .astype({"event_id": str, "is_primary": int})
+        .to_dict("records")
+    )
+    conn.execute(
+        text("""
+            INSERT INTO crypto_event_cluster (provider, event_id, cluster_id, is_primary)
+            VALUES (:provider, :event_id, :cluster_id, :is_primary)
+            ON DUPLICATE KEY UPDATE cluster_id = VALUES(cluster_id), is_primary = VALUES(is_primary)
+        """),
+        rows,
+    )
+    print(f"[crypto_event_cluster] 매핑 {len(rows)}건, 클러스터 {clustered['cluster_id'].nunique()}개")
+
+
+def insert_clustered_crypto(clustered: pd.DataFrame):
+    """
+    event_dedup.cluster_events() 결과를 저장: 클러스터 매핑 → crypto_calendar 행 → outbox 작업을 한 트랜잭션에서.
+    나눠 커밋하면 outbox_worker 가 매핑이 보이기 전에 작업을 가져가 비대표 행까지 발행할 수 있다.
+    """
+    if clustered.empty:
+        return
+
+    rows = _drop_null_keys(ed.rows_to_store(clustered), "crypto_calendar")
+    rows = tzu.add_utc_ms(rows, "crypto_calendar") if not rows.empty else rows
+    _ensure_utc_column("crypto_calendar")
+    _ensure_table(GCAL_OUTBOX_DDL)
+    _ensure_table(CRYPTO_CLUSTER_DDL)
+    with engine.begin() as conn:
+        _upsert_clusters(conn, clustered)
+        new_df = _insert_crypto_rows(conn, rows) if not rows.empty else rows
+
+    if not new_df.empty:
+        _notify_write("crypto_calendar", new_df)
+
+
+def ingest_crypto(frames: dict) -> pd.DataFrame:
+    """
+    crypto 이벤트 저장의 단일 경로 (main / 백필 / 작업 큐 / reconcile 공통).
+    - frames: {"bitget": df, "coinmarketcap": df, ...} (CMC 등은 ed.with_provider_ids 로 id 접두어를 붙인 것)
+    - ed.cluster_events 로 소스 간 중복을 묶고 insert_clustered_crypto 로 매핑/행/outbox 를 함께 기록
+    반환: cluster_events() 결과
+    """
+    frames = {p: df for p, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        return pd.DataFrame()
+    clustered = ed.cluster_events(frames)
+    insert_clustered_crypto(clustered)
+    return clustered
+
+
+def delete_crypto_events(rows: pd.DataFrame, enqueue_gcal: bool = True) -> int:
+    """
+    crypto_calendar 에서 rows 의 id 들을 한 번에 삭제 (취소/삭제된 이벤트 정리용).
+    enqueue_gcal=True 면 GCal 삭제 작업도 같은 트랜잭션에서 outbox 에 기록한다.
+    """
+    if rows is None or rows.empty:
+        return 0
+    ids = sorted(rows["id"].astype(str).unique())
+    _ensure_table(GCAL_OUTBOX_DDL)
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            text("DELETE FROM crypto_calendar WHERE id IN :ids")
+            .bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids},
+        ).rowcount
+        if enqueue_gcal:
+            _enqueue_outbox(conn, "crypto", "delete", rows)
+    print(f"[crypto_calendar] 삭제된 행: {deleted}")
+    _notify_delete("crypto_calendar", rows)
+    return deleted
+
+
+def delete_economic_events(rows: pd.DataFrame, enqueue_gcal: bool = True) -> int:
+    """
+    economic_calendar 에서 rows 의 (datetime, currency, title) 조합을 삭제
+    (발표 시각 변경으로 남은 이전 행 정리용). enqueue_gcal=True 면 GCal 삭제 작업도 outbox 에 기록.
+    """
+    if rows is None or rows.empty:
+        return 0
+    keys = rows[cd.ECON_KEY_COLS].astype(object)
+    keys = keys.where(keys.notna(), None).drop_duplicates()
+    # 행마다 DELETE 하지 않도록 (datetime, currency, title) IN ((...), ...) 한 문장으로
+    # (currency 가 NULL 인 행은 IN 으로 비교되지 않아 따로 묶는다)
+    stmts = []
+    for null_cur, part in keys.groupby(keys["currency"].isna()):
+        params, tuples = {}, []
+        for i, r in enumerate(part.itertuples(index=False)):
+            params.update({f"d{i}": r.datetime, f"t{i}": r.title})
+            if null_cur:
+                tuples.append(f"(:d{i}, :t{i})")
+            else:
+                params[f"c{i}"] = r.currency
+                tuples.append(f"(:d{i}, :c{i}, :t{i})")
+        cond = ("currency IS NULL AND (`datetime`, title)" if null_cur
+                else "(`datetime`, currency, title)")
+        stmts.append((text(f"DELETE FROM economic_calendar WHERE {cond} IN ({', '.join(tuples)})"), params))
+    _ensure_table(GCAL_OUTBOX_DDL)
+    with engine.begin() as conn:
+        deleted = sum(conn.execute(sql, params).rowcount for sql, params in stmts)
+        if enqueue_gcal:
+            _enqueue_outbox(conn, "economic", "delete", rows)
+    print(f"[economic_calendar] 삭제된 행: {deleted}")
+    _notify_delete("economic_calendar", rows)
+    return deleted
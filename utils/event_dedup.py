@@ -0,0 +1,216 @@
+import re
+import hashlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# MinHash 파라미터: NUM_PERM = BANDS * ROWS
+NUM_PERM = 32
+BANDS = 8
+ROWS = 4
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20250918)  # 실행마다 같은 서명이 나오도록 고정 시드
+_A = _rng.randint(1, 2**31 - 1, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2**31 - 1, size=NUM_PERM).astype(np.uint64)
+
+_STOPWORDS = {
+    "a", "an", "the", "of", "on", "for", "to", "and", "in", "at", "by",
+    "will", "be", "is", "with", "from", "new",
+}
+
+# 대표(primary) 레코드 선택 시 같은 점수면 먼저 오는 provider 우선
+PROVIDER_PRIORITY = ["bitget", "coinmarketcap", "investing"]
+RICH_COLS = ["title", "categories", "coin_name", "coin_symbol", "start_time_kst", "link", "source"]
+# crypto_calendar.id / crypto_event_cluster.event_id 는 provider 를 가리지 않는 한 컬럼이라
+# Bitget 외 provider 의 id 는 접두어로 구분한다 (접두어 없음 = bitget)
+ID_PREFIX = {"coinmarketcap": "cmc-"}
+_CLUSTER_COLS = ["provider", "cluster_id", "is_primary"]
+
+
+def normalize_title_tokens(title, coin_symbol=None, coin_name=None) -> list[str]:
+    """소문자화 + 특수문자 제거 + 불용어/코인명 토큰 제거."""
+    if not isinstance(title, str):
+        return []
+    drop = set(_STOPWORDS)
+    for c in (coin_symbol, coin_name):
+        if isinstance(c, str):
+            drop.update(c.lower().split())
+    tokens = re.sub(r"[^0-9a-z]+", " ", title.lower()).split()
+    return [t for t in tokens if t not in drop]
+
+
+def with_provider_ids(df: pd.DataFrame, provider: str) -> pd.DataFrame:
+    """provider 의 원본 id 에 ID_PREFIX 접두어를 붙인 사본 (bitget 은 그대로)."""
+    prefix = ID_PREFIX.get(provider, "")
+    if not prefix or df.empty:
+        return df
+    return df.assign(id=prefix + df["id"].astype(str))
+
+
+def provider_of(ids: pd.Series) -> pd.Series:
+    """crypto_calendar.id → provider."""
+    s = ids.astype(str)
+    out = pd.Series("bitget", index=ids.index)
+    for provider, prefix in ID_PREFIX.items():
+        out = out.mask(s.str.startswith(prefix), provider)
+    return out
+
+
+def _shingles(tokens: list[str]) -> set[str]:
+    """단어 1-gram + 2-gram."""
+    out = set(tokens)
+    out.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return out
+
+
+def minhash_signature(shingles: set[str]) -> np.ndarray:
+    """
+    shingle 집합 → 길이 NUM_PERM uint64 MinHash 서명.
+    빈 집합은 모두 같은 서명(_PRIME)이 되므로 서명끼리 비교하면 안 된다 (cluster_events 는 LSH 에서 제외).
+    """
+    if not shingles:
+        return np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    x = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    # (a*x + b) mod p : a, x < 2^32 이므로 uint64에서 overflow 없음
+    return ((np.outer(x, _A) + _B) % _PRIME).min(axis=0)
+
+
+def _richness(row) -> float:
+    filled = sum(1 for c in RICH_COLS if pd.notna(row.get(c)) and str(row.get(c)).strip() != "")
+    prov = row.get("provider")
+    prio = PROVIDER_PRIORITY.index(prov) if prov in PROVIDER_PRIORITY else len(PROVIDER_PRIORITY)
+    title_len = len(row.get("title") or "") if isinstance(row.get("title"), str) else 0
+    return filled * 1000 + min(title_len, 300) - prio * 0.1
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def cluster_events(
+    frames: dict,
+    time_window_hours: float = 12,
+    threshold: float = 0.5,
+) -> pd.DataFrame:
+    """
+    여러 소스(Bitget / CoinMarketCap ...)의 crypto 이벤트를 근사 중복 클러스터로 묶는다.
+    - frames: {"bitget": df, "coinmarketcap": df, ...} (bitget_calendar_to_df 와 같은 열)
+    - 블로킹 키: (coin_symbol, 시간 버킷) + MinHash LSH 밴드 → 후보 쌍만 비교 (거의 선형 시간)
+    - 후보 쌍은 추정 Jaccard >= threshold 이고 시각 차 <= time_window_hours 일 때 같은 클러스터
+    - 정규화 후 토큰이 없는 제목은 LSH 에 넣지 않고 원문 제목이 같은 행끼리만 묶는다
+    반환: 입력 행 전체 + provider, cluster_id, is_primary 열
+    """
+    parts = []
+    for provider, df in frames.items():
+        if df is None or df.empty:
+            continue
+        df = df.copy()
+        df["provider"] = provider
+        parts.append(df)
+    if not parts:
+        return pd.DataFrame(columns=RICH_COLS + ["id", "provider", "cluster_id", "is_primary"])
+
+    events = pd.concat(parts, ignore_index=True)
+    window_sec = int(time_window_hours * 3600)
+    ts = pd.to_datetime(events["start_time_kst"], utc=True)
+    epoch = (ts.astype("int64") // 10**9).where(ts.notna(), -1).to_numpy()
+    buckets = np.where(epoch >= 0, epoch // window_sec, -1)
+    coins = events["coin_symbol"].fillna("").astype(str).str.upper().to_numpy()
+
+    tokens = [
+        normalize_title_tokens(t, s, n)
+        for t, s, n in zip(events["title"], events["coin_symbol"], events["coin_name"])
+    ]
+    sigs = np.vstack([minhash_signature(_shingles(tok)) for tok in tokens])
+    titles = events["title"].where(events["title"].notna(), "").astype(str).str.strip().str.lower().to_numpy()
+
+    uf = _UnionFind(len(events))
+    lsh = defaultdict(list)
+    exact = defaultdict(list)
+    for i in range(len(events)):
+        if buckets[i] < 0:
+            continue
+        if not tokens[i]:
+            # 코인명/심볼/불용어를 빼면 남는 토큰이 없는 제목("Bitcoin", "BTC" 등)은
+            # 서명이 전부 같아지므로 LSH 대신 원문 제목이 정확히 같을 때만 묶는다
+            if not titles[i]:
+                continue
+            for nb in (buckets[i] - 1, buckets[i], buckets[i] + 1):
+                for j in exact.get((coins[i], nb, titles[i]), ()):
+                    if abs(epoch[i] - epoch[j]) <= window_sec:
+                        uf.union(i, j)
+            exact[(coins[i], buckets[i], titles[i])].append(i)
+            continue
+        band_keys = [sigs[i, b * ROWS:(b + 1) * ROWS].tobytes() for b in range(BANDS)]
+        seen = set()
+        for b, key in enumerate(band_keys):
+            for nb in (buckets[i] - 1, buckets[i], buckets[i] + 1):
+                for j in lsh.get((coins[i], nb, b, key), ()):
+                    if j in seen:
+                        continue
+                    seen.add(j)
+                    if abs(epoch[i] - epoch[j]) > window_sec:
+                        continue
+                    if np.mean(sigs[i] == sigs[j]) >= threshold:
+                        uf.union(i, j)
+        for b, key in enumerate(band_keys):
+            lsh[(coins[i], buckets[i], b, key)].append(i)
+
+    roots = np.array([uf.find(i) for i in range(len(events))])
+    member_keys = events["provider"].astype(str) + ":" + events["id"].astype(str)
+    # 클러스터 ID: 멤버 키 중 가장 작은 값의 md5 (대표가 바뀌어도 유지)
+    min_key = member_keys.groupby(roots).transform("min")
+    events["cluster_id"] = min_key.map(lambda k: hashlib.md5(k.encode("utf-8")).hexdigest()[:16])
+
+    richness = events.apply(_richness, axis=1)
+    primary_idx = richness.groupby(events["cluster_id"]).idxmax()
+    events["is_primary"] = False
+    events.loc[primary_idx.values, "is_primary"] = True
+    return events
+
+
+def merge_clusters(clustered: pd.DataFrame) -> pd.DataFrame:
+    """
+    클러스터마다 대표 레코드 1행만 남기고, 대표에 비어 있는 열은
+    다른 멤버 값으로 채운다 (가장 풍부한 레코드 유지).
+    """
+    if clustered.empty:
+        return clustered
+    ordered = clustered.assign(_rich=clustered.apply(_richness, axis=1)) \
+                       .sort_values(["cluster_id", "is_primary", "_rich"], ascending=[True, False, False])
+    filled = ordered.groupby("cluster_id", sort=False).first()
+    # groupby.first()는 열마다 첫 non-null 값을 고르므로 id/provider는 대표 값으로 덮어쓴다
+    primary = ordered[ordered["is_primary"]].set_index("cluster_id")
+    filled[["id", "provider"]] = primary[["id", "provider"]]
+    return filled.drop(columns=["_rich"]).reset_index()
+
+
+def rows_to_store(clustered: pd.DataFrame) -> pd.DataFrame:
+    """
+    cluster_events() 결과 → crypto_calendar 에 저장할 행.
+    대표 행은 merge_clusters() 로 빈 열을 다른 멤버 값으로 채운 것, 나머지 멤버는 그대로
+    (GCal / reconcile 은 crypto_event_cluster.is_primary 로 대표만 발행한다).
+    """
+    if clustered.empty:
+        return clustered
+    cols = [c for c in clustered.columns if c not in _CLUSTER_COLS]
+    merged = merge_clusters(clustered)[cols]
+    members = clustered.loc[~clustered["is_primary"].astype(bool), cols]
+    return pd.concat([merged, members], ignore_index=True)
@@ -0,0 +1,183 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import utils.db as db
+import utils.timezones as tzu
+
+# 가격 시계열 디렉터리 구성 (write_price_series 로 생성)
+#   ts.npy      int64   bar 시각 (UTC epoch ms, 오름차순)
+#   close.npy   float64 종가
+#   volume.npy  float64 거래량
+#   cs_r2.npy   float64 로그수익률 제곱 누적합 (자동 생성 캐시)
+#   cs_vol.npy  float64 거래량 누적합 (자동 생성 캐시)
+_CHUNK = 1_000_000
+
+EVENT_TIME_COLS = {"crypto": "start_time_kst", "economic": "datetime"}
+
+
+def write_price_series(path: str, df: pd.DataFrame, time_col: str = "ts",
+                       close_col: str = "close", volume_col: str = "volume"):
+    """
+    분봉 DataFrame → 메모리맵용 npy 파일.
+    time_col 이 datetime 이면 UTC 로 간주(naive) 해서 epoch ms 로 저장.
+    """
+    out = Path(path)
+    out.mkdir(parents=True, exist_ok=True)
+    df = df.sort_values(time_col)
+    ts = df[time_col]
+    if pd.api.types.is_datetime64_any_dtype(ts):
+        ts = pd.to_datetime(ts, utc=True).astype("int64") // 1_000_000
+    np.save(out / "ts.npy", ts.to_numpy(dtype=np.int64))
+    np.save(out / "close.npy", df[close_col].to_numpy(dtype=np.float64))
+    np.save(out / "volume.npy", df[volume_col].to_numpy(dtype=np.float64) if volume_col in df
+            else np.zeros(len(df), dtype=np.float64))
+    for cache in ("cs_r2.npy", "cs_vol.npy"):
+        (out / cache).unlink(missing_ok=True)
+
+
+class PriceSeries:
+    """np.load(mmap_mode='r') 로 연 가격 시계열. 이벤트 계산 시 필요한 페이지만 읽는다."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.ts = np.load(self.path / "ts.npy", mmap_mode="r")
+        self.close = np.load(self.path / "close.npy", mmap_mode="r")
+        self.volume = np.load(self.path / "volume.npy", mmap_mode="r")
+        self.cs_r2 = self._cumsum_cache("cs_r2.npy", self._sq_log_returns)
+        self.cs_vol = self._cumsum_cache("cs_vol.npy", lambda s, e: np.asarray(self.volume[s:e], dtype=np.float64))
+
+    def _sq_log_returns(self, s: int, e: int) -> np.ndarray:
+        lo = max(s - 1, 0)
+        c = np.log(np.asarray(self.close[lo:e], dtype=np.float64))
+        r = np.diff(c)
+        if s == 0:
+            r = np.concatenate([[0.0], r])
+        return r * r
+
+    def _cumsum_cache(self, name: str, values_fn) -> np.memmap:
+        """
+        누적합을 디스크에 한 번 만들어 두고 memmap 으로 재사용.
+        chunk 단위로 써서 전체 시계열을 RAM 에 올리지 않는다.
+        """
+        path = self.path / name
+        n = len(self.ts)
+        if path.exists() and os.path.getmtime(path) >= os.path.getmtime(self.path / "close.npy"):
+            cached = np.load(path, mmap_mode="r")
+            if len(cached) == n:
+                return cached
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(n,))
+        carry = 0.0
+        for s in range(0, n, _CHUNK):
+            e = min(n, s + _CHUNK)
+            part = np.cumsum(values_fn(s, e)) + carry
+            out[s:e] = part
+            carry = part[-1] if len(part) else carry
+        out.flush()
+        del out
+        return np.load(path, mmap_mode="r")
+
+
+def _events_utc_ms(events: pd.DataFrame, time_col: str):
+    """이벤트 시각 → (UTC epoch ms, 유효 여부) (저장된 UTC ms 우선, 없으면 KST 원본에서 벡터 변환)."""
+    table = next((t for t, (_, src) in tzu.UTC_MS_COLUMNS.items() if src == time_col), None)
+    ms = tzu.utc_ms_of(events, table) if table else tzu.to_utc_ms(events[time_col])
+    valid = ms.notna().to_numpy()
+    return ms.fillna(0).to_numpy(dtype=np.int64), valid
+
+
+def compute_event_windows(events: pd.DataFrame, prices: PriceSeries, time_col: str,
+                          windows_min: tuple = (5, 15, 60, 240)) -> pd.DataFrame:
+    """
+    모든 이벤트 × 윈도우를 한 번에 계산 (searchsorted + 누적합 차분).
+    윈도우 m 분마다:
+      ret_pre_m / ret_post_m : 로그수익률 [t-m, t] / [t, t+m]
+      rv_pre_m / rv_post_m   : 실현 변동성 sqrt(Σ r²)
+      vol_pre_m / vol_post_m : 거래량 합
+      vol_ratio_m            : vol_post / vol_pre
+    이벤트 시각 이전 bar 가 없거나 윈도우가 시계열 범위를 벗어나면 NaN.
+    """
+    t, has_time = _events_utc_ms(events, time_col)
+    ts = prices.ts
+    n = len(ts)
+    out = {}
+    if n == 0:
+        # 가격 데이터가 없으면 모든 지표 NaN (ts[-1] / clip 범위가 성립하지 않음)
+        nan = np.full(len(events), np.nan)
+        for m in windows_min:
+            for name in ("ret_pre", "ret_post", "rv_pre", "rv_post", "vol_pre", "vol_post", "vol_ratio"):
+                out[f"{name}_{m}m"] = nan
+        return pd.concat([events.reset_index(drop=True), pd.DataFrame(out)], axis=1)
+
+    def last_at_or_before(x):
+        return np.searchsorted(ts, x, side="right") - 1
+
+    i0 = last_at_or_before(t)
+    valid0 = (i0 >= 0) & has_time
+    i0c = np.clip(i0, 0, n - 1)
+    c0 = np.asarray(prices.close[i0c])
+    r2_0 = np.asarray(prices.cs_r2[i0c])
+    v0 = np.asarray(prices.cs_vol[i0c])
+
+    for m in windows_min:
+        span = m * 60_000
+        ip = last_at_or_before(t - span)
+        iq = last_at_or_before(t + span)
+        ok_pre = valid0 & (ip >= 0)
+        ok_post = valid0 & (t + span <= ts[-1])
+        ipc, iqc = np.clip(ip, 0, n - 1), np.clip(iq, 0, n - 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"ret_pre_{m}m"] = np.where(ok_pre, np.log(c0 / np.asarray(prices.close[ipc])), np.nan)
+            out[f"ret_post_{m}m"] = np.where(ok_post, np.log(np.asarray(prices.close[iqc]) / c0), np.nan)
+            out[f"rv_pre_{m}m"] = np.where(ok_pre, np.sqrt(np.maximum(r2_0 - np.asarray(prices.cs_r2[ipc]), 0)), np.nan)
+            out[f"rv_post_{m}m"] = np.where(ok_post, np.sqrt(np.maximum(np.asarray(prices.cs_r2[iqc]) - r2_0, 0)), np.nan)
+            vol_pre = np.where(ok_pre, v0 - np.asarray(prices.cs_vol[ipc]), np.nan)
+            vol_post = np.where(ok_post, np.asarray(prices.cs_vol[iqc]) - v0, np.nan)
+            out[f"vol_pre_{m}m"] = vol_pre
+            out[f"vol_post_{m}m"] = vol_post
+            out[f"vol_ratio_{m}m"] = vol_post / vol_pre
+
+    return pd.concat([events.reset_index(drop=True), pd.DataFrame(out)], axis=1)
+
+
+def summarize(results: pd.DataFrame, by: list[str] | str, stats=("count", "mean", "median", "std")) -> pd.DataFrame:
+    """
+    currency / impact_bulls / title / categories 등으로 그룹 집계.
+    categories("a, b") 는 항목별로 펼쳐서 집계한다.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    df = results
+    if "categories" in by:
+        df = df.assign(categories=df["categories"].fillna("").str.split(r"\s*,\s*")).explode("categories")
+        df = df[df["categories"] != ""]
+    metric_cols = [c for c in df.columns if c.startswith(("ret_", "rv_", "vol_"))]
+    return df.groupby(by)[metric_cols].agg(list(stats))
+
+
+def load_events(source: str, start, end) -> pd.DataFrame:
+    """[start, end) 구간 저장 이벤트 (KST 기준)."""
+    table = "crypto_calendar" if source == "crypto" else "economic_calendar"
+    col = EVENT_TIME_COLS[source]
+    with db.engine.begin() as conn:
+        return pd.read_sql(
+            text(f"SELECT * FROM {table} WHERE `{col}` >= :s AND `{col}` < :e ORDER BY `{col}`"),
+            conn, params={"s": pd.Timestamp(start).to_pydatetime(), "e": pd.Timestamp(end).to_pydatetime()},
+        )
+
+
+def run_event_study(source: str, price_dir: str, start, end, by, windows_min=(5, 15, 60, 240)):
+    """저장된 이벤트 + 메모리맵 가격으로 이벤트 스터디 실행 후 그룹 집계 반환."""
+    events = load_events(source, start, end)
+    if events.empty:
+        return pd.DataFrame()
+    results = compute_event_windows(events, PriceSeries(price_dir), EVENT_TIME_COLS[source], windows_min)
+    return summarize(results, by)
+
+
+if __name__ == "__main__":
+    # 예: BTC 분봉(prices/btcusdt)에 대한 고중요도 economic 이벤트 반응
+    print(run_event_study("economic", "prices/btcusdt", "2024-01-01", "2025-01-01", ["currency", "impact_bulls"]))
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+from sqlalchemy import text
+
+import utils.db as db
+from api.google import google_calendar as gc
+from api.google.gcal_shards import ShardedPublisher
+
+BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+LEASE_SEC = int(os.getenv("OUTBOX_LEASE_SEC", "300"))
+MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+WRITERS = int(os.getenv("OUTBOX_WRITERS", "8"))
+
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _claim_batch(limit: int) -> list[dict]:
+    """
+    pending 이고 재시도 시각이 지난 작업을 lease(locked_by/locked_until)로 점유.
+    lease가 만료된 작업(워커가 죽은 경우)도 다시 가져온다 → at-least-once.
+    """
+    with db.engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE gcal_outbox
+                SET locked_by = :w, locked_until = DATE_ADD(NOW(), INTERVAL :lease SECOND)
+                WHERE status = 'pending'
+                  AND next_attempt_at <= NOW()
+                  AND (locked_until IS NULL OR locked_until < NOW())
+                ORDER BY id
+                LIMIT :n
+            """),
+            {"w": WORKER_ID, "lease": LEASE_SEC, "n": limit},
+        )
+        rows = conn.execute(
+            text("""
+                SELECT id, source, op, payload, attempts FROM gcal_outbox
+                WHERE locked_by = :w AND status = 'pending' AND locked_until >= NOW()
+                ORDER BY id
+            """),
+            {"w": WORKER_ID},
+        ).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def _mark_done(ids: list[int]):
+    if not ids:
+        return
+    with db.engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE gcal_outbox SET status = 'done', locked_by = NULL, locked_until = NULL
+                WHERE id = :id
+            """),
+            [{"id": i} for i in ids],
+        )
+
+
+def _mark_failed(job: dict, error: str):
+    attempts = job["attempts"] + 1
+    status = "dead" if attempts >= MAX_ATTEMPTS else "pending"
+    backoff = min(3600, 30 * (2 ** (attempts - 1)))
+    with db.engine.begin() as conn:
+        conn.execute(
+            text("""
+                UPDATE gcal_outbox
+                SET status = :status, attempts = :attempts, last_error = :err,
+                    next_attempt_at = DATE_ADD(NOW(), INTERVAL :backoff SECOND),
+                    locked_by = NULL, locked_until = NULL
+                WHERE id = :id
+            """),
+            {"status": status, "attempts": attempts, "err": error[:2000], "backoff": backoff, "id": job["id"]},
+        )
+
+
+def _payload_rows(jobs: list[dict]) -> dict:
+    """작업 id → 행. GCal 시각 필드는 source 별로 배치 전체를 한 번에 변환."""
+    rows = {}
+    for source in ("crypto", "economic"):
+        group = [j for j in jobs if j["source"] == source]
+        if not group:
+            continue
+        frame = gc.with_time_fields(pd.DataFrame([json.loads(j["payload"]) for j in group]), source)
+        rows.update(zip((j["id"] for j in group), frame.to_dict("records")))
+    return rows
+
+
+def _deliver(publisher: ShardedPublisher, job: dict, row: dict):
+    source = job["source"]
+    event_id = gc.gcal_event_id(source, row)
+    calendar_id = publisher.route(source, row)
+    if job["op"] == "delete":
+        publisher.delete(calendar_id, event_id)
+        return
+    builder = gc.build_crypto_event_body if source == "crypto" else gc.build_economic_event_body
+    body, start_iso = builder(row)
+    if not start_iso:
+        return  # 시각 없는 행은 발행할 것이 없음
+    result = publisher.upsert(calendar_id, event_id, body)
+    if job["op"] == "update" and result == "created":
+        # 기존 행 수정인데 대상 캘린더에 없었다 = 라우팅이 바뀜 → 예전 캘린더의 같은 id 삭제
+        publisher.drop_elsewhere(source, calendar_id, event_id)
+
+
+def _non_primary_crypto_ids(jobs: list[dict]) -> set[str]:
+    """배치 안의 crypto 작업 중 소스 간 중복 클러스터의 대표가 아닌 id (발행하지 않음)."""
+    ids = {str(json.loads(j["payload"]).get("id")) for j in jobs if j["source"] == "crypto" and j["op"] == "upsert"}
+    return db.non_primary_crypto_ids(ids)
+
+
+def drain(max_batches: int | None = None, publisher: ShardedPublisher | None = None) -> dict:
+    """
+    gcal_outbox 를 배치 단위로 비운다.
+    - 같은 배치 안에서 같은 이벤트 작업이 여러 번 있으면 마지막 것만 전송
+    - 실패한 작업은 지수 백오프 후 재시도, MAX_ATTEMPTS 를 넘으면 'dead'
+    반환: {"done": n, "failed": n}
+    """
+    db._ensure_table(db.GCAL_OUTBOX_DDL)
+    publisher = publisher or ShardedPublisher()
+    stats = {"done": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        jobs = _claim_batch(BATCH_SIZE)
+        if not jobs:
+            break
+        batches += 1
+
+        # (source, event id) 별 마지막 작업만 남김
+        latest = {}
+        for job in jobs:
+            row = json.loads(job["payload"])
+            latest[(job["source"], gc.gcal_event_id(job["source"], row))] = job
+        skip = _non_primary_crypto_ids(list(latest.values()))
+        for k in [k for k, j in latest.items()
+                  if j["source"] == "crypto" and str(json.loads(j["payload"]).get("id")) in skip]:
+            del latest[k]
+        keep = {j["id"] for j in latest.values()}
+        superseded = [j["id"] for j in jobs if j["id"] not in keep]
+
+        done = list(superseded)
+        rows = _payload_rows(list(latest.values()))
+        # 샤드(캘린더 × 계정) 쿼터는 publisher 가 관리하므로 배치 안에서는 동시에 전송
+        with ThreadPoolExecutor(max_workers=WRITERS) as pool:
+            futs = {pool.submit(_deliver, publisher, job, rows[job["id"]]): job for job in latest.values()}
+            for fut in as_completed(futs):
+                job = futs[fut]
+                try:
+                    fut.result()
+                    done.append(job["id"])
+                except Exception as e:
+                    stats["failed"] += 1
+                    print(f"[outbox] 전송 실패 id={job['id']} ({job['source']}/{job['op']}): {e}")
+                    _mark_failed(job, str(e))
+        _mark_done(done)
+        stats["done"] += len(done)
+
+    print(f"[outbox] 처리 완료: {stats}")
+    return stats
+
+
+def run_forever(poll_sec: float = 10.0):
+    """outbox 를 주기적으로 비우는 상주 워커."""
+    publisher = ShardedPublisher()
+    while True:
+        try:
+            drain(publisher=publisher)
+        except Exception as e:
+            print(f"[outbox] drain 에러: {e}")
+        time.sleep(poll_sec)
+
+
+if __name__ == "__main__":
+    run_forever()
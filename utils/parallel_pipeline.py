@@ -0,0 +1,141 @@
+import os
+import time
+import argparse
+import functools
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+
+import api.bitget.crypto_calendar as bec
+import api.investingcom.economic_calendar as ec
+import utils.db as db
+
+
+def _date_range(start_date: str, end_date: str) -> list[str]:
+    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
+    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
+    if d1 < d0:
+        raise ValueError("end_date가 start_date보다 앞일 수 없습니다.")
+    return [(d0 + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((d1 - d0).days + 1)]
+
+
+def run_parallel_backfill(
+    start_date: str,
+    end_date: str,
+    tz_offset: int = 9,
+    page_size: int = 100,
+    fetch_workers: int = 4,
+    parse_workers: int | None = None,
+    pause_sec: float = 0.8,
+) -> dict:
+    """
+    대량 백필용 fetch/parse 파이프라인.
+    - 네트워크 fetch는 스레드 풀(fetch_workers)에서 원본 응답(JSON/HTML)만 받아오고
+    - 받는 즉시 파싱(_parse_table, bitget_calendar_to_df)을 프로세스 풀(parse_workers, 기본 CPU 수)로 넘긴다.
+      → fetch가 계속 진행되는 동안 파싱이 모든 코어에서 병렬로 돈다.
+    - 워커 결과는 DataFrame(pickle)로 돌려받는다.
+    반환: {"crypto": DataFrame, "economic": DataFrame}
+    """
+    days = _date_range(start_date, end_date)
+    parse_workers = parse_workers or os.cpu_count() or 1
+    local = threading.local()
+
+    def _session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            local.session.headers.update(ec.HEADERS)
+        return local.session
+
+    def _fetch_crypto(day):
+        try:
+            return bec.fetch_bitget_calendar_day_pages(day, page_size=page_size)
+        finally:
+            bec.polite_pause()
+
+    def _fetch_economic(day):
+        try:
+            return ec.fetch_investing_day_html(_session(), day, tz_offset=tz_offset)
+        finally:
+            time.sleep(pause_sec)  # 부하/차단 방지
+
+    parsers = {"crypto": bec.bitget_calendar_to_df,
+               "economic": functools.partial(ec.parse_investing_html, tz_offset=tz_offset)}
+    fetchers = {"crypto": _fetch_crypto, "economic": _fetch_economic}
+    parsed = {"crypto": {}, "economic": {}}
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+         ProcessPoolExecutor(max_workers=parse_workers) as parse_pool:
+        fetch_futs = {
+            fetch_pool.submit(fetchers[src], day): (src, day)
+            for day in days
+            for src in ("crypto", "economic")
+        }
+        for fut in as_completed(fetch_futs):
+            src, day = fetch_futs[fut]
+            try:
+                raw = fut.result()
+            except Exception as e:
+                print(f"[{src}][{day}] fetch error: {e}")
+                continue
+            if raw:
+                parsed[src][day] = parse_pool.submit(parsers[src], raw)
+
+        out = {}
+        for src, futs in parsed.items():
+            frames = []
+            for day in sorted(futs):
+                try:
+                    day_df = futs[day].result()
+                except Exception as e:
+                    print(f"[{src}][{day}] parse error: {e}")
+                    continue
+                if not day_df.empty:
+                    frames.append(day_df)
+            out[src] = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if not out["crypto"].empty and "id" in out["crypto"].columns:
+        out["crypto"] = out["crypto"].drop_duplicates(subset=["id"])
+    if not out["economic"].empty:
+        out["economic"] = (
+            out["economic"]
+            .drop_duplicates(subset=["datetime", "currency", "title"])
+            .sort_values(["datetime", "impact_bulls"], ascending=[True, False])
+            .reset_index(drop=True)
+        )
+    return out
+
+
+def backfill(start_date: str, end_date: str, **kwargs) -> dict:
+    """
+    run_parallel_backfill 결과를 DB 에 저장 (crypto 는 db.ingest_crypto, economic 은 db.insert_economic_calendar.
+    기존 id / 키 중복을 걸러내고 GCal 발행 작업도 outbox 에 함께 기록한다).
+    반환: {"crypto": 수집 행 수, "economic": 수집 행 수}
+    """
+    result = run_parallel_backfill(start_date, end_date, **kwargs)
+    # main.py 와 같은 클러스터링 저장 경로 (비대표 중복은 GCal 에 발행되지 않음)
+    db.ingest_crypto({"bitget": result["crypto"]})
+    if not result["economic"].empty:
+        db.insert_economic_calendar(result["economic"])
+    counts = {src: len(df) for src, df in result.items()}
+    print(f"[backfill] {start_date} ~ {end_date}: "
+          f"{counts['crypto']} crypto 이벤트, {counts['economic']} economic 이벤트 저장 처리.")
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="대량 백필 (스레드 fetch + 프로세스 풀 parse → DB 저장)")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--parse-workers", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="저장하지 않고 수집 행 수만 출력")
+    args = parser.parse_args()
+    opts = {"fetch_workers": args.fetch_workers, "parse_workers": args.parse_workers}
+    if args.dry_run:
+        result = run_parallel_backfill(args.start, args.end, **opts)
+        print(f"{len(result['crypto'])} crypto 이벤트, {len(result['economic'])} economic 이벤트.")
+    else:
+        backfill(args.start, args.end, **opts)
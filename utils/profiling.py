@@ -0,0 +1,182 @@
+# 파이프라인 실행 프로파일링 (기본 꺼짐)
+#   ECON_CAL_PROFILE=1 python main.py        또는    python main.py --profile
+#
+# 켜면 profiles/run-YYYYmmdd-HHMMSS/ 아래에
+#   run.log                     실행 로그 (stdout 사본)
+#   <stage>.folded              스택 샘플 (flamegraph.pl / speedscope / inferno 에 그대로 입력)
+#   <stage>.alloc.txt           tracemalloc top-N (stage 동안 늘어난 할당, 줄 단위) + peak
+#   summary.txt                 stage 별 소요 시간 / 샘플 수 / peak 메모리
+# 꺼져 있으면 stage() 는 nullcontext 를 돌려줄 뿐이라 비용이 없다.
+# 샘플러는 현재 프로세스의 모든 스레드(fetch 스레드 풀 포함)를 본다. 프로세스 풀 자식은 대상 아님.
+
+import os
+import sys
+import time
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+PROFILE_ENV = "ECON_CAL_PROFILE"
+PROFILE_DIR = os.getenv("ECON_CAL_PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL_SEC = float(os.getenv("ECON_CAL_PROFILE_INTERVAL_SEC", "0.005"))
+TOP_N = int(os.getenv("ECON_CAL_PROFILE_TOP_N", "30"))
+TRACEMALLOC_FRAMES = int(os.getenv("ECON_CAL_PROFILE_TRACE_FRAMES", "10"))
+
+_NULL = nullcontext()
+_profiler = None
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """sys._current_frames() 를 주기적으로 읽어 스레드별 스택을 folded 형식으로 집계."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._halt = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._halt.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+class _Tee:
+    """stdout 을 run.log 에도 기록."""
+
+    def __init__(self, stream, path: Path):
+        self.stream = stream
+        self.file = open(path, "a", encoding="utf-8")
+
+    def write(self, s):
+        self.stream.write(s)
+        self.file.write(s)
+        return len(s)
+
+    def flush(self):
+        self.stream.flush()
+        self.file.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Profiler:
+    """stage 단위 샘플링 프로파일 + tracemalloc 리포트를 out_dir 에 기록."""
+
+    def __init__(self, out_dir: str | None = None, interval: float = SAMPLE_INTERVAL_SEC, top_n: int = TOP_N):
+        self.out_dir = Path(out_dir or Path(PROFILE_DIR) / f"run-{datetime.now():%Y%m%d-%H%M%S}")
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.interval = interval
+        self.top_n = top_n
+        self.results = []
+        self._lock = threading.Lock()  # stage 는 한 번에 하나씩 (샘플러가 전 스레드를 보므로)
+        self._stdout = sys.stdout
+        sys.stdout = _Tee(sys.stdout, self.out_dir / "run.log")
+        self._own_tracemalloc = not tracemalloc.is_tracing()
+        if self._own_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        print(f"[profile] 프로파일링 켜짐 → {self.out_dir}")
+
+    @contextmanager
+    def stage(self, name: str):
+        with self._lock:
+            sampler = _StackSampler(self.interval)
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            t0 = time.perf_counter()
+            sampler.start()
+            try:
+                yield
+            finally:
+                sampler.stop()
+                elapsed = time.perf_counter() - t0
+                _, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                self._write_stage(name, sampler, before, after, elapsed, peak)
+
+    def _write_stage(self, name, sampler, before, after, elapsed, peak):
+        with open(self.out_dir / f"{name}.folded", "w", encoding="utf-8") as f:
+            for stack, n in sampler.stacks.most_common():
+                f.write(f"{stack} {n}\n")
+
+        ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        growth = sorted((d for d in diff if d.size_diff > 0), key=lambda d: d.size_diff, reverse=True)
+        with open(self.out_dir / f"{name}.alloc.txt", "w", encoding="utf-8") as f:
+            f.write(f"# stage={name} elapsed={elapsed:.2f}s peak={peak / 2**20:.1f}MiB\n")
+            f.write(f"# top {self.top_n} allocation growth by line (size_diff, count_diff, total size)\n")
+            for d in growth[:self.top_n]:
+                frame = d.traceback[0]
+                f.write(f"{d.size_diff / 1024:10.1f} KiB {d.count_diff:+8d}  "
+                        f"{d.size / 1024:10.1f} KiB  {frame.filename}:{frame.lineno}\n")
+
+        self.results.append({"stage": name, "elapsed_sec": elapsed, "samples": sampler.samples, "peak_mib": peak / 2**20})
+        print(f"[profile] {name}: {elapsed:.2f}s, 샘플 {sampler.samples}개, peak {peak / 2**20:.1f}MiB")
+
+    def close(self):
+        with open(self.out_dir / "summary.txt", "w", encoding="utf-8") as f:
+            f.write(f"{'stage':<16}{'elapsed_sec':>12}{'samples':>10}{'peak_mib':>10}\n")
+            for r in self.results:
+                f.write(f"{r['stage']:<16}{r['elapsed_sec']:>12.2f}{r['samples']:>10}{r['peak_mib']:>10.1f}\n")
+        print(f"[profile] 리포트 저장: {self.out_dir}")
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        if isinstance(sys.stdout, _Tee):
+            sys.stdout.file.close()
+        sys.stdout = self._stdout
+
+
+def enabled_by_env() -> bool:
+    return os.getenv(PROFILE_ENV, "").strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def enable(out_dir: str | None = None) -> Profiler:
+    """프로파일링 시작 (이미 켜져 있으면 기존 Profiler 반환)."""
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler(out_dir)
+    return _profiler
+
+
+def disable():
+    """리포트(summary) 를 쓰고 프로파일링 종료."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+        _profiler = None
+
+
+def stage(name: str):
+    """
+    with profiling.stage("fetch"): ...
+    꺼져 있으면 공유 nullcontext 를 그대로 돌려준다 (할당/스레드 없음).
+    """
+    if _profiler is None:
+        return _NULL
+    return _profiler.stage(name)
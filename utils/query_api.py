@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import utils.db as db
+
+# source → (테이블, 시각 컬럼, 통화/코인 필터 컬럼, 중요도 컬럼)
+SOURCES = {
+    "crypto": ("crypto_calendar", "start_time_kst", "coin_symbol", None),
+    "economic": ("economic_calendar", "datetime", "currency", "impact_bulls"),
+}
+
+CACHE_TTL_SEC = float(os.getenv("QUERY_CACHE_TTL_SEC", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "256"))
+# 메모리 인덱스 재적재 주기. write listener 는 같은 프로세스의 쓰기만 알려주므로
+# 다른 프로세스(main.py 수집 등)의 쓰기는 이 주기 안에 반영된다
+INDEX_TTL_SEC = float(os.getenv("QUERY_INDEX_TTL_SEC", str(CACHE_TTL_SEC)))
+# 메모리 인덱스가 유지하는 구간 (오늘 기준 과거/미래 일수). 이 밖의 조회는 DB 직접 조회
+PRELOAD_PAST_DAYS = int(os.getenv("QUERY_PRELOAD_PAST_DAYS", "7"))
+PRELOAD_FUTURE_DAYS = int(os.getenv("QUERY_PRELOAD_FUTURE_DAYS", "30"))
+
+
+def _to_naive_kst(v) -> pd.Timestamp:
+    """str/datetime → tz-naive KST Timestamp (DB 저장 형식과 동일)."""
+    ts = pd.Timestamp(v)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("Asia/Seoul").tz_localize(None)
+    return ts
+
+
+def _read(source: str, lo: pd.Timestamp, hi: pd.Timestamp) -> pd.DataFrame:
+    """DB 에서 [lo, hi) 구간을 시각 순으로 읽는다 (시각 컬럼은 KST naive)."""
+    table, ts_col, _, _ = SOURCES[source]
+    sql = text(f"""
+        SELECT * FROM {table}
+        WHERE `{ts_col}` >= :s AND `{ts_col}` < :e
+        ORDER BY `{ts_col}`
+    """)
+    with db.engine.begin() as conn:
+        df = pd.read_sql(sql, conn, params={"s": lo.to_pydatetime(), "e": hi.to_pydatetime()})
+    if not df.empty:
+        df[ts_col] = pd.to_datetime(df[ts_col])
+        # tz-aware로 저장된 경우도 KST naive로 맞춤
+        if df[ts_col].dt.tz is not None:
+            df[ts_col] = df[ts_col].dt.tz_convert("Asia/Seoul").dt.tz_localize(None)
+        df = df.sort_values(ts_col, kind="stable").reset_index(drop=True)
+    return df
+
+
+def _preload_window() -> tuple[pd.Timestamp, pd.Timestamp]:
+    """인덱스가 유지하는 구간: 오늘 기준 PRELOAD_PAST_DAYS 전 ~ PRELOAD_FUTURE_DAYS 후."""
+    today = pd.Timestamp.now(tz="Asia/Seoul").tz_localize(None).normalize()
+    return today - pd.Timedelta(days=PRELOAD_PAST_DAYS), today + pd.Timedelta(days=PRELOAD_FUTURE_DAYS)
+
+
+class _TimeIndex:
+    """한 source의 [lo, hi) 구간을 시각 정렬 상태로 메모리에 유지."""
+
+    def __init__(self):
+        self.lo = None
+        self.hi = None
+        self.ts = np.empty(0, dtype=np.int64)
+        self.df = pd.DataFrame()
+        self.stale = True
+        self.loaded_at = 0.0
+        self.gen = 0  # invalidate 마다 증가 (적재 중 들어온 쓰기 감지용)
+
+    def fresh(self, max_age: float | None = None) -> bool:
+        ttl = INDEX_TTL_SEC if max_age is None else min(INDEX_TTL_SEC, max_age)
+        return not self.stale and time.monotonic() - self.loaded_at < ttl
+
+    def covers(self, start: pd.Timestamp, end: pd.Timestamp, max_age: float | None = None) -> bool:
+        return self.fresh(max_age) and self.lo is not None and self.lo <= start and end <= self.hi
+
+    def swap(self, ts_col: str, lo: pd.Timestamp, hi: pd.Timestamp, df: pd.DataFrame,
+             loaded_at: float, gen: int):
+        """_read 결과로 교체 (_lock 안에서 호출). 읽는 동안 invalidate 됐으면 stale 로 남긴다."""
+        if df.empty:
+            self.ts = np.empty(0, dtype=np.int64)
+        else:
+            self.ts = df[ts_col].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        self.df = df
+        self.lo, self.hi = lo, hi
+        self.stale = gen != self.gen
+        self.loaded_at = loaded_at
+
+    def slice(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        i = np.searchsorted(self.ts, start.value, side="left")
+        j = np.searchsorted(self.ts, end.value, side="left")
+        return self.df.iloc[i:j]
+
+
+_lock = threading.RLock()
+_indexes = {src: _TimeIndex() for src in SOURCES}
+# source 별 재적재는 한 스레드만 (DB 읽기는 _lock 밖에서 하므로 캐시 히트는 막지 않음)
+_load_locks = {src: threading.Lock() for src in SOURCES}
+_cache = OrderedDict()  # key → (expires_at, 인덱스 loaded_at, DataFrame)
+
+
+def invalidate(table: str | None = None, changed: pd.DataFrame | None = None):
+    """
+    db 쓰기 후 호출. 해당 테이블의 인덱스를 stale 처리하고 캐시를 비운다.
+    (table=None 이면 전체)
+    """
+    with _lock:
+        for src, (tbl, _, _, _) in SOURCES.items():
+            if table is None or table == tbl:
+                _indexes[src].stale = True
+                _indexes[src].gen += 1
+                for k in [k for k in _cache if k[0] == src]:
+                    del _cache[k]
+
+
+db.register_write_listener(invalidate)
+db.register_delete_listener(invalidate)
+
+
+def _filter(source: str, out: pd.DataFrame, cur_key: tuple | None, min_impact) -> pd.DataFrame:
+    _, _, cur_col, impact_col = SOURCES[source]
+    if cur_key and cur_col in out.columns:
+        out = out[out[cur_col].fillna("").str.upper().isin(cur_key)]
+    if min_impact is not None and impact_col and impact_col in out.columns:
+        out = out[out[impact_col] >= min_impact]
+    return out
+
+
+def get_events(source: str, start, end, currencies=None, min_impact=None,
+               max_age: float | None = None) -> pd.DataFrame:
+    """
+    [start, end) 구간 이벤트 조회 (KST 기준).
+    - source: "crypto" | "economic"
+    - currencies: economic은 currency, crypto는 coin_symbol 목록
+    - min_impact: economic impact_bulls 하한 (crypto는 무시)
+    - max_age: DB 에서 읽은 지 이 초 이상 지난 데이터는 쓰지 않음 (기본 INDEX_TTL_SEC)
+    - 인덱스 구간(_preload_window) 밖의 조회는 캐시 없이 DB 에서 바로 읽는다
+    - 결과는 캐시에서 공유되므로 수정하지 말고 필요하면 .copy() 할 것
+    """
+    if source not in SOURCES:
+        raise ValueError(f"알 수 없는 source: {source} (가능: {list(SOURCES)})")
+    start_ts, end_ts = _to_naive_kst(start), _to_naive_kst(end)
+    cur_key = tuple(sorted(c.upper() for c in currencies)) if currencies else None
+    key = (source, start_ts.value, end_ts.value, cur_key, min_impact)
+
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit and hit[0] > now and (max_age is None or now - hit[1] < max_age):
+            _cache.move_to_end(key)
+            return hit[2]
+
+    lo, hi = _preload_window()
+    if start_ts < lo or end_ts > hi:
+        return _filter(source, _read(source, start_ts, end_ts), cur_key, min_impact)
+
+    idx = _indexes[source]
+    with _load_locks[source]:
+        with _lock:
+            ready = idx.covers(start_ts, end_ts, max_age)
+            gen = idx.gen
+        if not ready:
+            loaded_at = time.monotonic()
+            df = _read(source, lo, hi)
+            with _lock:
+                idx.swap(SOURCES[source][1], lo, hi, df, loaded_at, gen)
+
+    with _lock:
+        out = _filter(source, idx.slice(start_ts, end_ts), cur_key, min_impact)
+        _cache[key] = (now + CACHE_TTL_SEC, idx.loaded_at, out)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+        return out
+
+
+def next_24h(source: str, **filters) -> pd.DataFrame:
+    """지금부터 24시간 이내 이벤트 (분 단위로 잘라 캐시 키를 재사용)."""
+    now = pd.Timestamp.now(tz="Asia/Seoul").tz_localize(None).floor("min")
+    return get_events(source, now, now + pd.Timedelta(hours=24), **filters)
@@ -0,0 +1,288 @@
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+import api.bitget.crypto_calendar as bec
+import api.investingcom.economic_calendar as ec
+import utils.change_diff as cd
+import utils.db as db
+import utils.event_dedup as ed
+from api.google import google_calendar as gc
+from api.google.gcal_shards import OWN_EVENT_ID, ShardedPublisher, legacy_key, legacy_keys
+
+# source 별 하루 창의 기준 시간대
+#   crypto: Bitget 일간 API 는 해당 날짜 00:00 UTC 기준
+#   economic: investing 을 tz_offset=9 로 받으므로 KST 하루
+WINDOW_TZ = {"crypto": "UTC", "economic": "Asia/Seoul"}
+CRYPTO_PAGE_SIZE = 100
+CRYPTO_MAX_PAGES = 20
+# 한 창에서 DB 행의 이 비율 이상이 사라졌다면 수집 이상으로 보고 삭제하지 않는다
+MAX_DELETE_RATIO = 0.5
+# 삭제 후보가 이 건수 이하면 비율 검사를 하지 않는다 (1~2행짜리 창에서 이벤트 하나가 옮겨지면 비율이 항상 넘음)
+MIN_DELETE_GUARD_ROWS = 3
+
+
+def _window(source: str, day: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    """day 의 [시작, 끝) (tz-aware KST)."""
+    start = pd.Timestamp(day).tz_localize(WINDOW_TZ[source]).tz_convert("Asia/Seoul")
+    return start, start + pd.Timedelta(days=1)
+
+
+def _keyed(df: pd.DataFrame, keys: pd.Series) -> tuple[list, pd.DataFrame]:
+    """행 → (정렬된 key 목록, key 를 index 로 둔 DataFrame)."""
+    df = df.assign(_key=keys.to_numpy()).drop_duplicates("_key")
+    return sorted(df["_key"]), df.set_index("_key", drop=False)
+
+
+# -------------------- source / DB 창 --------------------
+
+def _fetch_source(source: str, day: str) -> pd.DataFrame:
+    if source == "economic":
+        return ec.fetch_investing_range(day, day, tz_offset=9)
+    # 일간 API 는 페이지 단위라 마지막 페이지까지 받아야 완전한 id 집합이 된다
+    pages = []
+    for page in range(1, CRYPTO_MAX_PAGES + 1):
+        df = bec.fetch_crypto_calendar_daily(day, page_num=page, page_size=CRYPTO_PAGE_SIZE)
+        pages.append(df)
+        if len(df) < CRYPTO_PAGE_SIZE:
+            return pd.concat(pages, ignore_index=True)
+    raise RuntimeError(f"crypto {day}: {CRYPTO_MAX_PAGES} 페이지를 넘어 id 집합이 불완전합니다.")
+
+
+def _source_keys(source: str, df: pd.DataFrame) -> pd.Series:
+    if source == "crypto":
+        # 같은 id 가 다른 시각으로 바뀐(일정 변경) 것도 차이로 잡도록 시작 시각까지 키에 넣는다
+        ts = pd.to_datetime(df["start_time_kst"])
+        if ts.dt.tz is not None:
+            ts = ts.dt.tz_convert("Asia/Seoul").dt.tz_localize(None)
+        return df["id"].astype(str) + "|" + ts.dt.strftime("%Y-%m-%d %H:%M:%S").fillna("")
+    return cd.economic_key_hash(df)
+
+
+def _read_db(source: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    table, col = ("crypto_calendar", "start_time_kst") if source == "crypto" else ("economic_calendar", "datetime")
+    with db.engine.begin() as conn:
+        return pd.read_sql(
+            text(f"SELECT * FROM {table} WHERE `{col}` >= :s AND `{col}` < :e"),
+            conn, params={"s": start.tz_localize(None), "e": end.tz_localize(None)},
+        )
+
+
+def _count_moves(source: str, stale: pd.DataFrame, new: pd.DataFrame) -> int:
+    """stale 행 중 같은 이벤트(crypto: id, economic: (currency, title))가 새 시각으로 들어온 것 (= 일정 변경) 수."""
+    if stale.empty or new.empty:
+        return 0
+    if source == "crypto":
+        return len(set(stale["id"].astype(str)) & set(new["id"].astype(str)))
+    moved_to = set(zip(new["currency"].fillna(""), new["title"].fillna("")))
+    return sum(k in moved_to for k in zip(stale["currency"].fillna(""), stale["title"].fillna("")))
+
+
+def _drop_non_primary(df: pd.DataFrame) -> pd.DataFrame:
+    """소스 간 중복 클러스터의 대표가 아닌 crypto 행 제외 (GCal 에 올리지 않는 행)."""
+    if df.empty:
+        return df
+    return df[~df["id"].astype(str).isin(db.non_primary_crypto_ids(df["id"]))]
+
+
+# -------------------- GCal 창 --------------------
+
+def _event_start(ev: dict) -> pd.Timestamp | None:
+    start = ev.get("start") or {}
+    if start.get("dateTime"):
+        return pd.Timestamp(start["dateTime"]).tz_convert("Asia/Seoul")
+    if start.get("date"):
+        return pd.Timestamp(start["date"]).tz_localize("Asia/Seoul")
+    return None
+
+
+def _expected_rows(source: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    """창 안에서 GCal 에 있어야 할 DB 행 (crypto 는 클러스터 대표만)."""
+    expected = gc.with_time_fields(_read_db(source, start, end), source)
+    if source == "crypto":
+        expected = _drop_non_primary(expected)
+    return expected
+
+
+def _legacy_twin_keys(source: str, expected: pd.DataFrame) -> set:
+    """예전 인라인 push 가 expected 행으로 만들었을 사본의 (제목, 시작 ms) 집합."""
+    builder = gc.build_crypto_event_body if source == "crypto" else gc.build_economic_event_body
+    twins = set()
+    for _, row in expected.iterrows():
+        body, start_iso = builder(row)
+        if start_iso:
+            twins.update(legacy_keys(body["summary"], pd.Timestamp(start_iso)))
+    return twins
+
+
+def _reconcile_gcal(source: str, start: pd.Timestamp, end: pd.Timestamp,
+                    publisher: ShardedPublisher, skip_ids: set[str]) -> dict:
+    """
+    캘린더마다 창 안의 이벤트 id 목록(list 1~2회)과 DB 기대 id 를 정렬 차집합으로 비교.
+    - GCal 에만 있음 → batch 삭제
+    - DB 에만 있음 → outbox upsert (skip_ids: 이번 패스에서 이미 outbox 에 들어간 id)
+    - 결정적 id 도입 전 인라인 push 가 무작위 id 로 만든 DB 행의 사본 → batch 삭제
+      (같은 행은 결정적 id 로 발행돼 있거나 이번에 outbox 로 다시 발행된다)
+    """
+    expected = _expected_rows(source, start, end)
+    twins = _legacy_twin_keys(source, expected)
+    by_calendar = {}
+    for _, row in expected.iterrows():
+        by_calendar.setdefault(publisher.route(source, row), {})[gc.gcal_event_id(source, row)] = row
+
+    stats = {"gcal_deleted": 0, "gcal_legacy_deleted": 0, "gcal_enqueued": 0}
+    missing_rows = []
+    for calendar_id in publisher.calendars(source):
+        listed = publisher.list_events(calendar_id, start.isoformat(), end.isoformat())
+        # 창과 겹치기만 하고 시작은 창 밖인 이벤트(전날 밤 시작 등)는 그 날짜 창에서 다룬다
+        in_window = [ev for ev in listed if (s := _event_start(ev)) is not None and start <= s < end]
+        have = sorted({ev["id"] for ev in in_window if OWN_EVENT_ID.match(ev.get("id", ""))})
+        want_rows = by_calendar.get(calendar_id, {})
+        stale, missing = cd.sorted_diff(have, sorted(want_rows))
+        if stale:
+            stats["gcal_deleted"] += publisher.batch_delete(calendar_id, stale)
+        legacy = [ev["id"] for ev in in_window if legacy_key(ev) in twins]
+        if legacy:
+            stats["gcal_legacy_deleted"] += publisher.batch_delete(calendar_id, legacy)
+        missing_rows.extend(want_rows[i] for i in missing if i not in skip_ids)
+
+    if missing_rows:
+        db._ensure_table(db.GCAL_OUTBOX_DDL)
+        with db.engine.begin() as conn:
+            rows = pd.DataFrame(missing_rows).drop(columns=["_start_rfc3339", "_end_rfc3339", "_tz"], errors="ignore")
+            db._enqueue_outbox(conn, source, "upsert", rows)
+        stats["gcal_enqueued"] = len(missing_rows)
+    return stats
+
+
+# -------------------- 하루 창 reconcile --------------------
+
+def reconcile_day(source: str, day: str, publisher: ShardedPublisher | None = None,
+                  dry_run: bool = False) -> dict:
+    """
+    source / DB / GCal 의 하루치 id 집합을 정렬 차집합으로 맞춘다.
+    - source 에만 있음 → DB insert (+ outbox upsert)
+    - DB 에만 있음 → 취소된 이벤트: DB 에서 한 번에 삭제
+      economic 은 같은 (currency, title) 이 새 시각으로 들어왔으면 '이동' 으로 집계
+    - GCal 은 DB 기준으로 stale 삭제 / 누락 재발행
+    source 가 비었거나 DB 행 대부분이 사라진 경우는 수집 이상으로 보고 삭제를 건너뛴다.
+    """
+    start, end = _window(source, day)
+    src_df = _fetch_source(source, day)
+    if not src_df.empty:
+        ts_col = "start_time_kst" if source == "crypto" else "datetime"
+        ts = pd.to_datetime(src_df[ts_col])
+        ts = ts.dt.tz_convert("Asia/Seoul") if ts.dt.tz is not None else ts.dt.tz_localize("Asia/Seoul")
+        src_df = src_df[((ts >= start) & (ts < end)).to_numpy()]
+    db_df = _read_db(source, start, end)
+    others = db_df.iloc[0:0]
+    if source == "crypto" and not db_df.empty:
+        # source 는 Bitget 이므로 다른 provider(CMC) 행은 취소 판정 대상이 아니다
+        is_bitget = (ed.provider_of(db_df["id"]) == "bitget").to_numpy()
+        others, db_df = db_df[~is_bitget], db_df[is_bitget]
+
+    src_keys, src_rows = _keyed(src_df, _source_keys(source, src_df)) if not src_df.empty else ([], src_df)
+    db_keys, db_rows = _keyed(db_df, _source_keys(source, db_df)) if not db_df.empty else ([], db_df)
+    new_keys, stale_keys = cd.sorted_diff(src_keys, db_keys)
+
+    stats = {"source": source, "day": day, "source_rows": len(src_keys), "db_rows": len(db_keys),
+             "inserted": len(new_keys), "deleted": 0, "moved": 0,
+             "gcal_deleted": 0, "gcal_legacy_deleted": 0, "gcal_enqueued": 0}
+    new = src_rows.loc[new_keys].drop(columns="_key") if new_keys else src_rows.iloc[0:0]
+    stale = db_rows.loc[stale_keys].drop(columns="_key") if stale_keys else db_rows.iloc[0:0]
+
+    guard = cd.delete_guard(len(src_keys), len(stale_keys), len(db_keys),
+                            MIN_DELETE_GUARD_ROWS, MAX_DELETE_RATIO)
+    if stale_keys and guard:
+        print(f"[reconcile] {source} {day}: source {len(src_keys)}건 / 삭제 후보 {len(stale_keys)}건 → 삭제 보류")
+        stale = stale.iloc[0:0]
+    stats["moved"] = _count_moves(source, stale, new)
+    stats["deleted"] = len(stale)
+
+    if dry_run:
+        print(f"[reconcile] (dry-run) {stats}")
+        return stats
+
+    # 삭제를 먼저: crypto 일정 변경은 같은 id 의 이전 시각 행을 지운 뒤 새 시각 행으로 다시 넣는다
+    # (GCal 쪽은 아래 목록 비교에서 batch 로 지우므로 outbox 에는 넣지 않는다)
+    if not stale.empty:
+        if source == "crypto":
+            db.delete_crypto_events(stale, enqueue_gcal=False)
+        else:
+            db.delete_economic_events(stale, enqueue_gcal=False)
+    skip_ids = set()
+    if not new.empty:
+        if source == "crypto":
+            # main 과 같은 클러스터링 저장 경로. 창 안의 다른 provider 행과 함께 묶어야 중복이 대표만 발행된다
+            db.ingest_crypto({"bitget": new, **dict(tuple(others.groupby(ed.provider_of(others["id"]))))})
+        else:
+            db.insert_economic_calendar(new)
+        skip_ids = {gc.gcal_event_id(source, r) for _, r in new.iterrows()}
+
+    if not guard:
+        stats.update(_reconcile_gcal(source, start, end, publisher or ShardedPublisher(), skip_ids))
+    print(f"[reconcile] {stats}")
+    return stats
+
+
+def reconcile_range(start_date: str, end_date: str, sources=("crypto", "economic"),
+                    dry_run: bool = False) -> list[dict]:
+    """start_date ~ end_date (포함) 하루 창마다 reconcile_day."""
+    publisher = None if dry_run else ShardedPublisher()
+    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
+    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
+    out = []
+    for i in range((d1 - d0).days + 1):
+        day = (d0 + timedelta(days=i)).strftime("%Y-%m-%d")
+        for source in sources:
+            try:
+                out.append(reconcile_day(source, day, publisher, dry_run))
+            except Exception as e:
+                print(f"[reconcile] {source} {day} 실패: {e}")
+    return out
+
+
+def drop_legacy_events(start_date: str, end_date: str, sources=("crypto", "economic"),
+                       publisher: ShardedPublisher | None = None) -> dict:
+    """
+    1회성 migration: 결정적 id 도입 전 인라인 push 가 무작위 id 로 만든 사본만 하루 창마다 지운다.
+    DB / source 는 건드리지 않는다 (결정적 id 로 다시 발행하려면 reconcile_range 를 돌린다).
+    """
+    publisher = publisher or ShardedPublisher()
+    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
+    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
+    stats = {"gcal_legacy_deleted": 0}
+    for i in range((d1 - d0).days + 1):
+        day = (d0 + timedelta(days=i)).strftime("%Y-%m-%d")
+        for source in sources:
+            try:
+                start, end = _window(source, day)
+                twins = _legacy_twin_keys(source, _expected_rows(source, start, end))
+                if not twins:
+                    continue
+                for calendar_id in publisher.calendars(source):
+                    listed = publisher.list_events(calendar_id, start.isoformat(), end.isoformat())
+                    legacy = [ev["id"] for ev in listed if legacy_key(ev) in twins]
+                    if legacy:
+                        stats["gcal_legacy_deleted"] += publisher.batch_delete(calendar_id, legacy)
+            except Exception as e:
+                print(f"[reconcile] {source} {day} 예전 이벤트 정리 실패: {e}")
+    print(f"[reconcile] 예전 이벤트 정리: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="취소/변경된 이벤트를 DB·GCal 에서 정리")
+    parser.add_argument("start")
+    parser.add_argument("end")
+    parser.add_argument("--sources", nargs="+", default=["crypto", "economic"])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--legacy-only", action="store_true",
+                        help="결정적 id 도입 전 인라인 push 사본만 GCal 에서 지움 (1회성 migration)")
+    args = parser.parse_args()
+    if args.legacy_only:
+        drop_legacy_events(args.start, args.end, args.sources)
+    else:
+        reconcile_range(args.start, args.end, args.sources, args.dry_run)
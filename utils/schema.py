@@ -0,0 +1,263 @@
+import os
+import argparse
+from datetime import date, datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+import utils.db as db
+
+# 파티션 기준 컬럼
+PARTITION_COLS = {
+    "crypto_calendar": "start_time_kst",
+    "economic_calendar": "datetime",
+}
+
+# 첫 파티션 시작 월 (이보다 이전 데이터는 p_old 파티션에 들어감)
+PARTITION_START = date(2024, 1, 1)
+MONTHS_AHEAD = 6
+# 설정하면 이보다 오래된 월 파티션을 maintain() 이 {name}_archive 로 옮기고 삭제 (미설정/0 이면 정리하지 않음)
+KEEP_MONTHS = int(os.getenv("PARTITION_KEEP_MONTHS", "0") or 0)
+ARCHIVE = os.getenv("PARTITION_ARCHIVE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _month_add(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def _partition_clause(col: str, start: date, end: date) -> str:
+    """[start, end) 월 단위 RANGE 파티션 + p_old / p_max."""
+    parts = [f"PARTITION p_old VALUES LESS THAN (TO_DAYS('{start:%Y-%m-%d}'))"]
+    cur = start
+    while cur < end:
+        nxt = _month_add(cur, 1)
+        parts.append(f"PARTITION p{cur:%Y%m} VALUES LESS THAN (TO_DAYS('{nxt:%Y-%m-%d}'))")
+        cur = nxt
+    parts.append("PARTITION p_max VALUES LESS THAN MAXVALUE")
+    return f"PARTITION BY RANGE (TO_DAYS(`{col}`)) (\n    " + ",\n    ".join(parts) + "\n)"
+
+
+def crypto_calendar_ddl(name: str = "crypto_calendar", partitioned: bool = True) -> str:
+    """
+    crypto_calendar 명시 스키마.
+    - 파티션 테이블의 PK/UNIQUE 에는 파티션 컬럼이 들어가야 하므로 PK = (id, start_time_kst).
+      id 단독 중복은 기존처럼 db.insert_crypto_calendar 가 걸러낸다.
+    - idx_time_coin: 구간 조회 + coin 필터 (GCal range push, query_api)
+    - start_time_utc_ms: 수집 시 정규화한 UTC epoch ms (utils.timezones 로 렌더링)
+    """
+    ddl = f"""
+CREATE TABLE IF NOT EXISTS {name} (
+    id VARCHAR(64) NOT NULL,
+    title VARCHAR(512),
+    categories VARCHAR(255),
+    coin_name VARCHAR(128),
+    coin_symbol VARCHAR(32),
+    start_time_kst DATETIME NOT NULL,
+    start_time_utc_ms BIGINT,
+    link VARCHAR(1024),
+    source VARCHAR(255),
+    PRIMARY KEY (id, start_time_kst),
+    KEY idx_time_coin (start_time_kst, coin_symbol),
+    KEY idx_coin_time (coin_symbol, start_time_kst),
+    KEY idx_start_time_utc_ms (start_time_utc_ms)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+    if partitioned:
+        end = _month_add(date.today().replace(day=1), MONTHS_AHEAD)
+        ddl += "\n" + _partition_clause("start_time_kst", PARTITION_START, end)
+    return ddl
+
+
+def economic_calendar_ddl(name: str = "economic_calendar", partitioned: bool = True) -> str:
+    """
+    economic_calendar 명시 스키마.
+    - uk_event: 기존 dedup 키 (datetime, currency, title)
+    - idx_cur_time: currency + 구간 조회 (impact_bulls 필터까지 인덱스에서 처리, SELECT * 는 행 조회 필요)
+    - datetime_utc_ms: 수집 시 정규화한 UTC epoch ms (datetime 은 KST 현지 시각 그대로 dedup 키로 유지)
+    """
+    ddl = f"""
+CREATE TABLE IF NOT EXISTS {name} (
+    `datetime` DATETIME NOT NULL,
+    currency VARCHAR(16),
+    impact_bulls TINYINT,
+    title VARCHAR(255) NOT NULL,
+    event_url VARCHAR(512),
+    actual VARCHAR(64),
+    forecast VARCHAR(64),
+    previous VARCHAR(64),
+    type VARCHAR(16),
+    datetime_utc_ms BIGINT,
+    UNIQUE KEY uk_event (`datetime`, currency, title),
+    KEY idx_cur_time (currency, `datetime`, impact_bulls),
+    KEY idx_time_impact (`datetime`, impact_bulls),
+    KEY idx_datetime_utc_ms (datetime_utc_ms)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+    if partitioned:
+        end = _month_add(date.today().replace(day=1), MONTHS_AHEAD)
+        ddl += "\n" + _partition_clause("datetime", PARTITION_START, end)
+    return ddl
+
+
+TABLE_DDLS = {
+    "crypto_calendar": crypto_calendar_ddl,
+    "economic_calendar": economic_calendar_ddl,
+}
+
+
+def _table_exists(conn, name: str) -> bool:
+    return conn.execute(
+        text("SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"),
+        {"t": name},
+    ).scalar() > 0
+
+
+def _is_partitioned(conn, name: str) -> bool:
+    return conn.execute(
+        text("""
+            SELECT COUNT(*) FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL
+        """),
+        {"t": name},
+    ).scalar() > 0
+
+
+def _partitions(conn, name: str) -> list[str]:
+    rows = conn.execute(
+        text("""
+            SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION
+        """),
+        {"t": name},
+    ).all()
+    return [r[0] for r in rows]
+
+
+def migrate():
+    """
+    calendar 테이블을 명시 스키마(키/인덱스/월 파티션)로 맞춘다.
+    - 테이블이 없으면 생성
+    - to_sql 로 암묵 생성된(파티션 없는) 테이블이면
+      새 테이블 생성 → INSERT IGNORE 로 복사(중복 제거) → RENAME 으로 교체
+      (기존 테이블은 {name}_pre_migrate_YYYYmmddHHMMSS 로 남겨둔다)
+    - 부가 테이블(revision/cluster/outbox)도 함께 생성, UTC ms 컬럼이 빈 행은 채움
+    """
+    for name, ddl_fn in TABLE_DDLS.items():
+        with db.engine.begin() as conn:
+            if not _table_exists(conn, name):
+                conn.execute(text(ddl_fn(name)))
+                print(f"[schema] {name} 생성")
+                continue
+            if _is_partitioned(conn, name):
+                print(f"[schema] {name} 이미 최신 스키마")
+                continue
+
+            tmp = f"{name}_migrate_new"
+            backup = f"{name}_pre_migrate_{datetime.now():%Y%m%d%H%M%S}"
+            conn.execute(text(f"DROP TABLE IF EXISTS {tmp}"))
+            conn.execute(text(ddl_fn(tmp)))
+            new_cols = [r[0] for r in conn.execute(text(f"SHOW COLUMNS FROM {tmp}")).all()]
+            old_cols = {r[0] for r in conn.execute(text(f"SHOW COLUMNS FROM {name}")).all()}
+            cols = ", ".join(f"`{c}`" for c in new_cols if c in old_cols)
+            ts_col = PARTITION_COLS[name]
+            copied = conn.execute(text(
+                f"INSERT IGNORE INTO {tmp} ({cols}) SELECT {cols} FROM {name} WHERE `{ts_col}` IS NOT NULL"
+            )).rowcount
+            conn.execute(text(f"RENAME TABLE {name} TO {backup}, {tmp} TO {name}"))
+            db._backfill_utc_ms(conn, name)
+            print(f"[schema] {name} 마이그레이션 완료: {copied}행 복사, 기존 테이블 → {backup}")
+
+    for ddl in (db.ECONOMIC_REVISION_DDL, db.CRYPTO_CLUSTER_DDL, db.GCAL_OUTBOX_DDL):
+        db._ensure_table(ddl)
+    for name in TABLE_DDLS:
+        db._ensure_utc_column(name)
+    ensure_future_partitions()
+
+
+def ensure_future_partitions(months_ahead: int = MONTHS_AHEAD):
+    """p_max 를 쪼개 앞으로 months_ahead 개월치 월 파티션을 미리 만든다."""
+    end = _month_add(date.today().replace(day=1), months_ahead)
+    with db.engine.begin() as conn:
+        for name, col in PARTITION_COLS.items():
+            if not _table_exists(conn, name) or not _is_partitioned(conn, name):
+                continue
+            existing = set(_partitions(conn, name))
+            months = sorted(p for p in existing if p[1:].isdigit())
+            cur = _month_add(datetime.strptime(months[-1][1:], "%Y%m").date(), 1) if months else PARTITION_START
+            new_parts = []
+            while cur < end:
+                nxt = _month_add(cur, 1)
+                new_parts.append(f"PARTITION p{cur:%Y%m} VALUES LESS THAN (TO_DAYS('{nxt:%Y-%m-%d}'))")
+                cur = nxt
+            if not new_parts:
+                continue
+            new_parts.append("PARTITION p_max VALUES LESS THAN MAXVALUE")
+            conn.execute(text(f"ALTER TABLE {name} REORGANIZE PARTITION p_max INTO ({', '.join(new_parts)})"))
+            print(f"[schema] {name} 파티션 {len(new_parts) - 1}개 추가")
+
+
+def archive_old_partitions(keep_months: int = 24, archive: bool = True):
+    """
+    keep_months 보다 오래된 월 파티션을 정리.
+    - archive=True: {name}_archive 테이블(파티션 없음)로 복사 후 DROP PARTITION
+    - archive=False: 바로 DROP PARTITION
+    """
+    cutoff = _month_add(date.today().replace(day=1), -keep_months)
+    with db.engine.begin() as conn:
+        for name in PARTITION_COLS:
+            if not _table_exists(conn, name) or not _is_partitioned(conn, name):
+                continue
+            old = [p for p in _partitions(conn, name)
+                   if p[1:].isdigit() and datetime.strptime(p[1:], "%Y%m").date() < cutoff]
+            if not old:
+                continue
+            if archive:
+                arch = f"{name}_archive"
+                if not _table_exists(conn, arch):
+                    conn.execute(text(f"CREATE TABLE {arch} LIKE {name}"))
+                    conn.execute(text(f"ALTER TABLE {arch} REMOVE PARTITIONING"))
+                for p in old:
+                    conn.execute(text(f"INSERT IGNORE INTO {arch} SELECT * FROM {name} PARTITION ({p})"))
+            conn.execute(text(f"ALTER TABLE {name} DROP PARTITION {', '.join(old)}"))
+            print(f"[schema] {name} 파티션 정리: {old} ({'archive 후 ' if archive else ''}삭제)")
+
+
+def _unpartitioned_tables() -> list[str]:
+    with db.engine.begin() as conn:
+        return [name for name in PARTITION_COLS
+                if _table_exists(conn, name) and not _is_partitioned(conn, name)]
+
+
+def maintain(keep_months: int = KEEP_MONTHS, archive: bool = ARCHIVE):
+    """
+    정기 파티션 관리 (main.py 가 매 실행 끝에 호출, 또는 python -m utils.schema maintain).
+    - 앞으로 MONTHS_AHEAD 개월치 파티션 생성 (p_max 에 쌓이지 않도록)
+    - keep_months 보다 오래된 파티션 archive/삭제 (기본 0 = 삭제하지 않음, PARTITION_KEEP_MONTHS 로 설정)
+    마이그레이션 전(파티션 없는) 테이블은 건너뛰고 migrate 실행을 안내한다.
+    """
+    pending = _unpartitioned_tables()
+    if pending:
+        print(f"[schema] 파티션 없는 테이블 {pending}: 'python -m utils.schema migrate' 실행 전까지 파티션 관리 생략")
+    ensure_future_partitions()
+    if keep_months > 0:
+        archive_old_partitions(keep_months, archive)
+
+
+def explain(sql: str, params: dict | None = None) -> pd.DataFrame:
+    """EXPLAIN 결과 (파티션 pruning / 인덱스 사용 확인용)."""
+    with db.engine.begin() as conn:
+        return pd.read_sql(text("EXPLAIN " + sql), conn, params=params or {})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calendar 테이블 스키마/파티션 관리")
+    sub = parser.add_subparsers(dest="cmd")
+    sub.add_parser("migrate", help="명시 스키마로 생성/마이그레이션 (기본)")
+    p_maint = sub.add_parser("maintain", help="미래 파티션 생성 + 오래된 파티션 archive/삭제")
+    p_maint.add_argument("--keep-months", type=int, default=KEEP_MONTHS)
+    p_maint.add_argument("--no-archive", action="store_true", help="archive 테이블로 복사하지 않고 바로 삭제")
+    args = parser.parse_args()
+    if args.cmd == "maintain":
+        maintain(args.keep_months, archive=ARCHIVE and not args.no_archive)
+    else:
+        migrate()
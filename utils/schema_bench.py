@@ -0,0 +1,99 @@
+# economic_calendar 스키마 벤치마크
+# to_sql 로 암묵 생성된 테이블(인덱스/파티션 없음) vs schema.py 명시 스키마를
+# 같은 데이터로 키워가며 대표 쿼리 시간을 비교한다.
+#   python -m utils.schema_bench --sizes 100000 1000000 3000000
+# 벤치 테이블(_bench_*)은 끝나면 삭제한다.
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+import utils.db as db
+import utils.schema as schema
+
+CURRENCIES = ["USD", "EUR", "JPY", "GBP", "CNY", "KRW", "AUD", "CAD", "CHF", "NZD"]
+
+QUERIES = {
+    # gcal_shards.publish_range 와 같은 하루 구간 조회
+    "range_1d": "SELECT * FROM {t} WHERE `datetime` >= :s AND `datetime` < DATE_ADD(:s, INTERVAL 1 DAY) ORDER BY `datetime`",
+    # query_api currency + impact 필터
+    "currency_7d": "SELECT `datetime`, currency, impact_bulls FROM {t} "
+                   "WHERE currency = 'USD' AND `datetime` >= :s AND `datetime` < DATE_ADD(:s, INTERVAL 7 DAY) "
+                   "AND impact_bulls >= 2",
+    # insert_economic_calendar dedup 키 조회
+    "dedup_key": "SELECT 1 FROM {t} WHERE `datetime` = :s AND currency = 'USD' AND title = 'bench event 1'",
+}
+
+
+def _synthetic(n: int, start: str = "2024-01-01", seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp(start)
+    minutes = np.sort(rng.integers(0, 60 * 24 * 365 * 2, size=n))
+    return pd.DataFrame({
+        "datetime": base + pd.to_timedelta(minutes, unit="min"),
+        "currency": rng.choice(CURRENCIES, size=n),
+        "impact_bulls": rng.integers(0, 4, size=n),
+        "title": [f"bench event {i}" for i in range(n)],
+        "event_url": "https://www.investing.com/economic-calendar/bench",
+        "actual": "", "forecast": "", "previous": "", "type": None,
+    })
+
+
+def _time_query(conn, sql: str, params: dict, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def run(sizes: list[int], repeat: int = 5) -> pd.DataFrame:
+    plain, managed = "_bench_economic_plain", "_bench_economic_managed"
+    results = []
+    loaded = 0
+    try:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {plain}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {managed}"))
+            conn.execute(text(schema.economic_calendar_ddl(managed)))
+
+        for size in sorted(sizes):
+            chunk = _synthetic(size - loaded, seed=size)
+            chunk["title"] = [f"bench event {i}" for i in range(loaded, size)]
+            with db.engine.begin() as conn:
+                # to_sql 암묵 스키마 (기존 방식)
+                chunk.to_sql(plain, conn, if_exists="append", index=False, chunksize=5000)
+                chunk.to_sql(managed, conn, if_exists="append", index=False, chunksize=5000)
+                conn.execute(text(f"ANALYZE TABLE {plain}, {managed}"))
+            loaded = size
+
+            with db.engine.begin() as conn:
+                s = "2025-03-01 00:00:00"
+                for qname, sql in QUERIES.items():
+                    results.append({
+                        "rows": size,
+                        "query": qname,
+                        "plain_ms": round(_time_query(conn, sql.format(t=plain), {"s": s}, repeat), 2),
+                        "managed_ms": round(_time_query(conn, sql.format(t=managed), {"s": s}, repeat), 2),
+                    })
+            print(f"[bench] {size:,}행 측정 완료")
+    finally:
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {plain}"))
+            conn.execute(text(f"DROP TABLE IF EXISTS {managed}"))
+
+    df = pd.DataFrame(results)
+    df["speedup"] = (df["plain_ms"] / df["managed_ms"]).round(1)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(run(args.sizes, args.repeat).to_string(index=False))
@@ -0,0 +1,287 @@
+# pip install pyarrow
+#
+# calendar 테이블 스냅샷 export / import
+#   python -m utils.snapshot export snapshots/2025-10-01
+#   python -m utils.snapshot import snapshots/2025-10-01                       # .env 의 MySQL
+#   python -m utils.snapshot import snapshots/2025-10-01 --url sqlite:///local.db --truncate
+#
+# - export: 테이블별 zstd 압축 parquet(열 단위) + manifest.json
+# - import(MySQL): 비고유 보조 인덱스를 떼고 LOAD DATA LOCAL INFILE 로 적재한 뒤 인덱스를 한 번에 재생성
+# - import(SQLite): multi-row INSERT 로 적재 후 인덱스 생성 (로컬 테스트용)
+
+import os
+import json
+import time
+import argparse
+import tempfile
+from datetime import date, datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, inspect, insert, text
+
+import utils.db as db
+
+TABLES = [
+    "crypto_calendar",
+    "economic_calendar",
+    "economic_calendar_revision",
+    "crypto_event_cluster",
+]
+EXPORT_CHUNK_ROWS = 200_000
+ZSTD_LEVEL = 9
+
+# SQLite 에서는 MySQL DDL 을 쓸 수 없으므로 적재 후 dedup/조회 인덱스만 만든다
+SQLITE_INDEXES = {
+    "crypto_calendar": [
+        # MySQL PRIMARY KEY (id, start_time_kst) 와 같은 키 (예전 id 단독 인덱스는 교체)
+        "DROP INDEX IF EXISTS uk_crypto_id",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uk_crypto_id_time ON crypto_calendar (id, start_time_kst)",
+        "CREATE INDEX IF NOT EXISTS idx_time_coin ON crypto_calendar (start_time_kst, coin_symbol)",
+    ],
+    "economic_calendar": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uk_event ON economic_calendar (`datetime`, currency, title)",
+        "CREATE INDEX IF NOT EXISTS idx_cur_time ON economic_calendar (currency, `datetime`, impact_bulls)",
+    ],
+    "economic_calendar_revision": [
+        "CREATE INDEX IF NOT EXISTS idx_key_hash ON economic_calendar_revision (key_hash)",
+    ],
+    "crypto_event_cluster": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uk_cluster_member ON crypto_event_cluster (provider, event_id)",
+    ],
+}
+
+
+# -------------------- export --------------------
+
+def _arrow_schema(insp, table: str) -> pa.Schema:
+    """
+    테이블 컬럼 정의 → Arrow 스키마. 첫 chunk 에서 스키마를 추론하면 그 chunk 에서 전부 NULL 인
+    컬럼이 null 타입이 되어 뒤 chunk 의 값을 cast 할 수 없으므로 DDL 기준으로 고정한다.
+    """
+    fields = []
+    for col in insp.get_columns(table):
+        try:
+            py = col["type"].python_type
+        except NotImplementedError:
+            py = str
+        if py is bool:
+            typ = pa.bool_()
+        elif py is int:
+            typ = pa.int64()
+        elif py is float:
+            typ = pa.float64()
+        elif py is datetime:
+            typ = pa.timestamp("us")
+        elif py is date:
+            typ = pa.date32()
+        else:
+            typ = pa.string()
+        fields.append(pa.field(col["name"], typ))
+    return pa.schema(fields)
+
+
+def export_snapshot(out_dir: str, tables: list[str] | None = None, engine=None) -> dict:
+    """
+    테이블별 <out_dir>/<table>.parquet (zstd) + manifest.json 작성.
+    read_sql chunksize 로 스트리밍하므로 메모리는 EXPORT_CHUNK_ROWS 수준만 사용.
+    """
+    engine = engine or db.engine
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    insp = inspect(engine)
+    manifest = {"created_at": pd.Timestamp.now(tz="UTC").isoformat(), "dialect": engine.dialect.name, "tables": {}}
+
+    for table in tables or TABLES:
+        if not insp.has_table(table):
+            print(f"[snapshot] {table} 없음, 건너뜀")
+            continue
+        t0 = time.perf_counter()
+        path = out / f"{table}.parquet"
+        writer, rows = None, 0
+        schema = _arrow_schema(insp, table)
+        with engine.connect().execution_options(stream_results=True) as conn:
+            ddl = None
+            if engine.dialect.name == "mysql":
+                ddl = conn.execute(text(f"SHOW CREATE TABLE {table}")).all()[0][1]
+            for chunk in pd.read_sql(text(f"SELECT * FROM {table}"), conn, chunksize=EXPORT_CHUNK_ROWS):
+                batch = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False, safe=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, schema, compression="zstd", compression_level=ZSTD_LEVEL)
+                writer.write_table(batch)
+                rows += len(chunk)
+        if writer is not None:
+            writer.close()
+        manifest["tables"][table] = {"rows": rows, "file": path.name if rows else None, "ddl": ddl}
+        print(f"[snapshot] {table}: {rows:,}행 → {path.name} ({time.perf_counter() - t0:.1f}s)")
+
+    (out / "manifest.json").write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    return manifest
+
+
+# -------------------- import --------------------
+
+def _mysql_escape(df: pd.DataFrame) -> pd.DataFrame:
+    """LOAD DATA 기본 ESCAPED BY '\\\\' 규칙에 맞춰 문자열/NULL 변환."""
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            if s.dt.tz is not None:
+                s = s.dt.tz_localize(None)
+            v = s.dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif pd.api.types.is_bool_dtype(s):
+            v = s.astype("Int64").astype(str)
+        else:
+            v = (s.astype(str).str.replace("\\", "\\\\", regex=False)
+                  .str.replace("\t", "\\t", regex=False)
+                  .str.replace("\n", "\\n", regex=False)
+                  .str.replace("\r", "\\r", regex=False))
+        out[col] = v.where(s.notna(), "\\N")
+    return out
+
+
+def _secondary_indexes(conn, table: str) -> dict:
+    """PRIMARY 를 제외한 인덱스 정의 {name: (unique, [cols])}."""
+    rows = conn.execute(
+        text("""
+            SELECT INDEX_NAME, NON_UNIQUE, COLUMN_NAME FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t AND INDEX_NAME <> 'PRIMARY'
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """),
+        {"t": table},
+    ).all()
+    out = {}
+    for name, non_unique, col in rows:
+        out.setdefault(name, (not non_unique, []))[1].append(col)
+    return out
+
+
+def _load_mysql(engine, table: str, pf: pq.ParquetFile, ddl: str | None, truncate: bool) -> int:
+    with engine.begin() as conn:
+        if not inspect(conn).has_table(table):
+            if not ddl:
+                raise RuntimeError(f"{table} 테이블이 없고 manifest 에 DDL 도 없습니다.")
+            conn.execute(text(ddl))
+        if truncate:
+            conn.execute(text(f"TRUNCATE TABLE {table}"))
+        # 비고유 인덱스만 뗀다 (고유키는 남겨서 IGNORE 로 중복을 거른다)
+        indexes = {n: v for n, v in _secondary_indexes(conn, table).items() if not v[0]}
+        if indexes:
+            conn.execute(text(f"ALTER TABLE {table} " + ", ".join(f"DROP INDEX `{n}`" for n in indexes)))
+
+    rows = 0
+    try:
+        with engine.begin() as conn:
+            # 빈 테이블에 적재할 때만 unique 검사를 끈다 (기존 행이 있으면 IGNORE 중복 판정이 필요)
+            if truncate:
+                conn.execute(text("SET unique_checks = 0"))
+            conn.execute(text("SET foreign_key_checks = 0"))
+            with tempfile.TemporaryDirectory() as tmp:
+                for i in range(pf.num_row_groups):
+                    df = pf.read_row_group(i).to_pandas()
+                    path = os.path.join(tmp, f"{table}_{i}.tsv")
+                    esc = _mysql_escape(df)
+                    with open(path, "w", encoding="utf-8", newline="") as f:
+                        f.writelines("\t".join(r) + "\n" for r in esc.itertuples(index=False, name=None))
+                    cols = ", ".join(f"`{c}`" for c in df.columns)
+                    conn.exec_driver_sql(
+                        f"LOAD DATA LOCAL INFILE '{Path(path).as_posix()}' IGNORE INTO TABLE {table} "
+                        f"CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({cols})"
+                    )
+                    rows += len(df)
+            conn.execute(text("SET unique_checks = 1, foreign_key_checks = 1"))
+    finally:
+        # 적재가 실패해도 인덱스는 원상복구
+        if indexes:
+            with engine.begin() as conn:
+                adds = []
+                for name, (unique, cols) in indexes.items():
+                    col_sql = ", ".join(f"`{c}`" for c in cols)
+                    adds.append(f"ADD {'UNIQUE ' if unique else ''}INDEX `{name}` ({col_sql})")
+                conn.execute(text(f"ALTER TABLE {table} " + ", ".join(adds)))
+    return rows
+
+
+def _sqlite_insert_ignore(pd_table, conn, keys, data_iter):
+    """to_sql method: multi-row INSERT OR IGNORE (MySQL 쪽 LOAD DATA ... IGNORE 와 같은 동작)."""
+    rows = [dict(zip(keys, r)) for r in data_iter]
+    return conn.execute(insert(pd_table.table).values(rows).prefix_with("OR IGNORE")).rowcount
+
+
+def _load_sqlite(engine, table: str, pf: pq.ParquetFile, truncate: bool) -> int:
+    rows = 0
+    with engine.begin() as conn:
+        if truncate and inspect(conn).has_table(table):
+            conn.execute(text(f"DELETE FROM {table}"))
+        for i in range(pf.num_row_groups):
+            df = pf.read_row_group(i).to_pandas()
+            for col in df.columns:
+                if isinstance(df[col].dtype, pd.DatetimeTZDtype):
+                    df[col] = df[col].dt.tz_localize(None)
+            # SQLite 바인드 변수 한도(32766) 안에서 multi-row INSERT
+            chunk = max(1, 30_000 // max(1, len(df.columns)))
+            # --truncate 없이 다시 적재하면 unique 인덱스가 이미 있으므로 중복 행은 건너뛴다
+            df.to_sql(table, conn, if_exists="append", index=False, chunksize=chunk, method=_sqlite_insert_ignore)
+            rows += len(df)
+        for sql in SQLITE_INDEXES.get(table, []):
+            conn.execute(text(sql))
+    return rows
+
+
+def import_snapshot(in_dir: str, url: str | None = None, tables: list[str] | None = None,
+                    truncate: bool = False) -> dict:
+    """
+    export_snapshot 결과를 적재.
+    - url 미지정: .env 의 MySQL (LOAD DATA LOCAL INFILE)
+    - url 이 sqlite:/// 이면 로컬 SQLite 에 multi-row INSERT OR IGNORE
+    """
+    src = Path(in_dir)
+    manifest = json.loads((src / "manifest.json").read_text(encoding="utf-8"))
+    if url:
+        engine = create_engine(url, future=True)
+    else:
+        # LOAD DATA LOCAL INFILE 은 클라이언트 측 허용이 필요
+        engine = create_engine(db.DB_URL, pool_pre_ping=True, future=True, connect_args={"local_infile": True})
+
+    result = {}
+    for table in tables or list(manifest["tables"]):
+        meta = manifest["tables"].get(table)
+        if not meta or not meta.get("file"):
+            continue
+        t0 = time.perf_counter()
+        pf = pq.ParquetFile(src / meta["file"])
+        if engine.dialect.name == "mysql":
+            rows = _load_mysql(engine, table, pf, meta.get("ddl"), truncate)
+        elif engine.dialect.name == "sqlite":
+            rows = _load_sqlite(engine, table, pf, truncate)
+        else:
+            raise ValueError(f"지원하지 않는 DB: {engine.dialect.name}")
+        result[table] = rows
+        print(f"[snapshot] {table}: {rows:,}행 적재 ({time.perf_counter() - t0:.1f}s)")
+
+    # 같은 프로세스의 query_api 캐시 등 무효화
+    for table in result:
+        db._notify_write(table, pd.DataFrame())
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="calendar 테이블 스냅샷 export/import")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_exp = sub.add_parser("export")
+    p_exp.add_argument("dir")
+    p_exp.add_argument("--tables", nargs="+")
+    p_imp = sub.add_parser("import")
+    p_imp.add_argument("dir")
+    p_imp.add_argument("--url", help="예: sqlite:///local.db (기본: .env 의 MySQL)")
+    p_imp.add_argument("--tables", nargs="+")
+    p_imp.add_argument("--truncate", action="store_true", help="적재 전에 기존 행 삭제")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        export_snapshot(args.dir, args.tables)
+    else:
+        import_snapshot(args.dir, args.url, args.tables, args.truncate)
@@ -0,0 +1,232 @@
+import os
+import time
+import socket
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import (
+    Column, Date, DateTime, Integer, MetaData, String, Table, Text,
+    UniqueConstraint, Index, create_engine, func, select, update, and_, or_,
+)
+
+import api.bitget.crypto_calendar as bec
+import api.investingcom.economic_calendar as ec
+import utils.db as db
+
+LEASE_SEC = int(os.getenv("TASK_LEASE_SEC", "120"))
+HEARTBEAT_SEC = int(os.getenv("TASK_HEARTBEAT_SEC", "30"))
+MAX_ATTEMPTS = int(os.getenv("TASK_MAX_ATTEMPTS", "5"))
+
+# MySQL / SQLite 양쪽에서 쓰도록 SQLAlchemy Core 로 정의
+metadata = MetaData()
+fetch_task = Table(
+    "fetch_task", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("source", String(16), nullable=False),
+    Column("day", Date, nullable=False),
+    Column("status", String(16), nullable=False, default="pending"),  # pending | running | done | failed
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("next_run_at", DateTime, nullable=False),
+    Column("lease_owner", String(64)),
+    Column("lease_expires_at", DateTime),
+    Column("rows_fetched", Integer),
+    Column("last_error", Text),
+    Column("updated_at", DateTime),
+    UniqueConstraint("source", "day", name="uk_source_day"),
+    Index("idx_claim", "status", "next_run_at"),
+)
+
+
+def _now(conn) -> datetime:
+    """
+    DB 서버 시각. 노드마다 시계가 어긋나도 lease 만료/재시도 시각을 같은 기준으로 비교하도록
+    (outbox_worker 의 NOW() 와 같은 방식) 호스트 시계 대신 이것을 쓴다.
+    """
+    return conn.execute(select(func.now())).scalar()
+
+
+def ensure_table(engine=None):
+    metadata.create_all(engine or db.engine, tables=[fetch_task])
+
+
+def enqueue_range(sources: list[str], start_date: str, end_date: str, engine=None) -> int:
+    """(source × 날짜) 작업을 추가. 이미 있는 (source, day)는 건드리지 않는다."""
+    engine = engine or db.engine
+    ensure_table(engine)
+    d0 = datetime.strptime(start_date, "%Y-%m-%d").date()
+    d1 = datetime.strptime(end_date, "%Y-%m-%d").date()
+    wanted = {(s, d0 + timedelta(days=i)) for s in sources for i in range((d1 - d0).days + 1)}
+    with engine.begin() as conn:
+        existing = set(conn.execute(
+            select(fetch_task.c.source, fetch_task.c.day)
+            .where(fetch_task.c.source.in_(sources), fetch_task.c.day.between(d0, d1))
+        ).all())
+        new = sorted(wanted - existing)
+        if new:
+            now = _now(conn)
+            conn.execute(fetch_task.insert(), [
+                {"source": s, "day": d, "status": "pending", "attempts": 0, "next_run_at": now, "updated_at": now}
+                for s, d in new
+            ])
+    print(f"[task] 작업 {len(new)}건 추가 (기존 {len(wanted) - len(new)}건)")
+    return len(new)
+
+
+class TaskWorker:
+    """
+    fetch_task 를 lease 방식으로 가져가 처리하는 워커.
+    - claim: 후보 id 조회 → 조건부 UPDATE(compare-and-set) 로 점유 (SKIP LOCKED 없이 MySQL/SQLite 공통)
+    - 처리 중에는 heartbeat 스레드가 lease 를 연장, 워커가 죽으면 lease 만료 후 다른 워커가 가져간다
+    - handlers: {"crypto": fn(day_str) -> rows, "economic": fn(day_str) -> rows}
+    """
+
+    def __init__(self, handlers: dict, engine=None, worker_id: str | None = None):
+        self.engine = engine or db.engine
+        self.handlers = handlers
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        ensure_table(self.engine)
+
+    def claim(self, limit: int = 1) -> list[dict]:
+        t = fetch_task.c
+        with self.engine.begin() as conn:
+            now = _now(conn)
+            claimable = and_(
+                t.source.in_(list(self.handlers)),
+                or_(
+                    and_(t.status == "pending", t.next_run_at <= now),
+                    and_(t.status == "running", t.lease_expires_at < now),
+                ),
+            )
+            candidates = conn.execute(
+                select(t.id).where(claimable).order_by(t.day, t.id).limit(limit * 4)
+            ).scalars().all()
+            claimed = []
+            for task_id in candidates:
+                res = conn.execute(
+                    update(fetch_task)
+                    .where(t.id == task_id, claimable)
+                    .values(status="running", lease_owner=self.worker_id,
+                            lease_expires_at=now + timedelta(seconds=LEASE_SEC),
+                            attempts=t.attempts + 1, updated_at=now)
+                )
+                if res.rowcount == 1:
+                    claimed.append(task_id)
+                if len(claimed) >= limit:
+                    break
+            if not claimed:
+                return []
+            rows = conn.execute(select(fetch_task).where(t.id.in_(claimed))).mappings().all()
+        return [dict(r) for r in rows]
+
+    def _heartbeat(self, task_id: int, stop: threading.Event):
+        t = fetch_task.c
+        while not stop.wait(HEARTBEAT_SEC):
+            with self.engine.begin() as conn:
+                now = _now(conn)
+                res = conn.execute(
+                    update(fetch_task)
+                    .where(t.id == task_id, t.lease_owner == self.worker_id, t.status == "running")
+                    .values(lease_expires_at=now + timedelta(seconds=LEASE_SEC), updated_at=now)
+                )
+            if res.rowcount == 0:
+                print(f"[task] lease 상실: id={task_id}")
+                return
+
+    def _finish(self, task: dict, ok: bool, rows: int | None = None, error: str | None = None):
+        t = fetch_task.c
+        with self.engine.begin() as conn:
+            now = _now(conn)
+            if ok:
+                values = {"status": "done", "rows_fetched": rows, "last_error": None}
+            elif task["attempts"] >= MAX_ATTEMPTS:
+                values = {"status": "failed", "last_error": error}
+            else:
+                backoff = min(3600, 30 * 2 ** (task["attempts"] - 1))
+                values = {"status": "pending", "last_error": error, "next_run_at": now + timedelta(seconds=backoff)}
+            conn.execute(
+                update(fetch_task)
+                .where(t.id == task["id"], t.lease_owner == self.worker_id)
+                .values(lease_owner=None, lease_expires_at=None, updated_at=now, **values)
+            )
+
+    def run_one(self, task: dict):
+        day = task["day"].strftime("%Y-%m-%d") if hasattr(task["day"], "strftime") else str(task["day"])
+        stop = threading.Event()
+        hb = threading.Thread(target=self._heartbeat, args=(task["id"], stop), daemon=True)
+        hb.start()
+        try:
+            rows = self.handlers[task["source"]](day)
+            self._finish(task, True, rows=rows)
+            print(f"[task] {task['source']} {day} 완료: {rows}행")
+        except Exception as e:
+            self._finish(task, False, error=str(e)[:2000])
+            print(f"[task] {task['source']} {day} 실패({task['attempts']}회): {e}")
+        finally:
+            stop.set()
+            hb.join()
+
+    def run(self, idle_exit: bool = True, poll_sec: float = 5.0):
+        """작업이 없을 때 idle_exit=True 면 종료, 아니면 poll_sec 마다 재확인."""
+        while True:
+            tasks = self.claim(1)
+            if not tasks:
+                if idle_exit:
+                    return
+                time.sleep(poll_sec)
+                continue
+            for task in tasks:
+                self.run_one(task)
+
+
+def progress(engine=None) -> pd.DataFrame:
+    """source × status 별 작업 수."""
+    engine = engine or db.engine
+    t = fetch_task.c
+    with engine.begin() as conn:
+        df = pd.read_sql(select(t.source, t.status, func.count().label("n")).group_by(t.source, t.status), conn)
+    return df.pivot(index="source", columns="status", values="n").fillna(0).astype(int)
+
+
+def default_handlers() -> dict:
+    """실제 수집기 + utils.db 저장."""
+    def crypto(day: str) -> int:
+        payloads = bec.fetch_crypto_calendar_payloads(day, day, page_size=100)
+        if not payloads:
+            # 하루짜리 수집이 통째로 실패한 경우는 작업 재시도 대상
+            raise RuntimeError(f"crypto {day}: 응답 없음")
+        df = bec.crypto_payloads_to_df(payloads)
+        db.ingest_crypto({"bitget": df})
+        return len(df)
+
+    def economic(day: str) -> int:
+        df = ec.fetch_investing_range(day, day, tz_offset=9)
+        if not df.empty:
+            db.insert_economic_calendar(df.drop_duplicates(subset=["datetime", "currency", "title"]))
+        return len(df)
+
+    return {"crypto": crypto, "economic": economic}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="분산 fetch 작업 큐")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_enq = sub.add_parser("enqueue")
+    p_enq.add_argument("start")
+    p_enq.add_argument("end")
+    p_enq.add_argument("--sources", nargs="+", default=["crypto", "economic"])
+    p_work = sub.add_parser("work")
+    p_work.add_argument("--forever", action="store_true")
+    p_prog = sub.add_parser("progress")
+    for p in (p_enq, p_work, p_prog):
+        p.add_argument("--url", help="작업 테이블 DB (예: sqlite:///tasks.db, 기본: .env 의 MySQL)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.url, future=True) if args.url else db.engine
+    if args.cmd == "enqueue":
+        enqueue_range(args.sources, args.start, args.end, engine)
+    elif args.cmd == "work":
+        TaskWorker(default_handlers(), engine).run(idle_exit=not args.forever)
+    else:
+        print(progress(engine))
@@ -0,0 +1,77 @@
+from datetime import timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# 수집 기준 시간대: investing 은 tz_offset=9 로 한 번만 받고, 기존 키 컬럼(start_time_kst, datetime)도 KST
+CANONICAL_TZ = "Asia/Seoul"
+CANONICAL_TZ_OFFSET = 9
+
+# 테이블 → (UTC epoch ms 컬럼, 원본 현지 시각 컬럼)
+UTC_MS_COLUMNS = {
+    "crypto_calendar": ("start_time_utc_ms", "start_time_kst"),
+    "economic_calendar": ("datetime_utc_ms", "datetime"),
+}
+
+
+def fixed_offset(hours: float) -> timezone:
+    """investing tz_offset(시간) → tzinfo."""
+    return timezone(timedelta(hours=hours))
+
+
+def to_utc_ms(values, assume_tz=CANONICAL_TZ) -> pd.Series:
+    """
+    시각 목록(str / datetime / Timestamp) → UTC epoch ms (Int64, 변환 불가는 <NA>).
+    naive 값은 assume_tz 현지 시각으로 본다. 전체를 한 번에 변환 (행 단위 tz 처리 X).
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    ts = pd.to_datetime(s, errors="coerce")
+    if ts.dtype == object:
+        # offset 이 섞여 있으면 UTC 로 맞춰서 다시 변환
+        ts = pd.to_datetime(s, errors="coerce", utc=True)
+    if ts.dt.tz is None:
+        ts = ts.dt.tz_localize(assume_tz, ambiguous="NaT", nonexistent="NaT")
+    utc = ts.dt.tz_convert("UTC").dt.tz_localize(None)
+    ms = utc.to_numpy(dtype="datetime64[ms]").view(np.int64)
+    return pd.Series(ms, index=s.index).astype("Int64").mask(utc.isna().to_numpy())
+
+
+def from_utc_ms(ms, tz: str = CANONICAL_TZ) -> pd.Series:
+    """UTC epoch ms → tz-aware datetime (tz 로 한 번에 변환)."""
+    s = ms if isinstance(ms, pd.Series) else pd.Series(ms)
+    return pd.to_datetime(pd.to_numeric(s, errors="coerce"), unit="ms", utc=True).dt.tz_convert(tz)
+
+
+def rfc3339(ms, tz: str = CANONICAL_TZ) -> pd.Series:
+    """UTC epoch ms → tz 현지 시각 RFC3339 문자열 ('2025-01-01T09:00:00+09:00'), 없으면 None."""
+    local = from_utc_ms(ms, tz)
+    wall = local.dt.tz_localize(None)
+    offset_min = ((wall - local.dt.tz_convert("UTC").dt.tz_localize(None)).dt.total_seconds() // 60).fillna(0)
+    sign = pd.Series(np.where(offset_min < 0, "-", "+"), index=local.index)
+    mins = offset_min.abs().astype(int)
+    out = (wall.dt.strftime("%Y-%m-%dT%H:%M:%S") + sign
+           + (mins // 60).astype(str).str.zfill(2) + ":" + (mins % 60).astype(str).str.zfill(2))
+    return out.where(local.notna(), None)
+
+
+def render(df: pd.DataFrame, table: str, tz: str = CANONICAL_TZ) -> pd.Series:
+    """저장 행 → tz 현지 시각 (UTC ms 컬럼 기준, 없으면 원본 컬럼을 CANONICAL_TZ 로 해석)."""
+    return from_utc_ms(utc_ms_of(df, table), tz)
+
+
+def utc_ms_of(df: pd.DataFrame, table: str) -> pd.Series:
+    """행들의 UTC epoch ms. 저장된 UTC 컬럼이 비어 있는 행만 원본 컬럼에서 계산."""
+    col, src = UTC_MS_COLUMNS[table]
+    stored = (pd.to_numeric(df[col], errors="coerce").astype("Int64") if col in df.columns
+              else pd.Series(pd.NA, index=df.index, dtype="Int64"))
+    if stored.notna().all() or src not in df.columns:
+        return stored
+    return stored.fillna(to_utc_ms(df[src]))
+
+
+def add_utc_ms(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    """저장 직전 UTC ms 컬럼을 채운 사본 (이미 채워진 값은 유지)."""
+    if df.empty:
+        return df
+    col, _ = UTC_MS_COLUMNS[table]
+    return df.assign(**{col: utc_ms_of(df, table)})